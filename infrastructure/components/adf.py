@@ -0,0 +1,753 @@
+"""ADF stage: Azure Data Factory and its link to Databricks (principals, runtime, datasets)."""
+import base64
+from typing import Any, Optional
+
+import pulumi
+import pulumi_azure  # TODO: Consider migrating to native
+import pulumi_azure_native as azure_native
+
+from components.base import HeiferComponent
+from components.storage import HeiferStorage
+from components.workspace import HeiferWorkspace
+from configurations.config_heifer import HeiferConfig, HeiferClusterConfiguration
+from configurations.config_compute_profiles import ComputeProfilesConfig
+from configurations.config_spark_performance import SparkPerformanceConfig
+from configurations.config_rio import RioPipelineConfig
+from configurations.config_bak_unzip_pipeline import BakUnzipPipelineConfig
+from configurations.config_bak_serialization_distribution import BakSerializationDistributionConfig
+from utilities.job_run import DatabricksJobRun
+from utilities.rio_state import bootstrap_notebook_source, bootstrap_revision
+
+
+class HeiferAdf(HeiferComponent):
+    """Azure Data Factory of HeifER, linked to the Databricks workspace.
+
+    The link (and everything requiring the Databricks account) is created only once both
+    DATABRICKS_ACCOUNT_ID and DATABRICKS_SERVICE_PRINCIPAL_FOR_ADF_APP_UUID are configured.
+    Args:
+        resource_name: Name of the component.
+        storage: Storage stage (resource group and storage account).
+        workspace: Workspace stage.
+        current_client: Client configuration of the deployer (subscription, tenant, object ID).
+        opts: Options of the component.
+    """
+    def __init__(self, resource_name: str, storage: HeiferStorage, workspace: HeiferWorkspace,
+                 current_client: pulumi.Output,
+                 opts: Optional[pulumi.ResourceOptions] = None):
+        super().__init__("HeiferAdf", resource_name, storage.unit, opts)
+        _rg = storage.resource_group
+
+        # -- Create Azure Data Factory --
+        # self.adf = azure_native.datafactory.Factory(
+        #     resource_name=HeiferConfig.AZURE_DATA_FACTORY_NAME,
+        #     factory_name=HeiferConfig.AZURE_DATA_FACTORY_NAME,
+        #     # managed_virtual_network_enabled=True,
+        #     resource_group_name=_rg.name,
+        #     location=_rg.location,
+        #     identity=azure_native.datafactory.FactoryIdentityArgs(type="SystemAssigned"),
+        # )
+        self.adf = pulumi_azure.datafactory.Factory(
+            resource_name=self.unit.azure_data_factory_name,
+            name=self.unit.azure_data_factory_name,
+            managed_virtual_network_enabled=True,
+            resource_group_name=_rg.name,
+            location=_rg.location,
+            identity=pulumi_azure.datafactory.FactoryIdentityArgs(type="SystemAssigned"),
+            opts=self.child_opts(),
+        )
+        # -------------------------------
+
+        # Resources the pipelines depend on (extended once the Databricks link exists)
+        self.pipeline_dependencies: list[pulumi.Resource] = [workspace.readiness]
+        # Whether ADF is linked to Databricks (pipelines can be deployed)
+        self.databricks_linked: bool = bool(
+            HeiferConfig.DATABRICKS_ACCOUNT_ID
+            and self.unit.databricks_service_principal_for_adf_app_uuid
+        )
+        if self.databricks_linked:
+            # The following code does not make sense to run till the DATABRICKS_ACCOUNT_ID is set
+            self._link_databricks(storage, workspace, current_client)
+
+        self.register_outputs({"data_factory_id": self.adf.id})
+
+    def _link_databricks(self, storage: HeiferStorage, workspace: HeiferWorkspace,
+                         current_client: pulumi.Output):
+        # Providers needed only once the Databricks account is configured (loaded lazily)
+        import pulumi_azuread
+        import pulumi_databricks
+
+        _rg = storage.resource_group
+        _workspace = workspace.databricks_workspace
+
+        # -- Configure Databricks provider to be able to deploy Cluster --
+        heifer_databricks_provider = pulumi_databricks.Provider(
+            resource_name=self.child_name("heifer-databricks-provider"),
+            host=_workspace.workspace_url,
+            azure_client_id=self.unit.databricks_service_principal_for_adf_app_uuid,
+            account_id=HeiferConfig.DATABRICKS_ACCOUNT_ID,
+            azure_use_msi=True,
+            opts=self.child_opts(depends_on=[_workspace]),
+        )
+        # ----------------------------------------------------------------
+
+        # -- Assign role to the ADF's Service Principal to allow cluster creation --
+        heifer_adf_serpr_role_assignment = azure_native.authorization.RoleAssignment(
+            resource_name=self.child_name('heifer-adf-serpr-role-assignment'),
+            principal_id=self.unit.databricks_service_principal_for_adf_app_uuid,
+            principal_type=azure_native.authorization.PrincipalType.SERVICE_PRINCIPAL,
+            # role_definition_name='Contributor',
+            role_definition_id=pulumi.Output.format(
+                "/subscriptions/{0}/providers/Microsoft.Authorization/roleDefinitions/"
+                "b24988ac-6180-42a0-ab88-20f7382dd24c",  # Contributor GUID
+                current_client.subscription_id
+            ),
+            scope=_workspace.id,
+            opts=self.child_opts(depends_on=[_workspace, self.adf]),
+        )
+        # --------------------------------------------------------------------------
+
+        # -- Create Service Principal with Storage Blob Data Contributor access to Storage Account --
+        # A) Azure requires Application Registration for principals
+        heifer_app_for_databricks_storage_account = pulumi_azuread.ApplicationRegistration(
+            resource_name=self.child_name("heifer-app-for-databricks-storage-account"),
+            display_name=self.child_name("heifer-app-for-databricks-storage-account"),
+            opts=self.child_opts(),
+        )
+        # B) To define client_secret value of the principal
+        heifer_app_for_databricks_storage_account_password = pulumi_azuread.ApplicationPassword(
+            resource_name=self.child_name("heifer-app-for-databricks-storage-account-password"),
+            application_id=heifer_app_for_databricks_storage_account.id,
+            opts=self.child_opts(),
+        )
+        # C) Actual service principal definition
+        heifer_service_principal_for_databricks_storage_account = pulumi_azuread.ServicePrincipal(
+            resource_name=self.child_name(
+                "heifer-service-principal-for-databricks-storage-account"
+            ),
+            client_id=heifer_app_for_databricks_storage_account.client_id,
+            owners=[current_client.object_id],
+            opts=self.child_opts(depends_on=[heifer_app_for_databricks_storage_account]),
+        )
+        # D) Assign Contributor privilege on the Storage for the Service Principal
+        heifer_perm_service_principal_can_contribute_storage = azure_native.authorization.RoleAssignment(  # noqa: E501
+            resource_name=self.child_name('heifer-perm-service-principal-can-contribute-storage'),
+            principal_id=heifer_service_principal_for_databricks_storage_account.id.apply(
+                lambda _pr: str(_pr)[len("/servicePrincipals/"):]
+                if str(_pr).startswith("/servicePrincipals/")
+                else str(_pr)
+            ),
+            principal_type=azure_native.authorization.PrincipalType.SERVICE_PRINCIPAL,
+            # role_definition_name='Storage Blob Data Contributor',
+            role_definition_id=pulumi.Output.format(
+                "/subscriptions/{0}/providers/Microsoft.Authorization/roleDefinitions/"
+                "ba92f5b4-2d11-453d-a403-e96b0029c9fe",  # Storage Bl. Dt. Contr. GUID
+                current_client.subscription_id
+            ),
+            scope=storage.storage_account.id,
+            opts=self.child_opts(
+                depends_on=[heifer_service_principal_for_databricks_storage_account,
+                            workspace.readiness]
+            ),
+        )
+        # -------------------------------------------------------------------
+
+        # -- Databricks Service Principal for ADF --
+        heifer_service_principal_adf = pulumi_databricks.ServicePrincipal(
+            resource_name=self.child_name("serpr-heifer-databricks-adf"),
+            application_id=self.unit.databricks_service_principal_for_adf_app_uuid,
+            # external_id=self.adf.identity.apply(lambda _identity: _identity['principal_id']),
+            # acl_principal_id=self.adf.identity.apply(lambda _identity: _identity['principal_id']),  # noqa: E501
+            display_name=f"Service Principal of Heifer ADF",
+            allow_cluster_create=True,
+            allow_instance_pool_create=True,
+            workspace_access=True,
+
+            opts=self.child_opts(
+                depends_on=[workspace.private_endpoint_databricks_control_plane,
+                            workspace.private_endpoint_databricks_filesystem,
+                            _workspace,
+                            heifer_databricks_provider],
+                provider=heifer_databricks_provider
+            ),
+        )
+        # ------------------------------------------
+
+        # -- Allow to print info for configuration of Databricks Spark cluster --
+        #   Warning: this is only for development and debugging purposes
+        _print_spark_config_notes: bool = False
+        if _print_spark_config_notes:
+            # You need to configure secrets in Pulumi.yaml file first
+            pulumi.export("Spark version", pulumi_databricks.get_spark_version(spark_version="3.4"))
+            pulumi.export(
+                "Node IDs",
+                pulumi_databricks.get_node_type(
+                    category='General Purpose', min_memory_gb=1, photon_driver_capable=False,
+                    photon_worker_capable=False
+                )
+            )
+        # -----------------------------------------------------------------------
+
+        # -- Integration runtime between ADF and Databricks --
+        heifer_adf_integration_runtime = pulumi_azure.datafactory.IntegrationRuntimeRule(
+            resource_name=self.child_name("heifer-adf-integration-runtime"),
+            name="heifer-adf-integration-runtime",
+            data_factory_id=self.adf.id,
+            location=_rg.location,
+            virtual_network_enabled=True,
+            opts=self.child_opts(depends_on=[self.adf]),
+        )
+        # ----------------------------------------------------
+
+        # -- Databricks Secret Scope --
+        pulumi_databricks.SecretScope(
+            resource_name=self.child_name(HeiferConfig.DATABRICKS_SECRET_SCOPE_NAME),
+            name=HeiferConfig.DATABRICKS_SECRET_SCOPE_NAME,
+            opts=self.child_opts(
+                depends_on=[heifer_adf_integration_runtime,
+                            heifer_service_principal_adf],
+                provider=heifer_databricks_provider,
+            ),
+        )
+        # -----------------------------
+
+        # -- Spark configuration of job clusters (secrets and connection to Data lake) --
+        _spark_config: dict[str, Any] = HeiferClusterConfiguration.SPARK_CONFIG | {
+            # A) MANDATORY: Connection to Data lake
+            f"fs.azure.account.auth.type.{self.unit.storage_account_name}.dfs.core.windows.net": "OAuth",  # noqa: E501
+            f"fs.azure.account.oauth.provider.type.{self.unit.storage_account_name}.dfs.core.windows.net": "org.apache.hadoop.fs.azurebfs.oauth2.ClientCredsTokenProvider",  # noqa: E501
+            f"fs.azure.account.oauth2.client.id.{self.unit.storage_account_name}.dfs.core.windows.net": heifer_service_principal_for_databricks_storage_account.client_id.apply(lambda _client_id: _client_id),  # noqa: E501
+            f"fs.azure.account.oauth2.client.secret.{self.unit.storage_account_name}.dfs.core.windows.net": heifer_app_for_databricks_storage_account_password.value.apply(lambda _value: _value),  # noqa: E501
+            f"fs.azure.account.oauth2.client.endpoint.{self.unit.storage_account_name}.dfs.core.windows.net": pulumi.Output.format("https://login.microsoftonline.com/{0}/oauth2/token", current_client.tenant_id),  # noqa: E501
+            "spark.secret.datalake-uri": f"{self.unit.storage_account_name}.dfs.core.windows.net",  # noqa: E501
+            # B) State table of incremental ingestion of the Rio pipeline (in the Data lake)
+            "spark.secret.rio-state-table-location": RioPipelineConfig.state_table_location(
+                self.unit.storage_account_name
+            ),
+        }
+        _linked_service_dependencies: list[pulumi.Resource] = [
+            self.adf,
+            workspace.private_endpoint_databricks_filesystem,
+            _workspace,
+            heifer_service_principal_adf,
+            heifer_perm_service_principal_can_contribute_storage,
+            heifer_adf_serpr_role_assignment,
+        ]
+        # --------------------------------------------------------------------------------
+
+        # -- Azure Data Factory Linked Services - Azure Databricks via MSI --
+        self._link_compute_profiles(workspace, _spark_config, _linked_service_dependencies)
+        # -------------------------------------------------------------------
+
+        # -- Instance pool (warm VMs) and the linked service running clusters in it --
+        if HeiferClusterConfiguration.INSTANCE_POOL_ENABLED:
+            self._link_instance_pool(
+                storage, workspace, heifer_databricks_provider, heifer_service_principal_adf,
+                _spark_config, _linked_service_dependencies
+            )
+        # -----------------------------------------------------------------------------
+
+        # -- Shared cluster (latency-sensitive pipelines), its keep-warm job and linked service --
+        if HeiferClusterConfiguration.SHARED_CLUSTER_ENABLED:
+            self._link_shared_cluster(
+                workspace, heifer_databricks_provider, _spark_config, _linked_service_dependencies
+            )
+        # -----------------------------------------------------------------------------------------
+
+        # -- State table of incremental ingestion of Rio (created by a bootstrap job run) --
+        if (
+                RioPipelineConfig.DEPLOY_PIPELINE and RioPipelineConfig.STATE_TABLE_BOOTSTRAP
+                and (self.unit.pipelines is None
+                     or RioPipelineConfig.PIPELINE_NAME in self.unit.pipelines)
+        ):
+            self._bootstrap_rio_state(
+                workspace, heifer_databricks_provider, _spark_config, _linked_service_dependencies
+            )
+        # ----------------------------------------------------------------------------------
+
+        # ==== DEPLOY PIPELINE TO UNZIP FILES ====
+        if (
+                BakUnzipPipelineConfig.DEPLOY_PIPELINE
+                or BakUnzipPipelineConfig.DEPLOY_MULTI_ARCHIVE_PIPELINE
+                or BakUnzipPipelineConfig.DEPLOY_STRIPE_UPLOAD_PIPELINE
+                or BakSerializationDistributionConfig.DEPLOY_PIPELINE
+        ):
+            heifer_bak_unzipped_linked_service = pulumi_azure.datafactory.LinkedServiceAzureBlobStorage(  # noqa: E501
+                resource_name=self.child_name("unzippedbakstrg"),
+                name=BakUnzipPipelineConfig.UNZIPPED_BAK_LINKED_SERVICE,
+                data_factory_id=self.adf.id,
+                service_endpoint=f"https://{BakUnzipPipelineConfig.PRE_BRONZE_STORAGE_ACCOUNT}.blob.core.windows.net",  # noqa: E501
+                use_managed_identity=True,
+                opts=self.child_opts(
+                    depends_on=_linked_service_dependencies,
+                    custom_timeouts=pulumi.CustomTimeouts(create="30m", update="30m", delete="30m"),  # noqa: E501
+                )
+            )
+
+            heifer_bak_zipped_linked_service = pulumi_azure.datafactory.LinkedServiceAzureBlobStorage(  # noqa: E501
+                resource_name=self.child_name("zippedbakstrg"),
+                name=BakUnzipPipelineConfig.ZIPPED_BAK_LINKED_SERVICE,
+                data_factory_id=self.adf.id,
+                service_endpoint=f"https://{BakUnzipPipelineConfig.PRE_BRONZE_STORAGE_ACCOUNT}.blob.core.windows.net",  # noqa: E501
+                use_managed_identity=True,
+                opts=self.child_opts(
+                    depends_on=_linked_service_dependencies,
+                    custom_timeouts=pulumi.CustomTimeouts(create="30m", update="30m", delete="30m"),  # noqa: E501
+                )
+            )
+
+            # Datasets are parameterised (location given by the pipeline), the defaults are
+            #   the configured locations
+            heifer_zipped_bak_dataset = pulumi_azure.datafactory.DatasetBinary(
+                resource_name=self.child_name("zippedbakds"),
+                name=BakUnzipPipelineConfig.ZIPPED_BAK_DATASET,
+                data_factory_id=self.adf.id,
+                linked_service_name=heifer_bak_zipped_linked_service.name,
+                parameters={
+                    "container": BakUnzipPipelineConfig.PRE_BRONZE_ZIPPED_BAK_DATASET_CONTAINER,
+                    "folderPath": BakUnzipPipelineConfig.PRE_BRONZE_ZIPPED_BAK_DATASET_FOLDER_PATH,  # noqa: E501
+                    "fileName": BakUnzipPipelineConfig.PRE_BRONZE_ZIPPED_BAK_DATASET_FILE_NAME,
+                },
+                azure_blob_storage_location=pulumi_azure.datafactory.DatasetBinaryAzureBlobStorageLocationArgs(  # noqa: E501
+                    container="@dataset().container",
+                    dynamic_container_enabled=True,
+                    path="@dataset().folderPath",
+                    dynamic_path_enabled=True,
+                    filename="@dataset().fileName",
+                    dynamic_filename_enabled=True,
+                ),
+                compression=pulumi_azure.datafactory.DatasetBinaryCompressionArgs(
+                    type="ZipDeflate"
+                ),
+                opts=self.child_opts(),
+            )
+
+            # Folder with zipped files (listing of archives)
+            heifer_zipped_bak_folder_dataset = pulumi_azure.datafactory.DatasetBinary(
+                resource_name=self.child_name("zippedbakfolderds"),
+                name=BakUnzipPipelineConfig.ZIPPED_BAK_FOLDER_DATASET,
+                data_factory_id=self.adf.id,
+                linked_service_name=heifer_bak_zipped_linked_service.name,
+                parameters={
+                    "container": BakUnzipPipelineConfig.PRE_BRONZE_ZIPPED_BAK_DATASET_CONTAINER,
+                    "folderPath": BakUnzipPipelineConfig.PRE_BRONZE_ZIPPED_BAK_DATASET_FOLDER_PATH,  # noqa: E501
+                },
+                azure_blob_storage_location=pulumi_azure.datafactory.DatasetBinaryAzureBlobStorageLocationArgs(  # noqa: E501
+                    container="@dataset().container",
+                    dynamic_container_enabled=True,
+                    path="@dataset().folderPath",
+                    dynamic_path_enabled=True,
+                ),
+                opts=self.child_opts(),
+            )
+
+            heifer_unzipped_bak_dataset = pulumi_azure.datafactory.DatasetBinary(
+                resource_name=self.child_name("unzippedbakds"),
+                name=BakUnzipPipelineConfig.UNZIPPED_BAK_DATASET,
+                data_factory_id=self.adf.id,
+                linked_service_name=heifer_bak_unzipped_linked_service.name,
+                parameters={
+                    "container": BakUnzipPipelineConfig.PRE_BRONZE_UNZIPPED_BAK_DATASET_CONTAINER,
+                    "folderPath": BakUnzipPipelineConfig.PRE_BRONZE_UNZIPPED_BAK_DATASET_FOLDER_PATH,  # noqa: E501
+                },
+                azure_blob_storage_location=pulumi_azure.datafactory.DatasetBinaryAzureBlobStorageLocationArgs(  # noqa: E501
+                    container="@dataset().container",
+                    dynamic_container_enabled=True,
+                    path="@dataset().folderPath",
+                    dynamic_path_enabled=True,
+                ),
+                opts=self.child_opts(),
+            )
+            self.pipeline_dependencies.append(heifer_zipped_bak_dataset)
+            self.pipeline_dependencies.append(heifer_zipped_bak_folder_dataset)
+            self.pipeline_dependencies.append(heifer_unzipped_bak_dataset)
+
+            # Stripes of backup sets are copied (in parallel) to the location read by the
+            #   restore (ADF identity has to be Storage Blob Data Contributor there)
+            if BakUnzipPipelineConfig.DEPLOY_STRIPE_UPLOAD_PIPELINE:
+                heifer_bak_restore_linked_service = pulumi_azure.datafactory.LinkedServiceAzureBlobStorage(  # noqa: E501
+                    resource_name=self.child_name(BakUnzipPipelineConfig.RESTORE_LINKED_SERVICE),
+                    name=BakUnzipPipelineConfig.RESTORE_LINKED_SERVICE,
+                    data_factory_id=self.adf.id,
+                    service_endpoint=f"https://{BakUnzipPipelineConfig.RESTORE_STORAGE_ACCOUNT}.blob.core.windows.net",  # noqa: E501
+                    use_managed_identity=True,
+                    opts=self.child_opts(depends_on=_linked_service_dependencies),
+                )
+                self.pipeline_dependencies.append(pulumi_azure.datafactory.DatasetBinary(
+                    resource_name=self.child_name(BakUnzipPipelineConfig.RESTORE_DATASET),
+                    name=BakUnzipPipelineConfig.RESTORE_DATASET,
+                    data_factory_id=self.adf.id,
+                    linked_service_name=heifer_bak_restore_linked_service.name,
+                    parameters={
+                        "container": BakUnzipPipelineConfig.RESTORE_CONTAINER,
+                        "folderPath": BakUnzipPipelineConfig.RESTORE_FOLDER_PATH,
+                    },
+                    azure_blob_storage_location=pulumi_azure.datafactory.DatasetBinaryAzureBlobStorageLocationArgs(  # noqa: E501
+                        container="@dataset().container",
+                        dynamic_container_enabled=True,
+                        path="@dataset().folderPath",
+                        dynamic_path_enabled=True,
+                    ),
+                    opts=self.child_opts(),
+                ))
+        # ----------------------------------------
+
+        # ==== DISTRIBUTION OF SERIALIZED TABLES BY ADF COPIES ====
+        if BakSerializationDistributionConfig.DISTRIBUTION_MODE not in ("SPARK", "ADF"):
+            raise ValueError(
+                f"Unknown distribution mode "
+                f"'{BakSerializationDistributionConfig.DISTRIBUTION_MODE}' (use SPARK or ADF)"
+            )
+        if (
+                BakSerializationDistributionConfig.DEPLOY_PIPELINE
+                and BakSerializationDistributionConfig.DISTRIBUTION_MODE == "ADF"
+        ):
+            # A) ADF reads the temporary container of the HeifER storage account (no public
+            #   access) through a managed private endpoint (to be approved on the account)
+            heifer_adf_storage_reader = azure_native.authorization.RoleAssignment(
+                resource_name=self.child_name("heifer-perm-adf-can-read-storage"),
+                principal_id=self.adf.identity.apply(lambda _identity: _identity.principal_id),
+                principal_type=azure_native.authorization.PrincipalType.SERVICE_PRINCIPAL,
+                role_definition_id=pulumi.Output.format(
+                    "/subscriptions/{0}/providers/Microsoft.Authorization/roleDefinitions/"
+                    "2a2b9908-6ea1-4ae2-8e65-a410df84e7d1",  # Storage Blob Data Reader GUID
+                    current_client.subscription_id
+                ),
+                scope=storage.storage_account.id,
+                opts=self.child_opts(),
+            )
+            heifer_adf_storage_private_endpoint = pulumi_azure.datafactory.ManagedPrivateEndpoint(
+                resource_name=self.child_name("heifer-adf-storage-blob-private-endpoint"),
+                name="heifer-storage-blob",
+                data_factory_id=self.adf.id,
+                target_resource_id=storage.storage_account.id,
+                subresource_name="blob",
+                opts=self.child_opts(depends_on=[heifer_adf_integration_runtime]),
+            )
+            heifer_serialization_temp_linked_service = pulumi_azure.datafactory.LinkedServiceAzureBlobStorage(  # noqa: E501
+                resource_name=self.child_name("serializationtempstrg"),
+                name=BakSerializationDistributionConfig.DISTRIBUTION_SOURCE_LINKED_SERVICE,
+                data_factory_id=self.adf.id,
+                service_endpoint=storage.storage_account.name.apply(
+                    lambda _account_name: f"https://{_account_name}.blob.core.windows.net"
+                ),
+                use_managed_identity=True,
+                integration_runtime_name=heifer_adf_integration_runtime.name,
+                opts=self.child_opts(
+                    depends_on=[heifer_adf_storage_reader, heifer_adf_storage_private_endpoint],
+                ),
+            )
+            self.pipeline_dependencies.append(pulumi_azure.datafactory.DatasetBinary(
+                resource_name=self.child_name(
+                    BakSerializationDistributionConfig.DISTRIBUTION_SOURCE_DATASET
+                ),
+                name=BakSerializationDistributionConfig.DISTRIBUTION_SOURCE_DATASET,
+                data_factory_id=self.adf.id,
+                linked_service_name=heifer_serialization_temp_linked_service.name,
+                parameters={
+                    "folderPath": BakSerializationDistributionConfig.TEMP_ACCOUNT_FOLDER_PATH,
+                },
+                azure_blob_storage_location=pulumi_azure.datafactory.DatasetBinaryAzureBlobStorageLocationArgs(  # noqa: E501
+                    container=BakSerializationDistributionConfig.TEMP_ACCOUNT_CONTAINER,
+                    path="@dataset().folderPath",
+                    dynamic_path_enabled=True,
+                ),
+                opts=self.child_opts(),
+            ))
+
+            # B) Each target has its own linked service and dataset (ADF identity has to be
+            #   Storage Blob Data Contributor there, and allowed as a resource instance)
+            for _target in BakSerializationDistributionConfig.targets():
+                heifer_serialization_target_linked_service = pulumi_azure.datafactory.LinkedServiceAzureBlobStorage(  # noqa: E501
+                    resource_name=self.child_name(_target.linked_service_name),
+                    name=_target.linked_service_name,
+                    data_factory_id=self.adf.id,
+                    service_endpoint=f"https://{_target.storage_account}.blob.core.windows.net",
+                    use_managed_identity=True,
+                    opts=self.child_opts(depends_on=_linked_service_dependencies),
+                )
+                self.pipeline_dependencies.append(pulumi_azure.datafactory.DatasetBinary(
+                    resource_name=self.child_name(_target.dataset_name),
+                    name=_target.dataset_name,
+                    data_factory_id=self.adf.id,
+                    linked_service_name=heifer_serialization_target_linked_service.name,
+                    azure_blob_storage_location=pulumi_azure.datafactory.DatasetBinaryAzureBlobStorageLocationArgs(  # noqa: E501
+                        container=_target.container,
+                        path=_target.path,
+                    ),
+                    opts=self.child_opts(),
+                ))
+        # ---------------------------------------------------------
+
+    def _link_compute_profiles(self, workspace: HeiferWorkspace, spark_config: dict[str, Any],
+                               linked_service_dependencies: list[pulumi.Resource]):
+        _workspace = workspace.databricks_workspace
+
+        # -- Azure Data Factory Linked Services - Azure Databricks via MSI --
+        #   The default job cluster (HeiferAdfToCluster) and clusters of compute profiles,
+        #   each with the default Spark performance preset and with the extra presets
+        for _preset in SparkPerformanceConfig.provisioned_presets():
+            for _profile_name in ComputeProfilesConfig.provisioned_profiles():
+                _profile = ComputeProfilesConfig.profile(_profile_name)
+                _variant = ComputeProfilesConfig.linked_service_variant(_profile_name, _preset)
+                heifer_link_adf_databricks = pulumi_azure.datafactory.LinkedServiceAzureDatabricks(  # noqa: E501
+                    resource_name=self.child_name('link-service-heifer-databricks-and-adf' + (
+                        f'-{_variant}' if _variant else ''
+                    )),
+                    name=ComputeProfilesConfig.linked_service_name(_profile_name, _preset),
+                    adb_domain=_workspace.workspace_url.apply(
+                        lambda _workspace_url: f'https://{_workspace_url}'
+                    ),
+                    msi_work_space_resource_id=_workspace.id,
+                    data_factory_id=self.adf.id,
+                    new_cluster_config=pulumi_azure.datafactory.LinkedServiceAzureDatabricksNewClusterConfigArgs(  # noqa: E501
+                        cluster_version=_profile.cluster_version,
+                        node_type=_profile.node_type,
+                        driver_node_type=_profile.driver_node_type,
+                        log_destination=HeiferClusterConfiguration.LOG_DESTINATION,
+                        max_number_of_workers=_profile.max_number_of_workers,
+                        min_number_of_workers=_profile.min_number_of_workers,
+                        spark_config=spark_config | SparkPerformanceConfig.preset_spark_config(
+                            _preset
+                        ),
+                        custom_tags={SparkPerformanceConfig.PRESET_CLUSTER_TAG: _preset},
+                    ),
+                    opts=self.child_opts(
+                        depends_on=linked_service_dependencies,
+                        custom_timeouts=pulumi.CustomTimeouts(create="30m", update="30m", delete="30m"),  # noqa: E501
+                    )
+                )
+                self.pipeline_dependencies.append(heifer_link_adf_databricks)
+        # -------------------------------------------------------------------
+
+    def _link_instance_pool(self, storage: HeiferStorage, workspace: HeiferWorkspace,
+                            databricks_provider: pulumi.ProviderResource,
+                            service_principal_adf: pulumi.Resource, spark_config: dict[str, Any],
+                            linked_service_dependencies: list[pulumi.Resource]):
+        import pulumi_databricks
+
+        _rg = storage.resource_group
+        _workspace = workspace.databricks_workspace
+
+        # -- Instance pool (warm VMs) and the linked service running clusters in it --
+        heifer_instance_pool = pulumi_databricks.InstancePool(
+            resource_name=self.child_name(HeiferClusterConfiguration.INSTANCE_POOL_NAME),
+            instance_pool_name=HeiferClusterConfiguration.INSTANCE_POOL_NAME,
+            node_type_id=HeiferClusterConfiguration.INSTANCE_POOL_NODE_TYPE,
+            min_idle_instances=HeiferClusterConfiguration.INSTANCE_POOL_MIN_IDLE_INSTANCES,
+            max_capacity=HeiferClusterConfiguration.INSTANCE_POOL_MAX_CAPACITY,
+            idle_instance_autotermination_minutes=HeiferClusterConfiguration.INSTANCE_POOL_IDLE_AUTOTERMINATION_MINUTES,  # noqa: E501
+            preloaded_spark_versions=[
+                HeiferClusterConfiguration.INSTANCE_POOL_PRELOADED_SPARK_VERSION
+            ],
+            azure_attributes=pulumi_databricks.InstancePoolAzureAttributesArgs(
+                availability="ON_DEMAND_AZURE"
+            ),
+            opts=self.child_opts(
+                depends_on=[service_principal_adf],
+                provider=databricks_provider,
+            ),
+        )
+        # ADF (its service principal) needs to attach clusters to the pool
+        heifer_instance_pool_permissions = pulumi_databricks.Permissions(
+            resource_name=self.child_name(
+                f"{HeiferClusterConfiguration.INSTANCE_POOL_NAME}-permissions"
+            ),
+            instance_pool_id=heifer_instance_pool.id,
+            access_controls=[
+                pulumi_databricks.PermissionsAccessControlArgs(
+                    service_principal_name=self.unit.databricks_service_principal_for_adf_app_uuid,  # noqa: E501
+                    permission_level="CAN_ATTACH_TO",
+                ),
+            ],
+            opts=self.child_opts(provider=databricks_provider),
+        )
+        # Note: the 'instance_pool' block of pulumi_azure does not support Spark
+        #   configuration (needed for the Data lake), hence the native linked service
+        heifer_link_adf_databricks_pool = azure_native.datafactory.LinkedService(
+            resource_name=self.child_name('link-service-heifer-databricks-pool-and-adf'),
+            linked_service_name=HeiferClusterConfiguration.INSTANCE_POOL_LINKED_SERVICE_NAME,
+            factory_name=self.adf.name,
+            resource_group_name=_rg.name,
+            properties=azure_native.datafactory.AzureDatabricksLinkedServiceArgs(
+                type="AzureDatabricks",
+                domain=_workspace.workspace_url.apply(
+                    lambda _workspace_url: f'https://{_workspace_url}'
+                ),
+                authentication="MSI",
+                workspace_resource_id=_workspace.id,
+                instance_pool_id=heifer_instance_pool.id,
+                new_cluster_version=HeiferClusterConfiguration.CLUSTER_VERSION,
+                new_cluster_num_of_worker=f"{HeiferClusterConfiguration.MIN_NUMBER_OF_WORKERS}:"
+                                          f"{HeiferClusterConfiguration.MAX_NUMBER_OF_WORKERS}",
+                new_cluster_log_destination=HeiferClusterConfiguration.LOG_DESTINATION,
+                new_cluster_spark_conf=spark_config | SparkPerformanceConfig.preset_spark_config(  # noqa: E501
+                    SparkPerformanceConfig.DEFAULT_PRESET
+                ),
+            ),
+            opts=self.child_opts(
+                depends_on=linked_service_dependencies + [heifer_instance_pool_permissions],
+                custom_timeouts=pulumi.CustomTimeouts(create="30m", update="30m", delete="30m"),  # noqa: E501
+            )
+        )
+        self.pipeline_dependencies.append(heifer_link_adf_databricks_pool)
+        # -----------------------------------------------------------------------------
+
+    def _link_shared_cluster(self, workspace: HeiferWorkspace,
+                             databricks_provider: pulumi.ProviderResource,
+                             spark_config: dict[str, Any],
+                             linked_service_dependencies: list[pulumi.Resource]):
+        import pulumi_databricks
+
+        _workspace = workspace.databricks_workspace
+
+        # -- Shared cluster (latency-sensitive pipelines), its keep-warm job and linked service --
+        heifer_shared_cluster = pulumi_databricks.Cluster(
+            resource_name=self.child_name(HeiferClusterConfiguration.SHARED_CLUSTER_NAME),
+            cluster_name=HeiferClusterConfiguration.SHARED_CLUSTER_NAME,
+            spark_version=HeiferClusterConfiguration.CLUSTER_VERSION,
+            node_type_id=HeiferClusterConfiguration.SHARED_CLUSTER_NODE_TYPE,
+            autoscale=pulumi_databricks.ClusterAutoscaleArgs(
+                min_workers=HeiferClusterConfiguration.SHARED_CLUSTER_MIN_NUMBER_OF_WORKERS,
+                max_workers=HeiferClusterConfiguration.SHARED_CLUSTER_MAX_NUMBER_OF_WORKERS,
+            ),
+            autotermination_minutes=HeiferClusterConfiguration.SHARED_CLUSTER_AUTOTERMINATION_MINUTES,  # noqa: E501
+            spark_conf=spark_config | SparkPerformanceConfig.preset_spark_config(
+                SparkPerformanceConfig.DEFAULT_PRESET
+            ),
+            custom_tags={
+                SparkPerformanceConfig.PRESET_CLUSTER_TAG:
+                    SparkPerformanceConfig.DEFAULT_PRESET,
+            },
+            cluster_log_conf=pulumi_databricks.ClusterClusterLogConfArgs(
+                dbfs=pulumi_databricks.ClusterClusterLogConfDbfsArgs(
+                    destination=HeiferClusterConfiguration.LOG_DESTINATION
+                ),
+            ) if HeiferClusterConfiguration.LOG_DESTINATION else None,
+            opts=self.child_opts(
+                depends_on=linked_service_dependencies,
+                provider=databricks_provider,
+            ),
+        )
+        # ADF (its service principal) needs to start the cluster if it is terminated
+        heifer_shared_cluster_permissions = pulumi_databricks.Permissions(
+            resource_name=self.child_name(
+                f"{HeiferClusterConfiguration.SHARED_CLUSTER_NAME}-permissions"
+            ),
+            cluster_id=heifer_shared_cluster.id,
+            access_controls=[
+                pulumi_databricks.PermissionsAccessControlArgs(
+                    service_principal_name=self.unit.databricks_service_principal_for_adf_app_uuid,  # noqa: E501
+                    permission_level="CAN_RESTART",
+                ),
+            ],
+            opts=self.child_opts(provider=databricks_provider),
+        )
+        if HeiferClusterConfiguration.SHARED_CLUSTER_KEEP_WARM_SCHEDULE:
+            # A trivial command on the cluster starts it (if terminated) and resets its
+            #   autotermination countdown
+            heifer_keep_warm_notebook = pulumi_databricks.Notebook(
+                resource_name=self.child_name("heifer-shared-cluster-keep-warm-notebook"),
+                path=HeiferClusterConfiguration.SHARED_CLUSTER_KEEP_WARM_NOTEBOOK_PATH,
+                language="PYTHON",
+                content_base64=base64.b64encode(
+                    b"# Databricks notebook source\n"
+                    b"# Keeps the shared cluster of HeifER warm\n"
+                    b"spark.range(1).count()\n"
+                ).decode("ascii"),
+                opts=self.child_opts(provider=databricks_provider),
+            )
+            pulumi_databricks.Job(
+                resource_name=self.child_name("heifer-shared-cluster-keep-warm-job"),
+                name=f"{HeiferClusterConfiguration.SHARED_CLUSTER_NAME}-keep-warm",
+                tasks=[pulumi_databricks.JobTaskArgs(
+                    task_key="keep-warm",
+                    existing_cluster_id=heifer_shared_cluster.id,
+                    notebook_task=pulumi_databricks.JobTaskNotebookTaskArgs(
+                        notebook_path=heifer_keep_warm_notebook.path,
+                    ),
+                    timeout_seconds=15 * 60,
+                )],
+                schedule=pulumi_databricks.JobScheduleArgs(
+                    quartz_cron_expression=HeiferClusterConfiguration.SHARED_CLUSTER_KEEP_WARM_SCHEDULE,  # noqa: E501
+                    timezone_id=HeiferClusterConfiguration.SHARED_CLUSTER_KEEP_WARM_TIMEZONE,
+                    pause_status="UNPAUSED",
+                ),
+                max_concurrent_runs=1,
+                opts=self.child_opts(provider=databricks_provider),
+            )
+        heifer_link_adf_databricks_shared_cluster = pulumi_azure.datafactory.LinkedServiceAzureDatabricks(  # noqa: E501
+            resource_name=self.child_name('link-service-heifer-databricks-shared-cluster-and-adf'),  # noqa: E501
+            name=HeiferClusterConfiguration.SHARED_CLUSTER_LINKED_SERVICE_NAME,
+            adb_domain=_workspace.workspace_url.apply(
+                lambda _workspace_url: f'https://{_workspace_url}'
+            ),
+            msi_work_space_resource_id=_workspace.id,
+            data_factory_id=self.adf.id,
+            existing_cluster_id=heifer_shared_cluster.id,
+            opts=self.child_opts(
+                depends_on=linked_service_dependencies + [heifer_shared_cluster_permissions],
+                custom_timeouts=pulumi.CustomTimeouts(create="30m", update="30m", delete="30m"),  # noqa: E501
+            )
+        )
+        self.pipeline_dependencies.append(heifer_link_adf_databricks_shared_cluster)
+        # -----------------------------------------------------------------------------------------
+
+    def _bootstrap_rio_state(self, workspace: HeiferWorkspace,
+                             databricks_provider: pulumi.ProviderResource,
+                             spark_config: dict[str, Any],
+                             linked_service_dependencies: list[pulumi.Resource]):
+        import pulumi_databricks
+
+        _workspace = workspace.databricks_workspace
+
+        # -- State table of incremental ingestion of Rio (created by a bootstrap job run) --
+        _state_table_location = RioPipelineConfig.state_table_location(
+            self.unit.storage_account_name
+        )
+        heifer_rio_state_notebook = pulumi_databricks.Notebook(
+            resource_name=self.child_name("heifer-rio-state-bootstrap-notebook"),
+            path=RioPipelineConfig.STATE_TABLE_BOOTSTRAP_NOTEBOOK_PATH,
+            language="PYTHON",
+            content_base64=base64.b64encode(
+                bootstrap_notebook_source(_state_table_location).encode()
+            ).decode("ascii"),
+            opts=self.child_opts(provider=databricks_provider),
+        )
+        heifer_rio_state_job = pulumi_databricks.Job(
+            resource_name=self.child_name("heifer-rio-state-bootstrap-job"),
+            name="heifer-rio-state-bootstrap",
+            tasks=[pulumi_databricks.JobTaskArgs(
+                task_key="bootstrap",
+                # Single node cluster is enough for a DDL statement
+                new_cluster=pulumi_databricks.JobTaskNewClusterArgs(
+                    spark_version=HeiferClusterConfiguration.CLUSTER_VERSION,
+                    node_type_id=HeiferClusterConfiguration.NODE_TYPE,
+                    num_workers=0,
+                    spark_conf=spark_config | {
+                        "spark.databricks.cluster.profile": "singleNode",
+                        "spark.master": "local[*]",
+                    },
+                    custom_tags={"ResourceClass": "SingleNode"},
+                ),
+                notebook_task=pulumi_databricks.JobTaskNotebookTaskArgs(
+                    notebook_path=heifer_rio_state_notebook.path,
+                ),
+                timeout_seconds=30 * 60,
+            )],
+            max_concurrent_runs=1,
+            opts=self.child_opts(
+                depends_on=linked_service_dependencies,
+                provider=databricks_provider,
+            ),
+        )
+        # The job runs once (and again when the definition of the state table changes);
+        #   the Rio pipeline is deployed once the state table exists
+        self.pipeline_dependencies.append(DatabricksJobRun(
+            resource_name=self.child_name("heifer-rio-state-bootstrap-run"),
+            workspace_id=_workspace.id,
+            workspace_url=_workspace.workspace_url,
+            job_id=heifer_rio_state_job.id,
+            revision=bootstrap_revision(_state_table_location),
+            opts=self.child_opts(depends_on=[heifer_rio_state_job]),
+        ))
+        # ----------------------------------------------------------------------------------
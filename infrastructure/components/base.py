@@ -0,0 +1,56 @@
+"""Base of HeifER component resources (groups of resources forming a deployment stage)."""
+from typing import Optional
+
+import pulumi
+
+from configurations.config_topology import DeploymentUnit, TopologyConfig
+
+# Children were originally created at the top level of the stack (without a parent);
+#   the alias keeps their URNs, so introducing components does not replace any resource.
+_WITHOUT_PARENT_ALIAS = pulumi.Alias(parent=pulumi.ROOT_STACK_RESOURCE)
+
+
+class HeiferComponent(pulumi.ComponentResource):
+    """Component resource of a HeifER deployment stage.
+    Args:
+        stage: Name of the stage (used in the type token 'heifer:stages:<STAGE>').
+        resource_name: Name of the component.
+        unit: Deployment unit of the stage (the primary one by default).
+        opts: Options of the component.
+    """
+    def __init__(self, stage: str, resource_name: str, unit: Optional[DeploymentUnit] = None,
+                 opts: Optional[pulumi.ResourceOptions] = None):
+        self.unit: DeploymentUnit = unit or TopologyConfig.primary_unit()
+        super().__init__(f"heifer:stages:{stage}", self.unit.resource_name(resource_name), None,
+                         opts)
+
+    def child_name(self, name: str) -> str:
+        """Name of a child resource (unique across deployment units, see DeploymentUnit)."""
+        return self.unit.resource_name(name)
+
+    def child_opts(self, **kwargs) -> pulumi.ResourceOptions:
+        """Options of a child resource (parented to the component, keeping its former URN)."""
+        return pulumi.ResourceOptions(parent=self, aliases=[_WITHOUT_PARENT_ALIAS], **kwargs)
+
+
+# Deployment stages in order of dependencies (each stage requires all the previous ones)
+DEPLOYMENT_STAGES: tuple[str, ...] = ("storage", "network", "workspace", "adf", "pipelines")
+
+
+def validate_stages(stages: list[str], upstream_stack: Optional[str]) -> None:
+    """Check that the stages can be deployed by one stack.
+
+    Either all stages up to some stage are deployed, or only the pipelines stage (which
+    reads outputs of the other stages from the upstream stack).
+    Raises:
+        ValueError: If the combination of stages is not supported.
+    """
+    if _unknown_stages := set(stages) - set(DEPLOYMENT_STAGES):
+        raise ValueError(f"Unknown deployment stages: {', '.join(sorted(_unknown_stages))}")
+    if list(stages) == ["pipelines"]:
+        if not upstream_stack:
+            raise ValueError("The 'pipelines' stage alone requires the upstream stack")
+    elif sorted(stages, key=DEPLOYMENT_STAGES.index) != list(DEPLOYMENT_STAGES[:len(stages)]):
+        raise ValueError(
+            f"Stages {', '.join(stages)} must be a prefix of: {', '.join(DEPLOYMENT_STAGES)}"
+        )
@@ -0,0 +1,204 @@
+"""Network stage: security group, route table, virtual network, subnets and storage endpoints."""
+from typing import Optional
+
+import pulumi
+import pulumi_azure_native as azure_native
+
+from components.base import HeiferComponent
+from components.storage import HeiferStorage
+from configurations.config_heifer import HeiferConfig
+from configurations.databricks_udr_ip_map import DATABRICKS_UDR_IP_MAP
+from utilities.udr_routes import generate_udr_routes
+
+
+class HeiferNetwork(HeiferComponent):
+    """Virtual network of HeifER (Databricks subnets) with private endpoints to the storage.
+    Args:
+        resource_name: Name of the component.
+        storage: Storage stage (resource group and storage account; its deployment unit).
+        opts: Options of the component.
+    """
+    def __init__(self, resource_name: str, storage: HeiferStorage,
+                 opts: Optional[pulumi.ResourceOptions] = None):
+        super().__init__("HeiferNetwork", resource_name, storage.unit, opts)
+        _rg = storage.resource_group
+
+        # -- Network security group for databricks subnets --
+        self.databricks_network_security_group = azure_native.network.NetworkSecurityGroup(
+            resource_name=self.child_name("nsg-heifer-databricks"),
+            network_security_group_name="nsg-heifer-databricks",
+            resource_group_name=_rg.name,
+            location=_rg.location,
+            opts=self.child_opts(),
+        )
+        # ---------------------------------------------------
+
+        # -- Databricks route table --
+        self.databricks_route_table = azure_native.network.RouteTable(
+            resource_name=self.child_name("heifer-databricks-route-table"),
+            resource_group_name=_rg.name,
+            location=_rg.location,
+            route_table_name="heifer-databricks-route-table",
+            opts=self.child_opts(),
+        )
+        # ----------------------------
+
+        # -- Create Databricks routes for the table --
+        #   Routes of service tags and the Databricks control plane (UDR IP ranges) of the
+        #   deployment region (and extra regions), collapsed into the minimal covering set.
+        #   Each route stays a separate resource (with the same names as before), so that
+        #   existing stacks only update or delete the routes that changed.
+        _databricks_routes: dict[str, str] = generate_udr_routes(
+            DATABRICKS_UDR_IP_MAP,
+            [self.unit.location, *HeiferConfig.UDR_EXTRA_REGIONS],
+            base_routes={
+                "heifer-databricks": "AzureDatabricks",
+                "heifer-sql": "Sql",
+                "heifer-storage": "Storage",
+                "heifer-eventhub": "EventHub"
+            },
+        )
+        self.databricks_routes: list[azure_native.network.Route] = [
+            azure_native.network.Route(
+                resource_name=self.child_name(_route_name),
+                address_prefix=_address_prefix,
+                next_hop_type="Internet",
+                resource_group_name=_rg.name,
+                route_name=_route_name,
+                route_table_name=self.databricks_route_table.name,
+                opts=self.child_opts(),
+            )
+            for _route_name, _address_prefix in _databricks_routes.items()
+        ]
+        if _udr_unknown_regions := {
+            self.unit.location, *HeiferConfig.UDR_EXTRA_REGIONS
+        } - set(DATABRICKS_UDR_IP_MAP):
+            pulumi.log.warn(
+                f"No Databricks UDR IP ranges for: {', '.join(sorted(_udr_unknown_regions))}"
+            )
+        # --------------------------------------------------------------
+
+        # -- Main Heifer's virtual network --
+        self.virtual_network = azure_native.network.VirtualNetwork(
+            resource_name=self.unit.virtual_network_name,
+            resource_group_name=_rg.name,
+            location=_rg.location,
+            virtual_network_name=self.unit.virtual_network_name,
+            address_space=azure_native.network.AddressSpaceArgs(
+                address_prefixes=[self.unit.virtual_network_address_space],
+            ),
+            opts=self.child_opts(),
+        )
+        # -----------------------------------
+
+        # -- Subnet for shared services --
+        self.shared_subnet = azure_native.network.Subnet(
+            resource_name=self.child_name("subnet-heifer-databricks-shared"),
+            subnet_name="subnet-heifer-databricks-shared",
+            resource_group_name=_rg.name,
+            address_prefix=self.unit.virtual_network_subnets_address_spaces["shared_subnet"],
+            virtual_network_name=self.virtual_network.name,
+
+            network_security_group=azure_native.network.NetworkSecurityGroupArgs(
+                id=self.databricks_network_security_group.id
+            ),
+            route_table=azure_native.network.RouteTableArgs(id=self.databricks_route_table.id),
+            opts=self.child_opts(),
+        )
+        # --------------------------------
+
+        # -- Subnet for Databricks host --
+        self.databricks_host_subnet = azure_native.network.Subnet(
+            resource_name=self.child_name("subnet-heifer-databricks-host"),
+            subnet_name="subnet-heifer-databricks-host",
+            resource_group_name=_rg.name,
+            address_prefix=self.unit.virtual_network_subnets_address_spaces[
+                "databricks_host_subnet"
+            ],
+            virtual_network_name=self.virtual_network.name,
+            delegations=[
+                azure_native.network.DelegationArgs(
+                    name="delegation-heifer-databricks-host",
+                    service_name="Microsoft.Databricks/workspaces",
+                    actions=[
+                        "Microsoft.Network/virtualNetworks/subnets/join/action",
+                        "Microsoft.Network/virtualNetworks/subnets/prepareNetworkPolicies/action",
+                        "Microsoft.Network/virtualNetworks/subnets/unprepareNetworkPolicies/action",  # noqa: E501
+                    ]
+                )
+            ],
+            network_security_group=azure_native.network.NetworkSecurityGroupArgs(
+                id=self.databricks_network_security_group.id
+            ),
+            route_table=azure_native.network.RouteTableArgs(id=self.databricks_route_table.id),
+            opts=self.child_opts(),
+        )
+        # --------------------------------
+
+        # -- Subnet for Databricks container --
+        self.databricks_container_subnet = azure_native.network.Subnet(
+            resource_name=self.child_name("subnet-heifer-databricks-container"),
+            subnet_name="subnet-heifer-databricks-container",
+            resource_group_name=_rg.name,
+            address_prefix=self.unit.virtual_network_subnets_address_spaces[
+                "databricks_container_subnet"
+            ],
+            virtual_network_name=self.virtual_network.name,
+            delegations=[
+                azure_native.network.DelegationArgs(
+                    name="delegation-heifer-databricks-container",
+                    service_name="Microsoft.Databricks/workspaces",
+                    actions=[
+                        "Microsoft.Network/virtualNetworks/subnets/join/action",
+                        "Microsoft.Network/virtualNetworks/subnets/prepareNetworkPolicies/action",
+                        "Microsoft.Network/virtualNetworks/subnets/unprepareNetworkPolicies/action",  # noqa: E501
+                    ]
+                )
+            ],
+            network_security_group=azure_native.network.NetworkSecurityGroupArgs(
+                id=self.databricks_network_security_group.id
+            ),
+            route_table=azure_native.network.RouteTableArgs(id=self.databricks_route_table.id),
+            opts=self.child_opts(depends_on=[self.databricks_host_subnet]),
+        )
+        # -------------------------------------
+
+        # -- Private Endpoint to the Databricks data file system --
+        self.private_endpoint_databricks_dfs = azure_native.network.PrivateEndpoint(
+            resource_name=self.child_name("pe-heifer-databricks-dfs"),
+            private_endpoint_name="pe-heifer-databricks-dfs",
+            resource_group_name=_rg.name,
+            location=_rg.location,
+            subnet=azure_native.network.SubnetArgs(id=self.shared_subnet.id),
+            private_link_service_connections=[
+                azure_native.network.PrivateLinkServiceConnectionArgs(
+                    name="pe-conn-heifer-databricks-dfs",
+                    private_link_service_id=storage.storage_account.id,
+                    request_message="Approve connection to Databricks DFS.",
+                    group_ids=["dfs"],
+                ),
+            ],
+            opts=self.child_opts(depends_on=[self.shared_subnet, storage.storage_account]),
+        )
+        # ---------------------------------------------------------
+
+        # -- Private Endpoint to the Databricks blob --
+        self.private_endpoint_databricks_blob = azure_native.network.PrivateEndpoint(
+            resource_name=self.child_name("pe-heifer-databricks-blob"),
+            private_endpoint_name="pe-heifer-databricks-blob",
+            resource_group_name=_rg.name,
+            location=_rg.location,
+            subnet=azure_native.network.SubnetArgs(id=self.shared_subnet.id),
+            private_link_service_connections=[
+                azure_native.network.PrivateLinkServiceConnectionArgs(
+                    name="pe-conn-heifer-databricks-blob",
+                    private_link_service_id=storage.storage_account.id,
+                    request_message="Approve connection to Databricks blob.",
+                    group_ids=["blob"],
+                ),
+            ],
+            opts=self.child_opts(depends_on=[self.shared_subnet, storage.storage_account]),
+        )
+        # ---------------------------------------------
+
+        self.register_outputs({"virtual_network_id": self.virtual_network.id})
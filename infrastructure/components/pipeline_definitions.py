@@ -0,0 +1,411 @@
+"""Definitions of ADF pipelines as they are deployed by the pipelines stage.
+
+Definitions are resolved from the configuration and the pipelines repository only (no
+providers are imported), so they are shared by the stage, fast deployments, reports and the
+validation of pipelines before the program runs.
+"""
+import json
+from typing import Any, Iterator, Optional
+
+from configurations.config_heifer import HeiferConfig, HeiferClusterConfiguration
+from configurations.config_topology import DeploymentUnit, TopologyConfig
+from configurations.config_compute_profiles import ComputeProfilesConfig
+from configurations.config_spark_performance import SparkPerformanceConfig
+from configurations.config_copy_performance import CopyPerformance, CopyPerformanceConfig
+from configurations.config_rio import RioPipelineConfig
+from configurations.config_bak_unzip_pipeline import BakUnzipPipelineConfig
+from configurations.config_dataset_provisioning import DatasetProvisioningPipelineConfig
+from configurations.config_bak_serialization_distribution import BakSerializationDistributionConfig
+from utilities.artifact_store import (
+    ArtifactManifest, build_artifact_store, discover_upload_files_paths,
+    rewrite_artifact_references
+)
+from utilities.bak_pipelines import (
+    distribution_copy_pipeline_definition, multi_archive_unzip_pipeline_definition,
+    stripe_upload_pipeline_definition
+)
+from utilities.pipeline_loader import (
+    PipelineDefinitionCache, append_execute_pipeline, discover_pipeline_files,
+    load_pipeline_definitions, rewrite_copy_activities, rewrite_linked_service
+)
+
+# Prefix of names of ADF pipeline resources (followed by the name of the pipeline)
+PIPELINE_RESOURCE_PREFIX: str = "heifer-adf-pipeline-"
+
+
+def _is_pipeline_skipped(pipeline_name: str) -> bool:
+    """Whether the pipeline is switched off in the configuration."""
+    return (
+        not BakUnzipPipelineConfig.DEPLOY_PIPELINE
+        and pipeline_name == BakUnzipPipelineConfig.PIPELINE_NAME
+    ) or (
+        not RioPipelineConfig.DEPLOY_PIPELINE
+        and pipeline_name == RioPipelineConfig.PIPELINE_NAME
+    ) or (
+        not DatasetProvisioningPipelineConfig.DEPLOY_PIPELINE
+        and pipeline_name == DatasetProvisioningPipelineConfig.PIPELINE_NAME
+    ) or (
+        not BakSerializationDistributionConfig.DEPLOY_PIPELINE
+        and pipeline_name == BakSerializationDistributionConfig.PIPELINE_NAME
+    )
+
+
+def pipeline_compute_profile(definition: dict) -> Optional[str]:
+    """Compute profile of the pipeline (from its configuration class or its definition).
+    Raises:
+        ValueError: If the profile is not enabled (see ComputeProfilesConfig).
+    """
+    _configured_profiles: dict[str, Optional[str]] = {
+        RioPipelineConfig.PIPELINE_NAME: RioPipelineConfig.COMPUTE_PROFILE,
+        BakUnzipPipelineConfig.PIPELINE_NAME: BakUnzipPipelineConfig.COMPUTE_PROFILE,
+        DatasetProvisioningPipelineConfig.PIPELINE_NAME:
+            DatasetProvisioningPipelineConfig.COMPUTE_PROFILE,
+        BakSerializationDistributionConfig.PIPELINE_NAME:
+            BakSerializationDistributionConfig.COMPUTE_PROFILE,
+    }
+    _profile = _configured_profiles.get(definition['name']) or definition.get(
+        "heifer", {}
+    ).get("computeProfile")
+    if _profile is not None and _profile not in ComputeProfilesConfig.ENABLED_PROFILES:
+        raise ValueError(
+            f"Pipeline '{definition['name']}' uses compute profile '{_profile}' that is not "
+            f"enabled (enabled: {', '.join(ComputeProfilesConfig.ENABLED_PROFILES) or 'none'}; "
+            f"see HEIFER_COMPUTE_PROFILES_COMMA_SEPARATED)"
+        )
+    return _profile
+
+
+def pipeline_spark_preset(definition: dict) -> str:
+    """Spark performance preset of the pipeline (from its configuration class or definition).
+    Raises:
+        ValueError: If the preset is neither the default one nor an extra one
+            (see SparkPerformanceConfig).
+    """
+    _configured_presets: dict[str, Optional[str]] = {
+        RioPipelineConfig.PIPELINE_NAME: RioPipelineConfig.SPARK_PERFORMANCE_PRESET,
+        BakUnzipPipelineConfig.PIPELINE_NAME: BakUnzipPipelineConfig.SPARK_PERFORMANCE_PRESET,
+        DatasetProvisioningPipelineConfig.PIPELINE_NAME:
+            DatasetProvisioningPipelineConfig.SPARK_PERFORMANCE_PRESET,
+        BakSerializationDistributionConfig.PIPELINE_NAME:
+            BakSerializationDistributionConfig.SPARK_PERFORMANCE_PRESET,
+    }
+    _preset = _configured_presets.get(definition['name']) or definition.get(
+        "heifer", {}
+    ).get("sparkPreset") or SparkPerformanceConfig.DEFAULT_PRESET
+    _available_presets = SparkPerformanceConfig.provisioned_presets()
+    if _preset not in _available_presets:
+        raise ValueError(
+            f"Pipeline '{definition['name']}' uses Spark performance preset '{_preset}' that "
+            f"is not provisioned (provisioned: {', '.join(_available_presets)})"
+        )
+    return _preset
+
+
+def pipeline_copy_performance(pipeline_name: str) -> dict[str, CopyPerformance]:
+    """Copy performance settings of the pipeline (mapping activity or '*' -> settings).
+
+    Settings from the configuration class of the pipeline override those from
+    CopyPerformanceConfig (setting by setting).
+    """
+    _configured_settings: dict[str, dict[str, CopyPerformance]] = {
+        RioPipelineConfig.PIPELINE_NAME: RioPipelineConfig.COPY_PERFORMANCE,
+        BakUnzipPipelineConfig.PIPELINE_NAME: BakUnzipPipelineConfig.COPY_PERFORMANCE,
+        BakUnzipPipelineConfig.MULTI_ARCHIVE_PIPELINE_NAME: BakUnzipPipelineConfig.COPY_PERFORMANCE,  # noqa: E501
+        BakUnzipPipelineConfig.STRIPE_UPLOAD_PIPELINE_NAME: BakUnzipPipelineConfig.COPY_PERFORMANCE,  # noqa: E501
+        DatasetProvisioningPipelineConfig.PIPELINE_NAME:
+            DatasetProvisioningPipelineConfig.COPY_PERFORMANCE,
+        BakSerializationDistributionConfig.PIPELINE_NAME:
+            BakSerializationDistributionConfig.COPY_PERFORMANCE,
+        BakSerializationDistributionConfig.DISTRIBUTION_PIPELINE_NAME:
+            BakSerializationDistributionConfig.COPY_PERFORMANCE,
+    }
+    _settings = dict(CopyPerformanceConfig.PIPELINES.get(pipeline_name, {}))
+    for _activity, _activity_settings in _configured_settings.get(pipeline_name, {}).items():
+        _settings[_activity] = _settings.get(_activity, CopyPerformance()).merged(
+            _activity_settings
+        )
+    return _settings
+
+
+def _with_copy_performance(definition: dict) -> dict:
+    """Definition with copy performance settings of the pipeline applied to Copy activities."""
+    if not (_settings := pipeline_copy_performance(definition['name'])):
+        return definition
+    _all_activities_settings = _settings.get("*", CopyPerformance())
+    return rewrite_copy_activities(
+        definition,
+        lambda _activity: _all_activities_settings.merged(
+            _settings.get(_activity, CopyPerformance())
+        ).activity_properties(),
+    )
+
+
+def _runs_in_instance_pool(pipeline_name: str) -> bool:
+    """Whether clusters of the pipeline run in the instance pool."""
+    return HeiferClusterConfiguration.INSTANCE_POOL_ENABLED and (
+        "*" in HeiferClusterConfiguration.INSTANCE_POOL_PIPELINES
+        or pipeline_name in HeiferClusterConfiguration.INSTANCE_POOL_PIPELINES
+    )
+
+
+def _runs_in_shared_cluster(definition: dict) -> bool:
+    """Whether activities of the (latency-sensitive) pipeline run on the shared cluster."""
+    return HeiferClusterConfiguration.SHARED_CLUSTER_ENABLED and (
+        "*" in HeiferClusterConfiguration.SHARED_CLUSTER_PIPELINES
+        or definition['name'] in HeiferClusterConfiguration.SHARED_CLUSTER_PIPELINES
+        or definition.get("heifer", {}).get("latencySensitive") is True
+    )
+
+
+def build_pipelines_artifact_store() -> tuple[dict[str, dict[str, Any]], dict[str, str]]:
+    """Artifacts of all pipelines deduplicated by content (see `build_artifact_store`).
+
+    Empty (nothing is hashed) if the stack does not upload artifacts (UPLOAD_LIBRARIES), so
+    pipelines keep referring to blobs at '<PIPELINE>/<FILE>' paths uploaded before.
+    """
+    if not HeiferConfig.UPLOAD_LIBRARIES:
+        return {}, {}
+    _artifact_manifest = ArtifactManifest(HeiferConfig.ARTIFACT_MANIFEST_PATH)
+    _artifact_objects, _artifact_aliases = build_artifact_store(
+        discover_upload_files_paths(
+            HeiferConfig.PATH_TO_PIPELINES, HeiferConfig.PATH_TO_PIPELINES_UPLOAD_FOLDER
+        ),
+        _artifact_manifest
+    )
+    _artifact_manifest.save()
+    return _artifact_objects, _artifact_aliases
+
+
+def artifact_blobs(artifact_objects: dict[str, dict[str, Any]],
+                   artifact_aliases: dict[str, str]) -> dict[str, dict[str, Any]]:
+    """Blobs uploaded for artifacts (blob name -> artifact object).
+
+    Content addresses and, if ARTIFACT_LEGACY_PATHS, also former '<PIPELINE>/<FILE_NAME>'
+    paths (consumers outside HeifER may refer to them).
+    """
+    _blobs = dict(artifact_objects)
+    if HeiferConfig.ARTIFACT_LEGACY_PATHS:
+        _blobs |= {
+            _alias: artifact_objects[_content_address]
+            for _alias, _content_address in artifact_aliases.items()
+        }
+    return _blobs
+
+
+def _distributes_by_adf() -> bool:
+    """Whether serialized tables are distributed to targets by ADF copies."""
+    return (
+        BakSerializationDistributionConfig.DEPLOY_PIPELINE
+        and BakSerializationDistributionConfig.DISTRIBUTION_MODE == "ADF"
+    )
+
+
+def _provisions_bak_datasets() -> bool:
+    """Whether linked services and datasets of BAK files are provisioned."""
+    return (
+        BakUnzipPipelineConfig.DEPLOY_PIPELINE
+        or BakUnzipPipelineConfig.DEPLOY_MULTI_ARCHIVE_PIPELINE
+        or BakUnzipPipelineConfig.DEPLOY_STRIPE_UPLOAD_PIPELINE
+        or BakSerializationDistributionConfig.DEPLOY_PIPELINE
+    )
+
+
+def generated_pipeline_definitions() -> Iterator[dict]:
+    """Definitions of pipelines generated by HeifER (switched on in the configuration)."""
+    if BakUnzipPipelineConfig.DEPLOY_MULTI_ARCHIVE_PIPELINE:
+        yield multi_archive_unzip_pipeline_definition(
+            name=BakUnzipPipelineConfig.MULTI_ARCHIVE_PIPELINE_NAME,
+            zipped_dataset=BakUnzipPipelineConfig.ZIPPED_BAK_DATASET,
+            zipped_folder_dataset=BakUnzipPipelineConfig.ZIPPED_BAK_FOLDER_DATASET,
+            unzipped_dataset=BakUnzipPipelineConfig.UNZIPPED_BAK_DATASET,
+            zipped_container=BakUnzipPipelineConfig.PRE_BRONZE_ZIPPED_BAK_DATASET_CONTAINER,
+            zipped_folder_path=BakUnzipPipelineConfig.PRE_BRONZE_ZIPPED_BAK_DATASET_FOLDER_PATH,
+            file_pattern=BakUnzipPipelineConfig.MULTI_ARCHIVE_FILE_PATTERN,
+            unzipped_container=BakUnzipPipelineConfig.PRE_BRONZE_UNZIPPED_BAK_DATASET_CONTAINER,
+            unzipped_folder_path=BakUnzipPipelineConfig.PRE_BRONZE_UNZIPPED_BAK_DATASET_FOLDER_PATH,  # noqa: E501
+            batch_count=BakUnzipPipelineConfig.MULTI_ARCHIVE_BATCH_COUNT,
+        )
+    if BakUnzipPipelineConfig.DEPLOY_STRIPE_UPLOAD_PIPELINE:
+        yield stripe_upload_pipeline_definition(
+            name=BakUnzipPipelineConfig.STRIPE_UPLOAD_PIPELINE_NAME,
+            unzipped_dataset=BakUnzipPipelineConfig.UNZIPPED_BAK_DATASET,
+            restore_dataset=BakUnzipPipelineConfig.RESTORE_DATASET,
+            unzipped_container=BakUnzipPipelineConfig.PRE_BRONZE_UNZIPPED_BAK_DATASET_CONTAINER,
+            unzipped_folder_path=BakUnzipPipelineConfig.PRE_BRONZE_UNZIPPED_BAK_DATASET_FOLDER_PATH,  # noqa: E501
+            file_pattern=BakUnzipPipelineConfig.RESTORE_STRIPE_FILE_PATTERN,
+            restore_container=BakUnzipPipelineConfig.RESTORE_CONTAINER,
+            restore_folder_path=BakUnzipPipelineConfig.RESTORE_FOLDER_PATH,
+            stripe_count=BakUnzipPipelineConfig.RESTORE_STRIPE_COUNT,
+            batch_count=BakUnzipPipelineConfig.STRIPE_UPLOAD_BATCH_COUNT,
+        )
+    if _distributes_by_adf():
+        yield distribution_copy_pipeline_definition(
+            name=BakSerializationDistributionConfig.DISTRIBUTION_PIPELINE_NAME,
+            source_dataset=BakSerializationDistributionConfig.DISTRIBUTION_SOURCE_DATASET,
+            target_datasets=[
+                _target.dataset_name for _target in BakSerializationDistributionConfig.targets()
+            ],
+            source_folder_path=BakSerializationDistributionConfig.TEMP_ACCOUNT_FOLDER_PATH,
+            concurrency=BakSerializationDistributionConfig.DISTRIBUTION_CONCURRENCY,
+        )
+
+
+def pipeline_template_variables(unit: Optional[DeploymentUnit] = None) -> dict[str, str]:
+    """Variables of pipeline templates (see PIPELINE_TEMPLATE_VARIABLES) of the unit."""
+    _unit = unit or TopologyConfig.primary_unit()
+    return HeiferConfig.PIPELINE_TEMPLATE_VARIABLES | {
+        "__STORAGE_ACCOUNT_NAME__": _unit.storage_account_name,
+    }
+
+
+def deployable_pipeline_definition(definition: dict, artifact_aliases: dict[str, str],
+                                   unit: Optional[DeploymentUnit] = None) -> Optional[dict]:
+    """Definition of the pipeline (from the pipelines repository) exactly as it is deployed.
+
+    References to artifacts are rewritten to their content addresses, activities use the
+    linked service of the compute profile and the Spark performance preset (or of the shared
+    cluster, or of the instance pool) of the pipeline and Copy activities get their
+    performance settings (see CopyPerformanceConfig).
+    Args:
+        definition: Parsed pipeline definition.
+        artifact_aliases: Mapping alias -> content address (see `build_artifact_store`).
+        unit: Deployment unit the pipeline is deployed to (the primary one by default).
+    Returns:
+        Rewritten definition, None if the pipeline is switched off (or not deployed by the
+        unit).
+    Raises:
+        ValueError: If the compute profile or the Spark preset of the pipeline is not
+            provisioned.
+    """
+    _unit = unit or TopologyConfig.primary_unit()
+    if _is_pipeline_skipped(definition['name']):
+        # Skip BAK ingestion pipeline if not required
+        return None
+    if _unit.pipelines is not None and definition['name'] not in _unit.pipelines:
+        return None
+    # References to '<PIPELINE>/<FILE>' are rewritten to content addresses of artifacts
+    _pipeline_definition = rewrite_artifact_references(
+        definition,
+        artifact_aliases,
+        HeiferConfig.LIBRARIES_CONTAINER,
+        _unit.storage_account_name,
+    )
+    # Compute profile and Spark preset take precedence over the shared cluster, and the shared
+    #   cluster over the instance pool
+    _profile = pipeline_compute_profile(_pipeline_definition)
+    _preset = pipeline_spark_preset(_pipeline_definition)
+    if _profile is not None or _preset != SparkPerformanceConfig.DEFAULT_PRESET:
+        _pipeline_definition = rewrite_linked_service(
+            _pipeline_definition,
+            HeiferClusterConfiguration.LINKED_SERVICE_NAME,
+            ComputeProfilesConfig.linked_service_name(_profile, _preset),
+        )
+    elif _runs_in_shared_cluster(_pipeline_definition):
+        _pipeline_definition = rewrite_linked_service(
+            _pipeline_definition,
+            HeiferClusterConfiguration.LINKED_SERVICE_NAME,
+            HeiferClusterConfiguration.SHARED_CLUSTER_LINKED_SERVICE_NAME,
+        )
+    elif _runs_in_instance_pool(_pipeline_definition['name']):
+        _pipeline_definition = rewrite_linked_service(
+            _pipeline_definition,
+            HeiferClusterConfiguration.LINKED_SERVICE_NAME,
+            HeiferClusterConfiguration.INSTANCE_POOL_LINKED_SERVICE_NAME,
+        )
+    if (
+            _distributes_by_adf()
+            and _pipeline_definition['name'] == BakSerializationDistributionConfig.PIPELINE_NAME
+    ):
+        # Serialized tables are copied to targets once the serialization finishes
+        _pipeline_definition = append_execute_pipeline(
+            _pipeline_definition,
+            "DistributeToTargets",
+            BakSerializationDistributionConfig.DISTRIBUTION_PIPELINE_NAME,
+        )
+    return _with_copy_performance(_pipeline_definition)
+
+
+def load_deployable_pipeline_definitions(artifact_aliases: dict[str, str],
+                                         unit: Optional[DeploymentUnit] = None
+                                         ) -> Iterator[dict]:
+    """Definitions of pipelines to be deployed, exactly as they are deployed.
+
+    Definitions are loaded lazily (in parallel, using cache) and rewritten (see
+    `deployable_pipeline_definition`), pipelines switched off are left out. Pipelines
+    generated by HeifER come first (so that pipelines executing them can depend on them).
+    Args:
+        artifact_aliases: Mapping alias -> content address (see `build_artifact_store`).
+        unit: Deployment unit the pipelines are deployed to (the primary one by default).
+    """
+    _pipelines_definitions: Iterator[dict] = load_pipeline_definitions(
+        discover_pipeline_files(HeiferConfig.PATH_TO_PIPELINES),
+        pipeline_template_variables(unit),
+        cache=PipelineDefinitionCache(HeiferConfig.PIPELINE_CACHE_PATH),
+        max_workers=HeiferConfig.PIPELINE_LOADER_MAX_WORKERS,
+    )
+    for _pipeline_definition in generated_pipeline_definitions():
+        yield _with_copy_performance(_pipeline_definition)
+    for _pipeline_definition in _pipelines_definitions:
+        if (_deployable_definition := deployable_pipeline_definition(
+                _pipeline_definition, artifact_aliases, unit
+        )) is not None:
+            yield _deployable_definition
+
+
+def pipeline_resource_inputs(definition: dict) -> dict[str, Any]:
+    """Inputs of the ADF pipeline resource (name, activities, parameters) of the definition."""
+    return {
+        "name": definition['name'],
+        "activities_json": json.dumps(definition['properties']['activities']),
+        "parameters": {
+            # Mapping: parameter_name -> default value
+            _pipeline_parameter_name: _pipeline_parameter_definition['defaultValue']
+            for _pipeline_parameter_name, _pipeline_parameter_definition in
+            definition['properties']['parameters'].items()
+        },
+    }
+
+
+def provisioned_linked_services() -> list[str]:
+    """Names of ADF linked services provisioned by the ADF stage (with this configuration)."""
+    _linked_services: list[str] = [
+        ComputeProfilesConfig.linked_service_name(_profile_name, _preset)
+        for _preset in SparkPerformanceConfig.provisioned_presets()
+        for _profile_name in ComputeProfilesConfig.provisioned_profiles()
+    ]
+    if HeiferClusterConfiguration.INSTANCE_POOL_ENABLED:
+        _linked_services.append(HeiferClusterConfiguration.INSTANCE_POOL_LINKED_SERVICE_NAME)
+    if HeiferClusterConfiguration.SHARED_CLUSTER_ENABLED:
+        _linked_services.append(HeiferClusterConfiguration.SHARED_CLUSTER_LINKED_SERVICE_NAME)
+    if _provisions_bak_datasets():
+        _linked_services += [
+            BakUnzipPipelineConfig.ZIPPED_BAK_LINKED_SERVICE,
+            BakUnzipPipelineConfig.UNZIPPED_BAK_LINKED_SERVICE,
+        ]
+    if BakUnzipPipelineConfig.DEPLOY_STRIPE_UPLOAD_PIPELINE:
+        _linked_services.append(BakUnzipPipelineConfig.RESTORE_LINKED_SERVICE)
+    if _distributes_by_adf():
+        _linked_services.append(BakSerializationDistributionConfig.DISTRIBUTION_SOURCE_LINKED_SERVICE)  # noqa: E501
+        _linked_services += [
+            _target.linked_service_name for _target in BakSerializationDistributionConfig.targets()
+        ]
+    return _linked_services
+
+
+def provisioned_datasets() -> list[str]:
+    """Names of ADF datasets provisioned by the ADF stage (with this configuration)."""
+    _datasets: list[str] = []
+    if _provisions_bak_datasets():
+        _datasets += [
+            BakUnzipPipelineConfig.ZIPPED_BAK_DATASET,
+            BakUnzipPipelineConfig.ZIPPED_BAK_FOLDER_DATASET,
+            BakUnzipPipelineConfig.UNZIPPED_BAK_DATASET,
+        ]
+    if BakUnzipPipelineConfig.DEPLOY_STRIPE_UPLOAD_PIPELINE:
+        _datasets.append(BakUnzipPipelineConfig.RESTORE_DATASET)
+    if _distributes_by_adf():
+        _datasets.append(BakSerializationDistributionConfig.DISTRIBUTION_SOURCE_DATASET)
+        _datasets += [
+            _target.dataset_name for _target in BakSerializationDistributionConfig.targets()
+        ]
+    return _datasets
@@ -0,0 +1,135 @@
+"""Pipelines stage: artifacts (scripts, wheels) of pipelines and ADF pipelines themselves."""
+from typing import Optional
+
+import pulumi
+import pulumi_azure  # TODO: Consider migrating to native
+import pulumi_azure_native as azure_native
+
+from components.base import HeiferComponent
+from components.pipeline_definitions import (
+    PIPELINE_RESOURCE_PREFIX, artifact_blobs, build_pipelines_artifact_store,
+    load_deployable_pipeline_definitions, pipeline_resource_inputs
+)
+from configurations.config_heifer import HeiferConfig
+from configurations.config_topology import DeploymentUnit
+from utilities.artifact_store import artifact_references
+from utilities.pipeline_loader import executed_pipelines, order_by_executed_pipelines
+
+
+class HeiferPipelines(HeiferComponent):
+    """Artifacts of pipelines (in the libraries container) and ADF pipelines.
+
+    Upstream resources are referenced only by names/IDs, so the stage can be deployed by
+    itself (with values read from a stack reference to the stack with the other stages).
+    Args:
+        resource_name: Name of the component.
+        resource_group_name: Name of the HeifER resource group.
+        storage_account_name: Name of the HeifER storage account.
+        libraries_container_name: Name of the (existing) container for artifacts.
+        data_factory_id: ID of the HeifER Data Factory.
+        deploy_pipelines: Whether to deploy ADF pipelines (requires the Databricks link).
+        pipeline_dependencies: Resources the ADF pipelines depend on (if in the same stack).
+        unit: Deployment unit (the primary one by default), it selects deployed pipelines.
+        opts: Options of the component.
+    """
+    def __init__(self, resource_name: str, resource_group_name: pulumi.Input[str],
+                 storage_account_name: pulumi.Input[str],
+                 libraries_container_name: pulumi.Input[str],
+                 data_factory_id: pulumi.Input[str], deploy_pipelines: bool = True,
+                 pipeline_dependencies: Optional[list[pulumi.Resource]] = None,
+                 unit: Optional[DeploymentUnit] = None,
+                 opts: Optional[pulumi.ResourceOptions] = None):
+        super().__init__("HeiferPipelines", resource_name, unit, opts)
+
+        # -- Deduplicate artifacts by content (each unique file is stored once) --
+        #   (empty if artifacts are not uploaded, references of pipelines are kept then)
+        self.artifact_objects, self.artifact_aliases = build_pipelines_artifact_store()
+        # -------------------------------------------------------------------------
+
+        # -- Upload files (.py scripts, WHL) from pipeline --
+        # Uploaded artifacts (exported by the program); None if nothing is uploaded
+        self.artifacts: Optional[pulumi.Input] = None
+        # Resources uploading artifacts by blob name (ADF pipelines depend on those uploading
+        #   artifacts they refer to); the staged upload uploads all artifacts at once
+        self.artifact_uploads: dict[str, pulumi.Resource] = {}
+        self.staged_upload: Optional[pulumi.Resource] = None
+        _upload_objects = artifact_blobs(self.artifact_objects, self.artifact_aliases)
+        if HeiferConfig.UPLOAD_LIBRARIES and HeiferConfig.ARTIFACT_UPLOAD_MODE == "STAGED":
+            # Imported only when needed (Azure Storage SDK)
+            from utilities.block_uploader import StagedArtifactUpload
+
+            # Uploads during the actual deployment, once the container exists; Pulumi only
+            #   records the resulting URLs and hashes
+            self.staged_upload = StagedArtifactUpload(
+                resource_name=self.child_name("heifer-artifacts-staged-upload"),
+                storage_account_name=storage_account_name,
+                container_name=libraries_container_name,
+                artifacts=_upload_objects,
+                connection_string=HeiferConfig.ARTIFACT_STORAGE_CONNECTION_STRING,
+                block_size=HeiferConfig.ARTIFACT_UPLOAD_BLOCK_SIZE_MB * 1024 * 1024,
+                max_concurrency=HeiferConfig.ARTIFACT_UPLOAD_MAX_CONCURRENCY,
+                max_retries=HeiferConfig.ARTIFACT_UPLOAD_MAX_RETRIES,
+                opts=self.child_opts(),
+            )
+            self.artifacts = self.staged_upload.uploaded
+        elif HeiferConfig.UPLOAD_LIBRARIES:
+            # Blobs are retained when their resources are removed: content addresses are
+            #   immutable (runs of older pipelines may still use them), former paths may be used
+            #   outside HeifER and, after switching to the STAGED mode, the staged upload skips
+            #   blobs that already exist (they would be deleted at the end of the update)
+            for _blob_name, _artifact_object in _upload_objects.items():
+                _is_content_address = _blob_name in self.artifact_objects
+                self.artifact_uploads[_blob_name] = azure_native.storage.Blob(
+                    resource_name=self.child_name(_blob_name),
+                    blob_name=_blob_name,
+                    resource_group_name=resource_group_name,
+                    account_name=storage_account_name,
+                    container_name=libraries_container_name,
+                    type=azure_native.storage.BlobType.BLOCK,
+                    source=pulumi.FileAsset(_artifact_object['local_path']),
+                    # Blobs at former paths keep their former inputs
+                    metadata={"sha256": _artifact_object['sha256']}
+                    if _is_content_address else None,
+                    opts=self.child_opts(retain_on_delete=True),
+                )
+            self.artifacts = self.artifact_aliases
+        # ---------------------------------------------------
+
+        # ====== DATA FACTORY AND PIPELINE PROVISIONING ======
+        # -- Deploy all available pipelines --
+        if deploy_pipelines:
+            # Deployed pipelines by name (created in order, executed pipelines first)
+            _pipelines: dict[str, pulumi_azure.datafactory.Pipeline] = {}
+            for _pipeline_definition in order_by_executed_pipelines(
+                    load_deployable_pipeline_definitions(self.artifact_aliases, self.unit)
+            ):
+                _pipelines[_pipeline_definition['name']] = pulumi_azure.datafactory.Pipeline(
+                    resource_name=self.child_name(
+                        f"{PIPELINE_RESOURCE_PREFIX}{_pipeline_definition['name']}"
+                    ),
+                    data_factory_id=data_factory_id,
+                    **pipeline_resource_inputs(_pipeline_definition),
+                    opts=self.child_opts(depends_on=[
+                        *(pipeline_dependencies or []),
+                        *self._artifact_dependencies(_pipeline_definition),
+                        *(
+                            _pipelines[_name]
+                            for _name in sorted(executed_pipelines(_pipeline_definition))
+                            if _name in _pipelines
+                        ),
+                    ]),
+                )
+        # ------------------------------------
+
+        self.register_outputs({})
+
+    def _artifact_dependencies(self, definition: dict) -> list[pulumi.Resource]:
+        """Resources uploading artifacts (content addresses) the deployed pipeline refers to."""
+        if self.staged_upload is not None:
+            return [self.staged_upload]
+        return [
+            self.artifact_uploads[_blob_name] for _blob_name in sorted(artifact_references(
+                definition, HeiferConfig.LIBRARIES_CONTAINER, self.unit.storage_account_name
+            ))
+            if _blob_name in self.artifact_uploads
+        ]
@@ -0,0 +1,172 @@
+"""Storage stage: resource group, storage account (data lake), containers of layers and
+lifecycle management of staging data."""
+from typing import Optional
+
+import pulumi
+import pulumi_azure_native as azure_native
+
+from components.base import HeiferComponent
+from configurations.config_heifer import HeiferConfig
+from configurations.config_topology import DeploymentUnit
+from configurations.config_bak_unzip_pipeline import BakUnzipPipelineConfig
+from configurations.config_bak_serialization_distribution import BakSerializationDistributionConfig
+from configurations.config_staging_lifecycle import StagingLifecycleConfig
+
+
+def staging_containers() -> list[str]:
+    """Staging containers of deployed BAK pipelines subject to the lifecycle policy.
+    Returns:
+        Containers of the storage account of HeifER. Protected containers and containers of
+        layers are left out, and so are containers that are not configured.
+    Note:
+        Only the storage account of HeifER is managed; a storage account has a single
+        lifecycle policy, so policies of other (e.g. pre-bronze) accounts are left to
+        their owners.
+    """
+    _staging: list[str] = []
+
+    def _add(account: str, container: str) -> None:
+        if container == "TODO" or container in StagingLifecycleConfig.PROTECTED_CONTAINERS:
+            return
+        if account != HeiferConfig.STORAGE_ACCOUNT_NAME:
+            pulumi.warn(f"Lifecycle policy of container '{container}' is not deployed (storage "
+                        f"account '{account}' is not owned by HeifER)")
+            return
+        if (
+                container in HeiferConfig.STORAGE_ACCOUNT_LAYERS
+                or container == HeiferConfig.LIBRARIES_CONTAINER
+        ):
+            return
+        if container not in _staging:
+            _staging.append(container)
+
+    if (
+            BakUnzipPipelineConfig.DEPLOY_PIPELINE
+            or BakUnzipPipelineConfig.DEPLOY_MULTI_ARCHIVE_PIPELINE
+            or BakSerializationDistributionConfig.DEPLOY_PIPELINE
+    ) and BakUnzipPipelineConfig.PRE_BRONZE_STORAGE_ACCOUNT != "TODO":
+        for _container in (
+                BakUnzipPipelineConfig.PRE_BRONZE_ZIPPED_BAK_DATASET_CONTAINER,
+                BakUnzipPipelineConfig.PRE_BRONZE_UNZIPPED_BAK_DATASET_CONTAINER,
+        ):
+            _add(BakUnzipPipelineConfig.PRE_BRONZE_STORAGE_ACCOUNT, _container)
+    if BakSerializationDistributionConfig.DEPLOY_PIPELINE:
+        # Serialized Parquet files are staged in the storage account of HeifER
+        _add(HeiferConfig.STORAGE_ACCOUNT_NAME,
+             BakSerializationDistributionConfig.TEMP_ACCOUNT_CONTAINER)
+    return _staging
+
+
+class HeiferStorage(HeiferComponent):
+    """Resource group and storage account of HeifER with a container for each layer.
+    Args:
+        resource_name: Name of the component.
+        unit: Deployment unit (the primary one by default); stages built on the storage
+            belong to the same unit.
+        opts: Options of the component.
+    """
+    def __init__(self, resource_name: str, unit: Optional[DeploymentUnit] = None,
+                 opts: Optional[pulumi.ResourceOptions] = None):
+        super().__init__("HeiferStorage", resource_name, unit, opts)
+
+        # -- Create an Azure Resource Group for HeifER --
+        self.resource_group = azure_native.resources.ResourceGroup(
+            resource_name=self.unit.resource_group,
+            location=self.unit.location,
+            opts=self.child_opts(),
+        )
+        # -----------------------------------------------
+
+        # -- Create an Azure Storage account for HeifER --
+        self.storage_account = azure_native.storage.StorageAccount(
+            resource_name=self.unit.storage_account_name,
+            account_name=self.unit.storage_account_name,
+            resource_group_name=self.resource_group.name,
+            location=self.resource_group.location,
+            kind="StorageV2",
+            is_hns_enabled=True,
+            encryption=azure_native.storage.EncryptionArgs(require_infrastructure_encryption=True),
+            enable_https_traffic_only=True,
+            sku=azure_native.storage.SkuArgs(name="Standard_GRS"),
+            access_tier=azure_native.storage.AccessTier.HOT,
+            public_network_access=azure_native.storage.PublicNetworkAccess.DISABLED,
+            opts=self.child_opts(),
+        )
+        # ------------------------------------------------
+
+        # -- Create containers for each layer (aka zone; typically bronze, silver, gold) --
+        self.layer_containers: dict[str, azure_native.storage.BlobContainer] = {}
+        for _container_name in self.unit.storage_account_layers:
+            self.layer_containers[_container_name] = azure_native.storage.BlobContainer(
+                resource_name=self.child_name(_container_name),
+                resource_group_name=self.resource_group.name,
+                account_name=self.storage_account.name,
+                container_name=_container_name,
+                public_access=azure_native.storage.PublicAccess.NONE,
+                opts=self.child_opts(),
+            )
+        # -- Container of libraries (artifacts of pipelines), even if it is not a layer --
+        #   (the same resource as the layer of the same name, so layers may omit it)
+        self.libraries_container: azure_native.storage.BlobContainer = self.layer_containers.get(
+            HeiferConfig.LIBRARIES_CONTAINER
+        ) or azure_native.storage.BlobContainer(
+            resource_name=self.child_name(HeiferConfig.LIBRARIES_CONTAINER),
+            resource_group_name=self.resource_group.name,
+            account_name=self.storage_account.name,
+            container_name=HeiferConfig.LIBRARIES_CONTAINER,
+            public_access=azure_native.storage.PublicAccess.NONE,
+            opts=self.child_opts(),
+        )
+        # ---------------------------------------------------------------------------------
+
+        # -- Lifecycle management (TTL) of staging data of BAK pipelines --
+        #   Stale blobs are moved to the cool tier and then deleted (listings stay fast)
+        #   (staging containers are shared by deployment units, see TopologyConfig)
+        self.staging_lifecycle_policies: list[azure_native.storage.ManagementPolicy] = []
+        if StagingLifecycleConfig.ENABLED and self.unit.is_primary:
+            if not 0 <= StagingLifecycleConfig.COOL_AFTER_DAYS < StagingLifecycleConfig.DELETE_AFTER_DAYS:  # noqa: E501
+                raise ValueError(
+                    f"Staging blobs cannot be moved to the cool tier after "
+                    f"{StagingLifecycleConfig.COOL_AFTER_DAYS} days when deleted after "
+                    f"{StagingLifecycleConfig.DELETE_AFTER_DAYS} days"
+                )
+            if _containers := staging_containers():
+                self.staging_lifecycle_policies.append(azure_native.storage.ManagementPolicy(
+                    resource_name=self.child_name(
+                        f"heifer-staging-lifecycle-{HeiferConfig.STORAGE_ACCOUNT_NAME}"
+                    ),
+                    account_name=self.storage_account.name,
+                    resource_group_name=self.resource_group.name,
+                    # The only allowed name (single policy per storage account)
+                    management_policy_name="default",
+                    policy=azure_native.storage.ManagementPolicySchemaArgs(rules=[
+                        azure_native.storage.ManagementPolicyRuleArgs(
+                            name="heiferStagingTtl",
+                            type=azure_native.storage.RuleType.LIFECYCLE,
+                            enabled=True,
+                            definition=azure_native.storage.ManagementPolicyDefinitionArgs(
+                                filters=azure_native.storage.ManagementPolicyFilterArgs(
+                                    blob_types=["blockBlob"],
+                                    prefix_match=[f"{_container}/" for _container in _containers],
+                                ),
+                                actions=azure_native.storage.ManagementPolicyActionArgs(
+                                    base_blob=azure_native.storage.ManagementPolicyBaseBlobArgs(
+                                        tier_to_cool=azure_native.storage.DateAfterModificationArgs(  # noqa: E501
+                                            days_after_modification_greater_than=StagingLifecycleConfig.COOL_AFTER_DAYS,  # noqa: E501
+                                        ) if StagingLifecycleConfig.COOL_AFTER_DAYS else None,
+                                        delete=azure_native.storage.DateAfterModificationArgs(
+                                            days_after_modification_greater_than=StagingLifecycleConfig.DELETE_AFTER_DAYS,  # noqa: E501
+                                        ),
+                                    ),
+                                ),
+                            ),
+                        ),
+                    ]),
+                    opts=self.child_opts(),
+                ))
+        # ------------------------------------------------------------------
+
+        self.register_outputs({
+            "resource_group_name": self.resource_group.name,
+            "storage_account_name": self.storage_account.name,
+        })
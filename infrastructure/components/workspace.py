@@ -0,0 +1,137 @@
+"""Workspace stage: Databricks workspace, its readiness and private endpoints to it."""
+from typing import Optional
+
+import pulumi
+import pulumi_azure_native as azure_native
+
+from components.base import HeiferComponent
+from components.network import HeiferNetwork
+from components.storage import HeiferStorage
+from configurations.config_heifer import HeiferConfig
+from utilities.workspace_readiness import WorkspaceReadiness
+
+
+class HeiferWorkspace(HeiferComponent):
+    """Databricks workspace (VNet injected) of HeifER.
+    Args:
+        resource_name: Name of the component.
+        storage: Storage stage (resource group).
+        network: Network stage (subnets and private endpoints to the storage).
+        current_client: Client configuration of the deployer (subscription, object ID).
+        opts: Options of the component.
+    """
+    def __init__(self, resource_name: str, storage: HeiferStorage, network: HeiferNetwork,
+                 current_client: pulumi.Output,
+                 opts: Optional[pulumi.ResourceOptions] = None):
+        super().__init__("HeiferWorkspace", resource_name, storage.unit, opts)
+        _rg = storage.resource_group
+
+        # -- Databricks Workspace --
+        self.databricks_workspace = azure_native.databricks.Workspace(
+            resource_name=self.unit.databricks_workspace_name,
+            workspace_name=self.unit.databricks_workspace_name,
+            resource_group_name=_rg.name,
+            managed_resource_group_id=pulumi.Output.format(
+                "/subscriptions/{0}/resourceGroups/{1}",
+                current_client.subscription_id,
+                self.unit.databricks_managed_resource_group_name
+            ),
+            location=_rg.location,
+            sku=azure_native.databricks.SkuArgs(name="premium"),
+            public_network_access=azure_native.databricks.PublicNetworkAccess.ENABLED,  # TODO: CHANGE  # noqa: E501
+            required_nsg_rules=azure_native.databricks.RequiredNsgRules.ALL_RULES,  # TODO: CHANGE
+            parameters=azure_native.databricks.WorkspaceCustomParametersArgs(
+                require_infrastructure_encryption=azure_native.databricks.WorkspaceCustomBooleanParameterArgs(value=True),  # noqa: E501
+                enable_no_public_ip=azure_native.databricks.WorkspaceCustomBooleanParameterArgs(value=True),  # noqa: E501
+                custom_public_subnet_name=azure_native.databricks.WorkspaceCustomStringParameterArgs(value=network.databricks_host_subnet.name),  # noqa: E501
+                custom_private_subnet_name=azure_native.databricks.WorkspaceCustomStringParameterArgs(value=network.databricks_container_subnet.name),  # noqa: E501
+                custom_virtual_network_id=azure_native.databricks.WorkspaceCustomStringParameterArgs(value=network.virtual_network.id),  # noqa: E501
+                storage_account_name=azure_native.databricks.WorkspaceCustomStringParameterArgs(value=self.unit.databricks_dfs_storage_account_name),  # noqa: E501
+            ),
+            opts=self.child_opts(
+                depends_on=[network.databricks_host_subnet,
+                            network.databricks_container_subnet,
+                            network.virtual_network,
+                            network.private_endpoint_databricks_dfs,
+                            network.private_endpoint_databricks_blob],
+                custom_timeouts=pulumi.CustomTimeouts(create="30m", update="30m", delete="30m")
+            ),
+        )
+        # --------------------------
+
+        # --- Wait till the Databricks Workspace is provisioned and its API reachable ---
+        self.readiness = WorkspaceReadiness(
+            resource_name=self.child_name("heifer-workspace-readiness"),
+            workspace_id=self.databricks_workspace.id,
+            workspace_url=self.databricks_workspace.workspace_url,
+            timeout=HeiferConfig.WORKSPACE_READINESS_TIMEOUT_SECONDS,
+            initial_delay=HeiferConfig.WORKSPACE_READINESS_INITIAL_DELAY_SECONDS,
+            max_delay=HeiferConfig.WORKSPACE_READINESS_MAX_DELAY_SECONDS,
+            opts=self.child_opts(),
+        )
+        # -------------------------------------------------------------------------------
+
+        # -- Private Endpoint to the Databricks control plane --
+        self.private_endpoint_databricks_control_plane = azure_native.network.PrivateEndpoint(
+            resource_name=self.child_name("pe-heifer-databricks-control-plane"),
+            private_endpoint_name="pe-heifer-databricks-control-plane",
+            resource_group_name=_rg.name,
+            location=_rg.location,
+            subnet=azure_native.network.SubnetArgs(id=network.shared_subnet.id),
+            private_link_service_connections=[
+                azure_native.network.PrivateLinkServiceConnectionArgs(
+                    name="pe-conn-heifer-databricks-control-plane",
+                    private_link_service_id=self.databricks_workspace.id,
+                    request_message="Approve connection to Databricks control plane.",
+                    group_ids=["databricks_ui_api"],
+                ),
+            ],
+            opts=self.child_opts(depends_on=[self.readiness]),
+        )
+        # ------------------------------------------------------
+
+        # -- Private endpoint to Databricks filesystem --
+        self.private_endpoint_databricks_filesystem = azure_native.network.PrivateEndpoint(
+            resource_name=self.child_name("pe-heifer-databricks-filesystem"),
+            private_endpoint_name="pe-heifer-databricks-filesystem",
+            resource_group_name=_rg.name,
+            location=_rg.location,
+            subnet=azure_native.network.SubnetArgs(id=network.shared_subnet.id),
+            private_link_service_connections=[
+                azure_native.network.PrivateLinkServiceConnectionArgs(
+                    name="pe-conn-heifer-databricks-filesystem",
+                    private_link_service_id=pulumi.Output.format(
+                        "/subscriptions/{0}/resourceGroups/{1}/providers/Microsoft.Storage/"
+                        "storageAccounts/{2}",
+                        current_client.subscription_id,
+                        self.unit.databricks_managed_resource_group_name,
+                        self.unit.databricks_dfs_storage_account_name,
+                    ),
+                    request_message="Approve connection to Databricks filesystem.",
+                    group_ids=["blob"],
+                ),
+            ],
+            opts=self.child_opts(depends_on=[self.readiness]),
+        )
+        # -----------------------------------------------
+
+        # -- Add a current deployer (user using Pulumi) as a Contributor to Workspace --
+        self.perm_current_user_workspace_contributor = azure_native.authorization.RoleAssignment(
+            resource_name=self.child_name('perm-heifer-current-user-workspace-contributor'),
+            principal_id=current_client.object_id,
+            principal_type=azure_native.authorization.PrincipalType.USER,
+            # role_definition_name='Contributor',
+            role_definition_id=pulumi.Output.format(
+                "/subscriptions/{0}/providers/Microsoft.Authorization/roleDefinitions/"
+                "b24988ac-6180-42a0-ab88-20f7382dd24c",  # Contributor GUID
+                current_client.subscription_id
+            ),
+            scope=self.databricks_workspace.id,
+            opts=self.child_opts(depends_on=[self.databricks_workspace]),
+        )
+        # ------------------------------------------------------------------------------
+
+        self.register_outputs({
+            "workspace_id": self.databricks_workspace.id,
+            "workspace_url": self.databricks_workspace.workspace_url,
+        })
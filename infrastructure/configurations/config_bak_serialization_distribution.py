@@ -1,5 +1,40 @@
 import os
+import re
+import hashlib
+import dataclasses
+from typing import Optional
 from .config_bak_unzip_pipeline import BakUnzipPipelineConfig
+from .config_copy_performance import CopyPerformance, parse_copy_performance
+
+
+@dataclasses.dataclass(frozen=True)
+class SerializationTarget:
+    """Destination of serialized tables (parsed from TARGET_STORAGE_ACCOUNTS_URLS)."""
+    storage_account: str
+    container: str
+    path: str = ""
+
+    @property
+    def url(self) -> str:
+        return f"https://{self.storage_account}.blob.core.windows.net/{self.container}" + (
+            f"/{self.path}" if self.path else ""
+        )
+
+    @property
+    def key(self) -> str:
+        """Stable identifier of the target (names of its linked service and dataset)."""
+        return f"{self.storage_account}-{self.container}" + (
+            f"-{hashlib.sha256(self.path.encode()).hexdigest()[:8]}" if self.path else ""
+        )
+
+    @property
+    def dataset_name(self) -> str:
+        """Name of the ADF dataset (and with a suffix, of the linked service) of the target."""
+        return f"serializationtarget-{self.key}"
+
+    @property
+    def linked_service_name(self) -> str:
+        return f"{self.dataset_name}-strg"
 
 
 class BakSerializationDistributionConfig(BakUnzipPipelineConfig):
@@ -19,9 +54,59 @@ class BakSerializationDistributionConfig(BakUnzipPipelineConfig):
     # If True, the pipeline for unzipping zipped files is deployed
     DEPLOY_PIPELINE: bool = bool(os.getenv("DEPLOY_BAK_SERIALIZATION_PIPELINE", default="False") == "True")
     PIPELINE_NAME: str = "BakSerializationDistribution"
+    # Compute profile of the pipeline (see ComputeProfilesConfig), overrides pipeline.json
+    COMPUTE_PROFILE: Optional[str] = os.getenv("SERIALIZATION_COMPUTE_PROFILE") or None
+    # Spark performance preset of the pipeline (see SparkPerformanceConfig), overrides
+    #   pipeline.json; it has to be the default or one of the extra presets
+    SPARK_PERFORMANCE_PRESET: Optional[str] = os.getenv("SERIALIZATION_SPARK_PERFORMANCE_PRESET") or None  # noqa: E501
+    # Performance settings of Copy activities of the pipeline (and of
+    #   DISTRIBUTION_PIPELINE_NAME), JSON mapping activity -> settings ('*' for all),
+    #   see CopyPerformanceConfig
+    COPY_PERFORMANCE: dict[str, CopyPerformance] = parse_copy_performance(os.getenv("SERIALIZATION_COPY_PERFORMANCE_JSON"))  # noqa: E501
     
     # D) Configuration of temporary and target storage accounts
     TEMP_ACCOUNT_CONTAINER: str = os.getenv("SERIALIZATION_TEMP_ACCOUNT_CONTAINER", default="TODO")
     # Separated by a '|' symbol. Vertical-bar separated list of URLs following the logic:
     #   https://<STORAGE_ACCOUNT>.blob.core.windows.net/<CONTAINER>/<PATH>
     TARGET_STORAGE_ACCOUNTS_URLS: str = os.getenv("SERIALIZATION_TARGET_STORAGE_ACCOUNTS_URLS", default="TODO")
+    # Folder with serialized tables inside the temporary container (empty for all of it)
+    TEMP_ACCOUNT_FOLDER_PATH: str = os.getenv("SERIALIZATION_TEMP_ACCOUNT_FOLDER_PATH", default="")  # noqa: E501
+
+    # E) Distribution to targets, either:
+    #   "SPARK": the Spark job writes the serialized tables to each target itself, or
+    #   "ADF": the Spark job writes only to the temporary container, the tables are then
+    #     copied (server-side) to all targets concurrently by the ADF pipeline
+    #     DISTRIBUTION_PIPELINE_NAME (executed at the end of the serialization pipeline);
+    #     the Spark job gets empty destination URLs.
+    DISTRIBUTION_MODE: str = os.getenv("SERIALIZATION_DISTRIBUTION_MODE", default="SPARK")
+    DISTRIBUTION_PIPELINE_NAME: str = "BakSerializationDistributionCopy"
+    # ADF dataset and linked service of the temporary container (source of copies)
+    DISTRIBUTION_SOURCE_DATASET: str = "serializationtempds"
+    DISTRIBUTION_SOURCE_LINKED_SERVICE: str = "serializationtempstrg"
+    # Maximal number of targets copied concurrently
+    DISTRIBUTION_CONCURRENCY: int = int(os.getenv("SERIALIZATION_DISTRIBUTION_CONCURRENCY", default="4"))  # noqa: E501
+    # Destination URLs passed to the Spark job
+    SPARK_DESTINATION_URLS: str = "" if DISTRIBUTION_MODE == "ADF" else TARGET_STORAGE_ACCOUNTS_URLS  # noqa: E501
+
+    @classmethod
+    def targets(cls) -> list[SerializationTarget]:
+        """Targets parsed from TARGET_STORAGE_ACCOUNTS_URLS.
+        Raises:
+            ValueError: If any URL is invalid, or the same target is listed twice.
+        """
+        _targets: list[SerializationTarget] = []
+        for _url in cls.TARGET_STORAGE_ACCOUNTS_URLS.split("|"):
+            if not (_match := re.fullmatch(
+                    r"https://([a-z0-9]{3,24})\.blob\.core\.windows\.net/"
+                    r"([a-z0-9](?:[a-z0-9]|-(?=[a-z0-9])){2,62})(?:/(.*?))?/?",
+                    _url.strip()
+            )):
+                raise ValueError(
+                    f"Invalid serialization target '{_url}' (expected "
+                    f"https://<STORAGE_ACCOUNT>.blob.core.windows.net/<CONTAINER>/<PATH>)"
+                )
+            _target = SerializationTarget(_match[1], _match[2], _match[3] or "")
+            if _target in _targets:
+                raise ValueError(f"Serialization target '{_url}' is listed twice")
+            _targets.append(_target)
+        return _targets
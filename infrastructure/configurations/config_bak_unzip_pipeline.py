@@ -1,4 +1,6 @@
 import os
+from typing import Any, Optional
+from .config_copy_performance import CopyPerformance, parse_copy_performance
 
 
 class BakUnzipPipelineConfig:
@@ -13,6 +15,15 @@ class BakUnzipPipelineConfig:
     # If True, the pipeline for unzipping zipped files is deployed
     DEPLOY_PIPELINE: bool = bool(os.getenv("DEPLOY_BAK_UNZIP_PIPELINE", default="False") == "True")
     PIPELINE_NAME: str = "BakToManagedSQL"
+    # Compute profile of the pipeline (see ComputeProfilesConfig), overrides pipeline.json
+    COMPUTE_PROFILE: Optional[str] = os.getenv("BAK_UNZIP_COMPUTE_PROFILE") or None
+    # Spark performance preset of the pipeline (see SparkPerformanceConfig), overrides
+    #   pipeline.json; it has to be the default or one of the extra presets
+    SPARK_PERFORMANCE_PRESET: Optional[str] = os.getenv("BAK_UNZIP_SPARK_PERFORMANCE_PRESET") or None  # noqa: E501
+    # Performance settings of Copy activities of the pipeline (and of
+    #   MULTI_ARCHIVE_PIPELINE_NAME), JSON mapping activity -> settings ('*' for all),
+    #   see CopyPerformanceConfig
+    COPY_PERFORMANCE: dict[str, CopyPerformance] = parse_copy_performance(os.getenv("BAK_UNZIP_COPY_PERFORMANCE_JSON"))  # noqa: E501
 
     # A) LANDING ZONE ACCESS CONFIGURATION
     LANDING_ZIP_STORAGE_ACCOUNT: str = os.getenv("BAK_UNZIP_LANDING_ZIP_STORAGE_ACCOUNT", default="TODO")  # noqa
@@ -23,12 +34,30 @@ class BakUnzipPipelineConfig:
     PRE_BRONZE_STORAGE_ACCOUNT: str = os.getenv("BAK_UNZIP_PRE_BRONZE_STORAGE_ACCOUNT", default="TODO")  # noqa
     PRE_BRONZE_ZIPPED_BAK_DATASET_CONTAINER: str = os.getenv("BAK_UNZIP_PRE_BRONZE_ZIPPED_BAK_DATASET_CONTAINER", default="TODO")  # noqa
     PRE_BRONZE_ZIPPED_BAK_DATASET_FILE_NAME: str = os.getenv("BAK_UNZIP_PRE_BRONZE_ZIPPED_BAK_DATASET_FILE_NAME", default="TODO")  # noqa
+    # Folder with zipped files inside the container (empty for the root of the container)
+    PRE_BRONZE_ZIPPED_BAK_DATASET_FOLDER_PATH: str = os.getenv("BAK_UNZIP_PRE_BRONZE_ZIPPED_BAK_DATASET_FOLDER_PATH", default="")  # noqa
 
     # Where should be the file extracted (storage account, container and destination folder)
     PRE_BRONZE_UNZIPPED_BAK_DATASET_STORAGE_ACCOUNT: str = os.getenv("BAK_UNZIP_PRE_BRONZE_UNZIPPED_BAK_DATASET_STORAGE_ACCOUNT", default="TODO")  # noqa
     PRE_BRONZE_UNZIPPED_BAK_DATASET_CONTAINER: str = os.getenv("BAK_UNZIP_PRE_BRONZE_UNZIPPED_BAK_DATASET_CONTAINER", default="TODO")  # noqa
     # The file will be extracted into the folder with the name of the zipped file and inside
     PRE_BRONZE_UNZIPPED_BAK_DATASET_FOLDER_PATH: str = os.getenv("BAK_UNZIP_PRE_BRONZE_UNZIPPED_BAK_DATASET_FOLDER_PATH", default="TODO")  # noqa
+    # ADF datasets of zipped files, of the folder with them (listing) and of extracted files;
+    #   all are parameterised (container, folderPath, fileName), defaults are values above
+    ZIPPED_BAK_DATASET: str = "zippedbakds"
+    ZIPPED_BAK_FOLDER_DATASET: str = "zippedbakfolderds"
+    UNZIPPED_BAK_DATASET: str = "unzippedbakds"
+    # ADF linked services (pre-bronze storage account) of zipped and extracted files
+    ZIPPED_BAK_LINKED_SERVICE: str = "zippedbakstrg"
+    UNZIPPED_BAK_LINKED_SERVICE: str = "unzippedbakstrg"
+
+    # B2) MULTI-ARCHIVE VARIANT: every zipped file in the folder matching the wildcard
+    #   (exactly one '*', like '*.zip' or 'drop-2024-*.zip') is extracted in parallel
+    DEPLOY_MULTI_ARCHIVE_PIPELINE: bool = bool(os.getenv("DEPLOY_BAK_UNZIP_MULTI_ARCHIVE_PIPELINE", default="False") == "True")  # noqa
+    MULTI_ARCHIVE_PIPELINE_NAME: str = "BakUnzipMultiArchive"
+    MULTI_ARCHIVE_FILE_PATTERN: str = os.getenv("BAK_UNZIP_MULTI_ARCHIVE_FILE_PATTERN", default="*.zip")  # noqa
+    # Number of archives extracted concurrently (ForEach batch count, 1-50)
+    MULTI_ARCHIVE_BATCH_COUNT: int = int(os.getenv("BAK_UNZIP_MULTI_ARCHIVE_BATCH_COUNT", default="8"))  # noqa
 
     # Has Blob Owner permissions on pre-bronze and Blob Reader perms on landing zone
     PRE_BRONZE_APP_TENANT: str = os.getenv("BAK_UNZIP_PRE_BRONZE_APP_TENANT", default="TODO")  # noqa
@@ -42,3 +71,75 @@ class BakUnzipPipelineConfig:
     SQL_MI_APP_TENANT: str = os.getenv("BAK_UNZIP_SQL_MI_APP_TENANT", default="TODO")  # noqa
     SQL_MI_APP_CLIENT_ID: str = os.getenv("BAK_UNZIP_SQL_MI_APP_CLIENT_ID", default="TODO")  # noqa
     SQL_MI_APP_CLIENT_SECRET: str = os.getenv("BAK_UNZIP_SQL_MI_APP_CLIENT_SECRET", default="TODO")  # noqa
+
+    # C2) STRIPED RESTORE (published to the job, see `restore_config`)
+    # Stripes of the backup set (files of one BAK, 'RESTORE ... FROM URL = ..., URL = ...')
+    #   are files matching the wildcard (exactly one '*') in the restore location
+    RESTORE_STRIPE_FILE_PATTERN: str = os.getenv("BAK_UNZIP_RESTORE_STRIPE_FILE_PATTERN", default="*.bak")  # noqa
+    # Expected number of stripes (1-64); the restore fails if it differs, 0 for any number
+    RESTORE_STRIPE_COUNT: int = int(os.getenv("BAK_UNZIP_RESTORE_STRIPE_COUNT", default="0"))  # noqa
+    # Location read by the Managed Instance (by default the location of extracted files)
+    RESTORE_STORAGE_ACCOUNT: str = os.getenv("BAK_UNZIP_RESTORE_STORAGE_ACCOUNT") or PRE_BRONZE_UNZIPPED_BAK_DATASET_STORAGE_ACCOUNT  # noqa
+    RESTORE_CONTAINER: str = os.getenv("BAK_UNZIP_RESTORE_CONTAINER") or PRE_BRONZE_UNZIPPED_BAK_DATASET_CONTAINER  # noqa
+    RESTORE_FOLDER_PATH: str = os.getenv("BAK_UNZIP_RESTORE_FOLDER_PATH") or PRE_BRONZE_UNZIPPED_BAK_DATASET_FOLDER_PATH  # noqa
+    # Tuning of the restore: bytes per transfer (multiple of 64 KB, at most 4 MB) and number
+    #   of I/O buffers; the default of SQL Server is used if empty
+    RESTORE_MAX_TRANSFER_SIZE: Optional[int] = int(os.getenv("BAK_UNZIP_RESTORE_MAX_TRANSFER_SIZE", default="4194304") or 0) or None  # noqa
+    RESTORE_BUFFER_COUNT: Optional[int] = int(os.getenv("BAK_UNZIP_RESTORE_BUFFER_COUNT") or 0) or None  # noqa
+    # If True, stripes are copied from the location of extracted files to the restore
+    #   location by the STRIPE_UPLOAD_PIPELINE_NAME pipeline, in parallel
+    DEPLOY_STRIPE_UPLOAD_PIPELINE: bool = bool(os.getenv("DEPLOY_BAK_UNZIP_STRIPE_UPLOAD_PIPELINE", default="False") == "True")  # noqa
+    STRIPE_UPLOAD_PIPELINE_NAME: str = "BakStripeUpload"
+    # Number of stripes copied concurrently (ForEach batch count, 1-50)
+    STRIPE_UPLOAD_BATCH_COUNT: int = int(os.getenv("BAK_UNZIP_STRIPE_UPLOAD_BATCH_COUNT", default="8"))  # noqa
+    # ADF dataset (parameterised: container, folderPath) and linked service of the restore
+    #   location
+    RESTORE_DATASET: str = "bakrestoreds"
+    RESTORE_LINKED_SERVICE: str = "bakrestorestrg"
+    # Limits of SQL Server (backup devices of a set, MAXTRANSFERSIZE)
+    MAX_RESTORE_STRIPES: int = 64
+    MAX_RESTORE_TRANSFER_SIZE: int = 4 * 1024 * 1024
+
+    @classmethod
+    def restore_config(cls) -> dict[str, Any]:
+        """Restore settings published to the job (spark.secret.managed-instance-restore-config):
+        the restore location, the wildcard and the expected number of stripes, the tuning and
+        the resulting options of the RESTORE statement ('WITH ...').
+        Raises:
+            ValueError: If the wildcard, the number of stripes or the tuning is invalid.
+        """
+        if cls.RESTORE_STRIPE_FILE_PATTERN.count("*") != 1 or "?" in cls.RESTORE_STRIPE_FILE_PATTERN:  # noqa: E501
+            raise ValueError(
+                f"Wildcard of stripes '{cls.RESTORE_STRIPE_FILE_PATTERN}' has to contain "
+                f"exactly one '*' (and no '?')"
+            )
+        if not 0 <= cls.RESTORE_STRIPE_COUNT <= cls.MAX_RESTORE_STRIPES:
+            raise ValueError(
+                f"Number of stripes {cls.RESTORE_STRIPE_COUNT} is outside of the range "
+                f"0-{cls.MAX_RESTORE_STRIPES}"
+            )
+        _options: list[str] = []
+        if cls.RESTORE_MAX_TRANSFER_SIZE is not None:
+            if (
+                    cls.RESTORE_MAX_TRANSFER_SIZE % 65536
+                    or not 0 < cls.RESTORE_MAX_TRANSFER_SIZE <= cls.MAX_RESTORE_TRANSFER_SIZE
+            ):
+                raise ValueError(
+                    f"MAXTRANSFERSIZE {cls.RESTORE_MAX_TRANSFER_SIZE} has to be a multiple of "
+                    f"65536 bytes up to {cls.MAX_RESTORE_TRANSFER_SIZE}"
+                )
+            _options.append(f"MAXTRANSFERSIZE = {cls.RESTORE_MAX_TRANSFER_SIZE}")
+        if cls.RESTORE_BUFFER_COUNT is not None:
+            if cls.RESTORE_BUFFER_COUNT < 1:
+                raise ValueError(f"BUFFERCOUNT has to be positive, not {cls.RESTORE_BUFFER_COUNT}")
+            _options.append(f"BUFFERCOUNT = {cls.RESTORE_BUFFER_COUNT}")
+        return {
+            "storageAccount": cls.RESTORE_STORAGE_ACCOUNT,
+            "container": cls.RESTORE_CONTAINER,
+            "folderPath": cls.RESTORE_FOLDER_PATH,
+            "stripeFilePattern": cls.RESTORE_STRIPE_FILE_PATTERN,
+            "stripeCount": cls.RESTORE_STRIPE_COUNT or None,
+            "maxTransferSize": cls.RESTORE_MAX_TRANSFER_SIZE,
+            "bufferCount": cls.RESTORE_BUFFER_COUNT,
+            "withOptions": ", ".join(_options),
+        }
@@ -0,0 +1,94 @@
+import os
+import dataclasses
+from typing import Optional
+
+from .config_heifer import HeiferClusterConfiguration
+from .config_spark_performance import SparkPerformanceConfig
+
+
+@dataclasses.dataclass(frozen=True)
+class ComputeProfile:
+    """Sizing of the job cluster; each profile has its own ADF linked service."""
+    node_type: str
+    min_number_of_workers: int
+    max_number_of_workers: int
+    # Photon is selected by the runtime (e.g. '16.4.x-photon-scala2.13')
+    cluster_version: str = HeiferClusterConfiguration.CLUSTER_VERSION
+    driver_node_type: Optional[str] = None
+
+
+class ComputeProfilesConfig:
+    """Named compute profiles that pipelines can choose from.
+
+    A pipeline chooses its profile either by COMPUTE_PROFILE of its configuration class
+    (which takes precedence) or in its `pipeline.json`:
+        {"name": "...", "heifer": {"computeProfile": "small"}, "properties": {...}}
+    Activities using the HeiferAdfToCluster linked service are then pointed to the linked
+    service of the profile. Pipelines without a profile keep HeiferAdfToCluster.
+    """
+    # Definitions of profiles
+    #   TODO: This may differ in your logic (node types available in your region, quotas)
+    PROFILES: dict[str, ComputeProfile] = {
+        # Short jobs on small data, scheduled quickly (single worker)
+        "small": ComputeProfile(node_type="Standard_D4as_v5", min_number_of_workers=1,
+                                max_number_of_workers=1),
+        # Wide joins and aggregations (more memory per core)
+        "memory-heavy": ComputeProfile(node_type="Standard_E8as_v5", min_number_of_workers=2,
+                                       max_number_of_workers=8),
+        # SQL-heavy transformations on the Photon engine
+        "photon": ComputeProfile(node_type="Standard_D8as_v5", min_number_of_workers=2,
+                                 max_number_of_workers=8,
+                                 cluster_version=os.getenv("HEIFER_PHOTON_CLUSTER_VERSION", "16.4.x-photon-scala2.13")),  # noqa: E501
+        # Large data volumes (e.g. BAK serialization), scales out widely
+        "large-autoscale": ComputeProfile(node_type="Standard_D8as_v5", min_number_of_workers=2,
+                                          max_number_of_workers=32),
+    }
+    # Profiles whose linked services are provisioned (comma separated, typically empty)
+    ENABLED_PROFILES: list[str] = [_profile for _profile in os.getenv("HEIFER_COMPUTE_PROFILES_COMMA_SEPARATED", default="").split(",") if _profile]  # noqa: E501
+
+    @classmethod
+    def provisioned_profiles(cls) -> list[Optional[str]]:
+        """Profiles having linked services (None, the default job cluster, first).
+        Raises:
+            ValueError: If any enabled profile does not exist.
+        """
+        for _profile in cls.ENABLED_PROFILES:
+            cls.profile(_profile)
+        return [None, *dict.fromkeys(cls.ENABLED_PROFILES)]
+
+    @classmethod
+    def profile(cls, profile: Optional[str]) -> ComputeProfile:
+        """Sizing of the profile (the default job cluster if the profile is None).
+        Raises:
+            ValueError: If the profile does not exist.
+        """
+        if profile is None:
+            return ComputeProfile(
+                node_type=HeiferClusterConfiguration.NODE_TYPE,
+                min_number_of_workers=HeiferClusterConfiguration.MIN_NUMBER_OF_WORKERS,
+                max_number_of_workers=HeiferClusterConfiguration.MAX_NUMBER_OF_WORKERS,
+            )
+        if profile not in cls.PROFILES:
+            raise ValueError(
+                f"Unknown compute profile '{profile}' (available: {', '.join(cls.PROFILES)})"
+            )
+        return cls.PROFILES[profile]
+
+    @staticmethod
+    def linked_service_variant(profile: Optional[str], preset: Optional[str] = None) -> str:
+        """Suffix identifying the linked service of the profile and the Spark preset.
+
+        Linked services with the default Spark performance preset have no preset suffix
+        (see SparkPerformanceConfig), so their names do not change.
+        """
+        _variant = [profile] if profile else []
+        if preset and preset != SparkPerformanceConfig.DEFAULT_PRESET:
+            _variant.append(f"spark-{preset}")
+        return "-".join(_variant)
+
+    @classmethod
+    def linked_service_name(cls, profile: Optional[str], preset: Optional[str] = None) -> str:
+        """Name of the linked service of the profile (and the Spark performance preset)."""
+        if _variant := cls.linked_service_variant(profile, preset):
+            return f"{HeiferClusterConfiguration.LINKED_SERVICE_NAME}-{_variant}"
+        return HeiferClusterConfiguration.LINKED_SERVICE_NAME
@@ -0,0 +1,105 @@
+import os
+import json
+import dataclasses
+from typing import Any, Optional
+
+
+@dataclasses.dataclass(frozen=True)
+class CopyPerformance:
+    """Performance settings of ADF Copy activities; unset (None) settings are kept as they
+    are in the pipeline definition."""
+    # Data integration units (2-256) of the Azure integration runtime
+    data_integration_units: Optional[int] = None
+    # Maximal number of concurrent reads/writes of a single Copy activity
+    parallel_copies: Optional[int] = None
+    # Staged copy (through interim Blob storage given by its linked service and path)
+    enable_staging: Optional[bool] = None
+    staging_linked_service: Optional[str] = None
+    staging_path: Optional[str] = None
+    # Size of blocks written to Blob storage (in MB, 4-100)
+    block_size_mb: Optional[int] = None
+
+    # Names of settings in the JSON configuration (as in ADF)
+    JSON_NAMES = {
+        "dataIntegrationUnits": "data_integration_units",
+        "parallelCopies": "parallel_copies",
+        "enableStaging": "enable_staging",
+        "stagingLinkedService": "staging_linked_service",
+        "stagingPath": "staging_path",
+        "blockSizeInMB": "block_size_mb",
+    }
+
+    def __post_init__(self):
+        if self.data_integration_units is not None and not 2 <= self.data_integration_units <= 256:  # noqa: E501
+            raise ValueError(f"Invalid data integration units: {self.data_integration_units}")
+        if self.parallel_copies is not None and self.parallel_copies < 1:
+            raise ValueError(f"Invalid number of parallel copies: {self.parallel_copies}")
+        if self.block_size_mb is not None and not 4 <= self.block_size_mb <= 100:
+            raise ValueError(f"Invalid block size: {self.block_size_mb} MB")
+
+    @classmethod
+    def from_json(cls, settings: dict[str, Any]) -> "CopyPerformance":
+        """Settings from their JSON form, like {"dataIntegrationUnits": 8}.
+        Raises:
+            ValueError: If any setting is unknown or invalid.
+        """
+        if _unknown := settings.keys() - cls.JSON_NAMES.keys():
+            raise ValueError(f"Unknown copy performance settings: {', '.join(sorted(_unknown))}")
+        return cls(**{cls.JSON_NAMES[_name]: _value for _name, _value in settings.items()})
+
+    def merged(self, other: "CopyPerformance") -> "CopyPerformance":
+        """Settings of this object overridden by the settings set in the other."""
+        return dataclasses.replace(self, **{
+            _field.name: getattr(other, _field.name) for _field in dataclasses.fields(other)
+            if getattr(other, _field.name) is not None
+        })
+
+    def activity_properties(self) -> dict[str, Any]:
+        """Properties of the Copy activity (`typeProperties`) set by these settings; the block
+        size is a property of the sink store settings ('sink.storeSettings.blockSizeInMB').
+        Raises:
+            ValueError: If staged copy is enabled without the staging linked service.
+        """
+        if self.enable_staging and not self.staging_linked_service:
+            raise ValueError("Staged copy requires the linked service of the staging storage")
+        _properties: dict[str, Any] = {
+            "dataIntegrationUnits": self.data_integration_units,
+            "parallelCopies": self.parallel_copies,
+            "enableStaging": self.enable_staging,
+            "stagingSettings": {
+                "linkedServiceName": {
+                    "referenceName": self.staging_linked_service,
+                    "type": "LinkedServiceReference",
+                },
+            } | ({"path": self.staging_path} if self.staging_path else {})
+            if self.staging_linked_service else None,
+            "sink.storeSettings.blockSizeInMB": self.block_size_mb,
+        }
+        return {_name: _value for _name, _value in _properties.items() if _value is not None}
+
+
+def parse_copy_performance(value: Optional[str]) -> dict[str, CopyPerformance]:
+    """Settings of Copy activities of a pipeline from JSON mapping activity -> settings
+    ('*' for all Copy activities of the pipeline), like {"*": {"parallelCopies": 8}}."""
+    return {
+        _activity: CopyPerformance.from_json(_settings)
+        for _activity, _settings in json.loads(value or "{}").items()
+    }
+
+
+class CopyPerformanceConfig:
+    """Copy performance settings of any deployed pipeline (e.g. from pipelines repositories).
+
+    JSON mapping pipeline -> activity -> settings, e.g.:
+        {"MyPipeline": {"*": {"dataIntegrationUnits": 4}, "CopyBig": {"parallelCopies": 16}}}
+    Pipelines with their configuration class (e.g. RioPipelineConfig) are configured there
+    (COPY_PERFORMANCE), which takes precedence. Settings of an activity take precedence over
+    those of '*'. Use `python -m utilities.copy_performance_report` to see effective values.
+    """
+    PIPELINES: dict[str, dict[str, CopyPerformance]] = {
+        _pipeline: {
+            _activity: CopyPerformance.from_json(_settings)
+            for _activity, _settings in _activities.items()
+        }
+        for _pipeline, _activities in json.loads(os.getenv("HEIFER_COPY_PERFORMANCE_JSON") or "{}").items()  # noqa: E501
+    }
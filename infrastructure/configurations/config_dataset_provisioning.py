@@ -1,9 +1,19 @@
 import os
+from typing import Optional
+from .config_copy_performance import CopyPerformance, parse_copy_performance
 
 
 class DatasetProvisioningPipelineConfig:
     DEPLOY_PIPELINE: bool = bool(os.getenv("DEPLOY_DATASET_PROVISIONING_PIPELINE", default="False") == "True")  # noqa
     PIPELINE_NAME: str = "DatasetProvisioning"
+    # Compute profile of the pipeline (see ComputeProfilesConfig), overrides pipeline.json
+    COMPUTE_PROFILE: Optional[str] = os.getenv("DATASET_PROVISIONING_COMPUTE_PROFILE") or None
+    # Spark performance preset of the pipeline (see SparkPerformanceConfig), overrides
+    #   pipeline.json; it has to be the default or one of the extra presets
+    SPARK_PERFORMANCE_PRESET: Optional[str] = os.getenv("DATASET_PROVISIONING_SPARK_PERFORMANCE_PRESET") or None  # noqa: E501
+    # Performance settings of Copy activities of the pipeline, JSON mapping
+    #   activity -> settings ('*' for all), see CopyPerformanceConfig
+    COPY_PERFORMANCE: dict[str, CopyPerformance] = parse_copy_performance(os.getenv("DATASET_PROVISIONING_COPY_PERFORMANCE_JSON"))  # noqa: E501
 
     WORKSPACE_TENANT_ID: str = os.getenv("DATASET_PROVISIONING_TENANT_ID", default="TODO")
     WORKSPACE_CLIENT_ID: str = os.getenv("DATASET_PROVISIONING_WORKSPACE_CLIENT_ID", default="TODO")  # noqa
@@ -1,4 +1,5 @@
 import os
+import json
 from typing import Optional, Any
 import pathlib
 
@@ -46,6 +47,9 @@ class HeiferConfig:
     DATABRICKS_SERVICE_PRINCIPAL_FOR_ADF_APP_UUID: Optional[str] = None if (_HDSPFAAU := os.getenv("HEIFER_DATABRICKS_SERVICE_PRINCIPAL_FOR_ADF_APP_UUID", "None")) == "None" else _HDSPFAAU  # noqa: E501
     # Azure Data Factory name
     AZURE_DATA_FACTORY_NAME: str = os.getenv("HEIFER_AZURE_DATA_FACTORY_NAME")
+    # Regions (besides AZURE_LOCATION) whose Databricks control plane IP ranges are routed
+    #   (see DATABRICKS_UDR_IP_MAP); comma separated, typically empty.
+    UDR_EXTRA_REGIONS: list[str] = [_region for _region in os.getenv("HEIFER_UDR_EXTRA_REGIONS_COMMA_SEPARATED", default="").split(",") if _region]  # noqa: E501
     # Name of the main Heifers virtual network
     VIRTUAL_NETWORK_NAME: str = os.getenv("HEIFER_VIRTUAL_NETWORK_NAME")
     # Network address prefix for virtual network (must differs from others)
@@ -57,6 +61,12 @@ class HeiferConfig:
         "databricks_host_subnet": f"{os.getenv('HEIFER_VIRTUAL_NETWORK_ADDRESS_SPACE_PREFIX')}.1.0/24",  # noqa: E501
         "databricks_container_subnet": f"{os.getenv('HEIFER_VIRTUAL_NETWORK_ADDRESS_SPACE_PREFIX')}.2.0/24",  # noqa: E501
     }
+    # Ceiling (in seconds) for waiting till the Databricks workspace is ready (provisioned and
+    #   its API reachable); the state is polled with exponential backoff between the initial
+    #   and the maximal delay.
+    WORKSPACE_READINESS_TIMEOUT_SECONDS: float = float(os.getenv("HEIFER_WORKSPACE_READINESS_TIMEOUT_SECONDS", default="900"))  # noqa: E501
+    WORKSPACE_READINESS_INITIAL_DELAY_SECONDS: float = float(os.getenv("HEIFER_WORKSPACE_READINESS_INITIAL_DELAY_SECONDS", default="5"))  # noqa: E501
+    WORKSPACE_READINESS_MAX_DELAY_SECONDS: float = float(os.getenv("HEIFER_WORKSPACE_READINESS_MAX_DELAY_SECONDS", default="60"))  # noqa: E501
     # Path to directory with pipelines from inside Docker (DO NOT CHANGE UNLESS YOU KNOW)
     #   Note: this is relevant only if the docker compose logic is not used.
     PATH_TO_PIPELINES: pathlib.Path = pathlib.Path(os.getenv("HEIFER_PATH_TO_PIPELINES", default=r"../../pipelines"))
@@ -67,6 +77,68 @@ class HeiferConfig:
     # TODO: Set to False on the first round, add your IP exception to the Storage Account Firewall
     #  rules before running. Also, check if the content of files is not empty (like __init__.py)
     UPLOAD_LIBRARIES: bool = bool(os.getenv("HEIFER_UPLOAD_LIBRARIES", default="False") == "True")
+    # Container (layer) where libraries (artifacts content) are uploaded
+    #   Note: each unique file is stored once under 'sha256/<DIGEST>/<FILE_NAME>' path
+    LIBRARIES_CONTAINER: str = "libraries"
+    # Keep artifacts also at their former paths '<PIPELINE>/<FILE_NAME>' (for consumers outside
+    #   HeifER); these blobs are retained (not deleted) once this is switched off
+    ARTIFACT_LEGACY_PATHS: bool = bool(os.getenv("HEIFER_ARTIFACT_LEGACY_PATHS", default="True") == "True")  # noqa: E501
+    # Registry of variables (placeholders) substituted in each pipeline definition (pipeline.json)
+    #   TODO: This may differ in your logic
+    PIPELINE_TEMPLATE_VARIABLES: dict[str, str] = {
+        "__CONTAINER_NAME__": LIBRARIES_CONTAINER,
+        "__STORAGE_ACCOUNT_NAME__": STORAGE_ACCOUNT_NAME,
+    }
+    # Cache of parsed pipeline definitions (keyed by file hash and values of variables)
+    PIPELINE_CACHE_PATH: pathlib.Path = pathlib.Path(os.getenv("HEIFER_PIPELINE_CACHE_PATH", default=r".heifer/pipeline-cache"))  # noqa: E501
+    # Number of workers reading and parsing pipeline definitions
+    PIPELINE_LOADER_MAX_WORKERS: int = int(os.getenv("HEIFER_PIPELINE_LOADER_MAX_WORKERS", default="8"))  # noqa: E501
+    # Hashes of pipelines (and artifacts) deployed by the fast pipelines deployment, per stack
+    #   (see utilities.pipeline_fast_deploy)
+    PIPELINE_DEPLOY_MANIFEST_PATH: pathlib.Path = pathlib.Path(os.getenv("HEIFER_PIPELINE_DEPLOY_MANIFEST_PATH", default=r".heifer/deployed-pipelines.json"))  # noqa: E501
+    # Maximal number of concurrent operations of the fast pipelines deployment
+    PIPELINE_DEPLOY_PARALLEL: int = int(os.getenv("HEIFER_PIPELINE_DEPLOY_PARALLEL", default="10"))  # noqa: E501
+    # Fingerprints of the whole program deployed last time, per stack
+    #   (see utilities.deployment_fingerprint)
+    DEPLOYMENT_FINGERPRINT_PATH: pathlib.Path = pathlib.Path(os.getenv("HEIFER_DEPLOYMENT_FINGERPRINT_PATH", default=r".heifer/deployment-fingerprints.json"))  # noqa: E501
+    # Maximal number of concurrent operations of the engine (`--parallel`) in deployments made
+    #   by utilities.deployment_timing (default of the engine if not set)
+    DEPLOY_PARALLEL: Optional[int] = int(os.getenv("HEIFER_DEPLOY_PARALLEL")) if os.getenv("HEIFER_DEPLOY_PARALLEL") else None  # noqa: E501
+    # Timings of resource operations of previous deployments, per stack
+    #   (see utilities.deployment_timing)
+    DEPLOYMENT_TIMING_HISTORY_PATH: pathlib.Path = pathlib.Path(os.getenv("HEIFER_DEPLOYMENT_TIMING_HISTORY_PATH", default=r".heifer/deployment-timings.json"))  # noqa: E501
+    # Validate references of pipelines (linked services, datasets, pipelines, parameters and
+    #   artifacts) before any resource is deployed (see utilities.pipeline_validator)
+    VALIDATE_PIPELINES: bool = bool(os.getenv("HEIFER_VALIDATE_PIPELINES", default="True") == "True")  # noqa: E501
+    # Names of linked services, datasets and pipelines managed outside HeifER (created in the
+    #   data factory by other means) that pipelines may refer to
+    PIPELINE_EXTERNAL_REFERENCES: set[str] = {_name for _name in os.getenv("HEIFER_PIPELINE_EXTERNAL_REFERENCES_COMMA_SEPARATED", default="").split(",") if _name}  # noqa: E501
+    # Local manifest with hashes, sizes and modification times of artifacts (unchanged files
+    #   are not re-read to compute their content addresses).
+    ARTIFACT_MANIFEST_PATH: pathlib.Path = pathlib.Path(os.getenv("HEIFER_ARTIFACT_MANIFEST_PATH", default=r".heifer/artifact-manifest.json"))  # noqa: E501
+    # How are libraries uploaded, either:
+    #   "PULUMI": each unique file is a Blob resource managed by Pulumi (whole-file upload), or
+    #   "STAGED": files are uploaded as concurrently staged blocks (see utilities.block_uploader)
+    #     during the deployment (or before it using `python -m utilities.block_uploader`),
+    #     Pulumi only records the resulting blob URLs and hashes.
+    ARTIFACT_UPLOAD_MODE: str = os.getenv("HEIFER_ARTIFACT_UPLOAD_MODE", default="PULUMI")
+    # Size of one block (in MB) and maximal number of concurrently uploaded blocks (STAGED mode)
+    ARTIFACT_UPLOAD_BLOCK_SIZE_MB: int = int(os.getenv("HEIFER_ARTIFACT_UPLOAD_BLOCK_SIZE_MB", default="8"))  # noqa: E501
+    ARTIFACT_UPLOAD_MAX_CONCURRENCY: int = int(os.getenv("HEIFER_ARTIFACT_UPLOAD_MAX_CONCURRENCY", default="8"))  # noqa: E501
+    # How many times is a single block retried before the upload fails (STAGED mode)
+    ARTIFACT_UPLOAD_MAX_RETRIES: int = int(os.getenv("HEIFER_ARTIFACT_UPLOAD_MAX_RETRIES", default="5"))  # noqa: E501
+    # Optional connection string for the STAGED upload (e.g. Azurite for local testing),
+    #   if not set, Azure AD credentials (az login) are used.
+    ARTIFACT_STORAGE_CONNECTION_STRING: Optional[str] = os.getenv("HEIFER_ARTIFACT_STORAGE_CONNECTION_STRING")  # noqa: E501
+    # Deployment stages managed by this stack (comma separated, in order of dependencies):
+    #   storage, network, workspace, adf, pipelines (all by default).
+    #   For fast iteration on pipelines, use a separate stack with only the 'pipelines' stage
+    #   (and UPSTREAM_STACK set); it refreshes and diffs only artifacts and ADF pipelines.
+    #   Warning: do not remove stages from an existing stack (their resources would be deleted)
+    DEPLOY_STAGES: list[str] = [_stage for _stage in os.getenv("HEIFER_DEPLOY_STAGES_COMMA_SEPARATED", default="storage,network,workspace,adf,pipelines").split(",") if _stage]  # noqa: E501
+    # Fully qualified name (ORGANIZATION/PROJECT/STACK) of the stack with stages not deployed
+    #   by this stack; their outputs are read from its stack reference.
+    UPSTREAM_STACK: Optional[str] = os.getenv("HEIFER_UPSTREAM_STACK")
 
 
 class HeiferClusterConfiguration:
@@ -84,8 +156,46 @@ https://www.pulumi.com/registry/packages/azure/api-docs/datafactory/linkedservic
     # pulumi_databricks.get_node_type(category='General Purpose', min_memory_gb=16, min_cores=4,
     #                                 photon_driver_capable=True, photon_worker_capable=True)
     NODE_TYPE: str = os.getenv("HEIFER_NODE_TYPE", "Standard_D4as_v5")
+    # Name of the linked service (ADF -> Databricks job cluster) used by pipeline definitions
+    LINKED_SERVICE_NAME: str = "HeiferAdfToCluster"
     # Location for storing cluster's logs (must be in DBFS)
     LOG_DESTINATION: Optional[str] = "dbfs:/logs"
+    # Instance pool keeping warm (idle) VMs for job clusters, so that runs do not wait for cold
+    #   VMs; pipelines listed in INSTANCE_POOL_PIPELINES run their clusters in the pool.
+    INSTANCE_POOL_ENABLED: bool = bool(os.getenv("HEIFER_INSTANCE_POOL_ENABLED", default="False") == "True")  # noqa: E501
+    INSTANCE_POOL_NAME: str = os.getenv("HEIFER_INSTANCE_POOL_NAME", "heifer-instance-pool")
+    # Number of idle instances kept in the pool and maximal number of instances (driver included)
+    INSTANCE_POOL_MIN_IDLE_INSTANCES: int = int(os.getenv("HEIFER_INSTANCE_POOL_MIN_IDLE_INSTANCES", "1"))  # noqa: E501
+    INSTANCE_POOL_MAX_CAPACITY: int = int(os.getenv("HEIFER_INSTANCE_POOL_MAX_CAPACITY", "16"))
+    # Minutes after which instances above the minimal idle ones are terminated
+    INSTANCE_POOL_IDLE_AUTOTERMINATION_MINUTES: int = int(os.getenv("HEIFER_INSTANCE_POOL_IDLE_AUTOTERMINATION_MINUTES", "30"))  # noqa: E501
+    INSTANCE_POOL_NODE_TYPE: str = os.getenv("HEIFER_INSTANCE_POOL_NODE_TYPE", NODE_TYPE)
+    # Spark version preloaded on idle instances (should match CLUSTER_VERSION)
+    INSTANCE_POOL_PRELOADED_SPARK_VERSION: str = os.getenv("HEIFER_INSTANCE_POOL_PRELOADED_SPARK_VERSION", CLUSTER_VERSION)  # noqa: E501
+    # Name of the linked service running clusters in the pool
+    INSTANCE_POOL_LINKED_SERVICE_NAME: str = "HeiferAdfToPool"
+    # Pipelines whose Databricks activities run in the pool (comma separated, '*' for all)
+    INSTANCE_POOL_PIPELINES: list[str] = [_pipeline for _pipeline in os.getenv("HEIFER_INSTANCE_POOL_PIPELINES_COMMA_SEPARATED", default="").split(",") if _pipeline]  # noqa: E501
+    # Long-lived (all-purpose) cluster shared by latency-sensitive pipelines, so that their runs
+    #   do not wait for a new cluster; kept warm in business hours by a scheduled job and
+    #   terminated when idle (the autotermination has to be longer than the keep-warm interval).
+    SHARED_CLUSTER_ENABLED: bool = bool(os.getenv("HEIFER_SHARED_CLUSTER_ENABLED", default="False") == "True")  # noqa: E501
+    SHARED_CLUSTER_NAME: str = os.getenv("HEIFER_SHARED_CLUSTER_NAME", "heifer-shared-cluster")
+    SHARED_CLUSTER_MIN_NUMBER_OF_WORKERS: int = int(os.getenv("HEIFER_SHARED_CLUSTER_MIN_NUMBER_OF_WORKERS", str(MIN_NUMBER_OF_WORKERS)))  # noqa: E501
+    SHARED_CLUSTER_MAX_NUMBER_OF_WORKERS: int = int(os.getenv("HEIFER_SHARED_CLUSTER_MAX_NUMBER_OF_WORKERS", str(MAX_NUMBER_OF_WORKERS)))  # noqa: E501
+    SHARED_CLUSTER_NODE_TYPE: str = os.getenv("HEIFER_SHARED_CLUSTER_NODE_TYPE", NODE_TYPE)
+    SHARED_CLUSTER_AUTOTERMINATION_MINUTES: int = int(os.getenv("HEIFER_SHARED_CLUSTER_AUTOTERMINATION_MINUTES", "30"))  # noqa: E501
+    # Schedule (Quartz cron) of the keep-warm job (every 15 minutes in business hours) and its
+    #   time zone (Java time zone ID); an empty schedule switches the keep-warm job off
+    SHARED_CLUSTER_KEEP_WARM_SCHEDULE: str = os.getenv("HEIFER_SHARED_CLUSTER_KEEP_WARM_SCHEDULE", "0 0/15 7-18 ? * MON-FRI")  # noqa: E501
+    SHARED_CLUSTER_KEEP_WARM_TIMEZONE: str = os.getenv("HEIFER_SHARED_CLUSTER_KEEP_WARM_TIMEZONE", "Europe/London")  # noqa: E501
+    # Notebook run by the keep-warm job (in the workspace)
+    SHARED_CLUSTER_KEEP_WARM_NOTEBOOK_PATH: str = "/Shared/heifer/keep-warm"
+    # Name of the linked service running activities on the shared cluster
+    SHARED_CLUSTER_LINKED_SERVICE_NAME: str = "HeiferAdfToSharedCluster"
+    # Latency-sensitive pipelines running on the shared cluster (comma separated, '*' for all);
+    #   pipelines can flag themselves by "heifer": {"latencySensitive": true} as well
+    SHARED_CLUSTER_PIPELINES: list[str] = [_pipeline for _pipeline in os.getenv("HEIFER_SHARED_CLUSTER_PIPELINES_COMMA_SEPARATED", default="").split(",") if _pipeline]  # noqa: E501
     # Secrets definition for Spark cluster, follows the logic:
     #   https://learn.microsoft.com/en-us/azure/databricks/security/secrets/secrets
     #   ones listed here are merged with system ones later (in cluster definition)
@@ -94,8 +204,8 @@ https://www.pulumi.com/registry/packages/azure/api-docs/datafactory/linkedservic
         "spark.secret.workspace-tenant-id": DatasetProvisioningPipelineConfig.WORKSPACE_TENANT_ID,
         "spark.secret.workspace-app-id": DatasetProvisioningPipelineConfig.WORKSPACE_CLIENT_ID,
         "spark.secret.workspace-app-secret": DatasetProvisioningPipelineConfig.WORKSPACE_CLIENT_SECRET,  # noqa: E501
-        # B) MANDATORY: Enable change data feed
-        "spark.databricks.delta.properties.defaults.enableChangeDataFeed": True,
+        # B) MANDATORY: Change data feed is enabled by every Spark performance preset
+        #   (performance options are in SparkPerformanceConfig, config_spark_performance)
         # TODO: C) MANDATORY- Configuration of the SQL Server Connection
         "spark.secret.rio-database-fqdn": RioPipelineConfig.SQL_FQDN,  # noqa: E501
         "spark.secret.rio-database-trust-server-certificate": RioPipelineConfig.SQL_STRUST_SERVER_CERTIFICATE,  # noqa: E501
@@ -108,6 +218,11 @@ https://www.pulumi.com/registry/packages/azure/api-docs/datafactory/linkedservic
         "spark.secret.rio-app-registration-client-id": RioPipelineConfig.SQL_CLIENT_ID,
         "spark.secret.rio-app-registration-client-secret": RioPipelineConfig.SQL_CLIENT_SECRET,
         "spark.secret.rio-app-registration-tenant-id": RioPipelineConfig.SQL_TENANT_ID,
+        # Parallel JDBC extraction (JSON, see RioPipelineConfig.extraction_config)
+        "spark.secret.rio-extraction-specs": json.dumps(RioPipelineConfig.extraction_config()),
+        # Incremental ingestion (JSON, see RioPipelineConfig.incremental_config); the location
+        #   of the state table (spark.secret.rio-state-table-location) is added by the ADF stage
+        "spark.secret.rio-incremental-specs": json.dumps(RioPipelineConfig.incremental_config()),
         # TODO: D) OPTIONAL- Only important if bak unloading is requested.
         "spark.secret.landing-zip-storage-account": BakUnzipPipelineConfig.LANDING_ZIP_STORAGE_ACCOUNT,  # noqa: E501
         "spark.secret.landing-zip-storage-container": BakUnzipPipelineConfig.LANDING_ZIP_CONTAINER,  # noqa: E501
@@ -128,8 +243,11 @@ https://www.pulumi.com/registry/packages/azure/api-docs/datafactory/linkedservic
         "spark.secret.managed-instance-app-tenant": BakUnzipPipelineConfig.SQL_MI_APP_TENANT,  # noqa: E501
         "spark.secret.managed-instance-app-client-id": BakUnzipPipelineConfig.SQL_MI_APP_CLIENT_ID,  # noqa: E501
         "spark.secret.managed-instance-app-client-secret": BakUnzipPipelineConfig.SQL_MI_APP_CLIENT_SECRET,  # noqa: E501
+        # Striped restore (JSON, see BakUnzipPipelineConfig.restore_config)
+        "spark.secret.managed-instance-restore-config": json.dumps(BakUnzipPipelineConfig.restore_config()),  # noqa: E501
         
         "spark.secret.serialization-temp-account-name": HeiferConfig.STORAGE_ACCOUNT_NAME,  # noqa: E501
         "spark.secret.serialization-temp-account-container": BakSerializationDistributionConfig.TEMP_ACCOUNT_CONTAINER,  # noqa: E501
-        "spark.secret.serialization-destination-urls": BakSerializationDistributionConfig.TARGET_STORAGE_ACCOUNTS_URLS,  # noqa: E501
+        "spark.secret.serialization-destination-urls": BakSerializationDistributionConfig.SPARK_DESTINATION_URLS,  # noqa: E501
+        "spark.secret.serialization-distribution-mode": BakSerializationDistributionConfig.DISTRIBUTION_MODE,  # noqa: E501
     }
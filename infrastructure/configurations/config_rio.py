@@ -1,10 +1,201 @@
 import os
+import json
+import dataclasses
+from typing import Any, Optional, Union
+from .config_copy_performance import CopyPerformance, parse_copy_performance
+
+
+@dataclasses.dataclass(frozen=True)
+class JdbcExtractionSpec:
+    """Parallel (partitioned) JDBC extraction of a table by the Rio job; unset (None) settings
+    are taken from the '*' spec or from the defaults of RioPipelineConfig."""
+    # Column (numeric, date or timestamp) splitting the table into ranges read concurrently
+    partition_column: Optional[str] = None
+    # Bounds of the partition column (only define the stride of ranges, no rows are filtered);
+    #   if not set, the job discovers them (SELECT MIN(column), MAX(column)) before reading
+    lower_bound: Optional[Union[int, str]] = None
+    upper_bound: Optional[Union[int, str]] = None
+    # Number of ranges (Spark partitions) of the table
+    num_partitions: Optional[int] = None
+    # Number of rows fetched per round trip
+    fetch_size: Optional[int] = None
+    # Maximal number of concurrent connections reading the table
+    max_connections: Optional[int] = None
+
+    # Names of settings in the JSON configuration (as options of the Spark JDBC reader)
+    JSON_NAMES = {
+        "partitionColumn": "partition_column",
+        "lowerBound": "lower_bound",
+        "upperBound": "upper_bound",
+        "numPartitions": "num_partitions",
+        "fetchsize": "fetch_size",
+        "maxConnections": "max_connections",
+    }
+
+    def __post_init__(self):
+        for _name in ("num_partitions", "fetch_size", "max_connections"):
+            if getattr(self, _name) is not None and getattr(self, _name) < 1:
+                raise ValueError(f"Invalid {_name.replace('_', ' ')}: {getattr(self, _name)}")
+        if (self.lower_bound is None) != (self.upper_bound is None):
+            raise ValueError("Set both bounds of the partition column (or none to discover them)")
+        if self.lower_bound is not None and not self.lower_bound < self.upper_bound:
+            raise ValueError(
+                f"Lower bound {self.lower_bound} is not below upper bound {self.upper_bound}"
+            )
+
+    @classmethod
+    def from_json(cls, settings: dict[str, Any]) -> "JdbcExtractionSpec":
+        """Settings from their JSON form, like {"partitionColumn": "Id", "numPartitions": 16}.
+        Raises:
+            ValueError: If any setting is unknown or invalid.
+        """
+        if _unknown := settings.keys() - cls.JSON_NAMES.keys():
+            raise ValueError(f"Unknown extraction settings: {', '.join(sorted(_unknown))}")
+        return cls(**{cls.JSON_NAMES[_name]: _value for _name, _value in settings.items()})
+
+    def merged(self, other: "JdbcExtractionSpec") -> "JdbcExtractionSpec":
+        """Settings of this object overridden by the settings set in the other."""
+        return dataclasses.replace(self, **{
+            _field.name: getattr(other, _field.name) for _field in dataclasses.fields(other)
+            if getattr(other, _field.name) is not None
+        })
+
+    def published(self, max_connections: int) -> dict[str, Any]:
+        """Effective settings (JSON) of a table as consumed by the Rio job.
+
+        Spark opens a connection per partition, so partitions are coalesced to the allowed
+        connections ('numPartitions' is the number of concurrent connections as well).
+        Args:
+            max_connections: Connections of all tables read at once (a table cannot use more).
+        Raises:
+            ValueError: If the table is partitioned without the partition column, or it could
+                use more connections than allowed overall.
+        """
+        _num_partitions = self.num_partitions or 1
+        if _num_partitions > 1 and not self.partition_column:
+            raise ValueError(f"{_num_partitions} partitions require the partition column")
+        _connections = min(_num_partitions, self.max_connections or _num_partitions)
+        if _connections > max_connections:
+            raise ValueError(
+                f"{_connections} connections exceed the overall maximum of {max_connections}"
+            )
+        if _connections == 1:
+            # Read over a single connection (no ranges)
+            return {
+                "partitionColumn": None, "bounds": None, "lowerBound": None, "upperBound": None,
+                "numPartitions": 1, "fetchsize": self.fetch_size,
+            }
+        return {
+            "partitionColumn": self.partition_column,
+            "bounds": "FIXED" if self.lower_bound is not None else "DISCOVER",
+            "lowerBound": self.lower_bound,
+            "upperBound": self.upper_bound,
+            "numPartitions": _connections,
+            "fetchsize": self.fetch_size,
+        }
+
+
+@dataclasses.dataclass(frozen=True)
+class IncrementalLoadSpec:
+    """Incremental ingestion of a table by the Rio job, one of the modes:
+        "FULL": the table is extracted (and overwritten) on every run,
+        "WATERMARK": only rows with the watermark column (rowversion, `modified_at`) above
+            the high-watermark of the previous run are extracted and merged by key columns,
+        "CDC": changes captured by SQL Server CDC (its capture instance) since the LSN of the
+            previous run are extracted and merged by key columns (deletes included).
+    High-watermarks and LSNs are kept in the state table (see RioPipelineConfig).
+    """
+    mode: Optional[str] = None
+    watermark_column: Optional[str] = None
+    key_columns: Optional[tuple[str, ...]] = None
+    # CDC capture instance (by default '<SCHEMA>_<TABLE>', as created by SQL Server)
+    capture_instance: Optional[str] = None
+
+    MODES = ("FULL", "WATERMARK", "CDC")
+    # Names of settings in the JSON configuration
+    JSON_NAMES = {
+        "mode": "mode",
+        "watermarkColumn": "watermark_column",
+        "keyColumns": "key_columns",
+        "captureInstance": "capture_instance",
+    }
+
+    def __post_init__(self):
+        if self.mode is not None and self.mode not in self.MODES:
+            raise ValueError(f"Unknown mode '{self.mode}' (use {', '.join(self.MODES)})")
+        if self.key_columns is not None:
+            # JSON lists are kept as tuples (hashable, frozen)
+            object.__setattr__(self, "key_columns", tuple(self.key_columns))
+
+    @classmethod
+    def from_json(cls, settings: dict[str, Any]) -> "IncrementalLoadSpec":
+        """Settings from their JSON form, like {"mode": "CDC", "keyColumns": ["Id"]}.
+        Raises:
+            ValueError: If any setting is unknown or invalid.
+        """
+        if _unknown := settings.keys() - cls.JSON_NAMES.keys():
+            raise ValueError(f"Unknown incremental settings: {', '.join(sorted(_unknown))}")
+        return cls(**{cls.JSON_NAMES[_name]: _value for _name, _value in settings.items()})
+
+    def merged(self, other: "IncrementalLoadSpec") -> "IncrementalLoadSpec":
+        """Settings of this object overridden by the settings set in the other."""
+        return dataclasses.replace(self, **{
+            _field.name: getattr(other, _field.name) for _field in dataclasses.fields(other)
+            if getattr(other, _field.name) is not None
+        })
+
+    def published(self, table: str) -> dict[str, Any]:
+        """Effective settings (JSON) of the table as consumed by the Rio job.
+        Raises:
+            ValueError: If settings required by the mode are missing.
+        """
+        _mode = self.mode or "FULL"
+        if _mode != "FULL" and not self.key_columns:
+            raise ValueError(f"Mode {_mode} requires key columns (to merge changed rows)")
+        if _mode == "WATERMARK" and not self.watermark_column:
+            raise ValueError("Mode WATERMARK requires the watermark column")
+        return {
+            "mode": _mode,
+            "watermarkColumn": self.watermark_column if _mode == "WATERMARK" else None,
+            "keyColumns": list(self.key_columns or ()) if _mode != "FULL" else None,
+            "captureInstance": (
+                self.capture_instance or table.replace(".", "_")
+            ) if _mode == "CDC" else None,
+        }
+
+
+def parse_incremental_specs(value: Optional[str]) -> dict[str, IncrementalLoadSpec]:
+    """Incremental specs from JSON mapping table -> settings ('*' for all tables), like
+    {"*": {"mode": "FULL"}, "dbo.FactVisit": {"mode": "WATERMARK", "watermarkColumn":
+    "RowVersion", "keyColumns": ["VisitId"]}}."""
+    return {
+        _table: IncrementalLoadSpec.from_json(_settings)
+        for _table, _settings in json.loads(value or "{}").items()
+    }
+
+
+def parse_extraction_specs(value: Optional[str]) -> dict[str, JdbcExtractionSpec]:
+    """Extraction specs from JSON mapping table -> settings ('*' for all tables), like
+    {"*": {"fetchsize": 10000}, "dbo.FactVisit": {"partitionColumn": "VisitId",
+    "numPartitions": 16}}."""
+    return {
+        _table: JdbcExtractionSpec.from_json(_settings)
+        for _table, _settings in json.loads(value or "{}").items()
+    }
 
 
 class RioPipelineConfig:
     # If True, the pipeline for unzipping zipped files is deployed
     DEPLOY_PIPELINE: bool = bool(os.getenv("DEPLOY_RIO_PIPELINE", default="False") == "True")
     PIPELINE_NAME: str = "RioPipeline"
+    # Compute profile of the pipeline (see ComputeProfilesConfig), overrides pipeline.json
+    COMPUTE_PROFILE: Optional[str] = os.getenv("RIO_COMPUTE_PROFILE") or None
+    # Spark performance preset of the pipeline (see SparkPerformanceConfig), overrides
+    #   pipeline.json; it has to be the default or one of the extra presets
+    SPARK_PERFORMANCE_PRESET: Optional[str] = os.getenv("RIO_SPARK_PERFORMANCE_PRESET") or None
+    # Performance settings of Copy activities of the pipeline, JSON mapping
+    #   activity -> settings ('*' for all), see CopyPerformanceConfig
+    COPY_PERFORMANCE: dict[str, CopyPerformance] = parse_copy_performance(os.getenv("RIO_COPY_PERFORMANCE_JSON"))  # noqa: E501
     # The following is either to use Username and Password: "SERVER_AUTHENTICATION" option;
     #   or to use App registration Client ID, Secret and Tenant ID: "APP_REGISTRATION" option.
     SQL_AUTHENTICATION_METHOD: str = os.getenv("RIO_SQL_AUTHENTICATION_METHOD",
@@ -20,3 +211,79 @@ class RioPipelineConfig:
     SQL_TENANT_ID = os.getenv("RIO_SQL_TENANT_ID", default="TODO")
     # Either "True" or "False" string
     SQL_STRUST_SERVER_CERTIFICATE: str = os.getenv("RIO_TRUST_SERVER_CERTIFICATE", default="False")
+    # Parallel JDBC extraction: specs of tables, JSON mapping table -> settings ('*' for all
+    #   tables), see JdbcExtractionSpec; tables without a spec are read over one connection
+    EXTRACTION_SPECS: dict[str, JdbcExtractionSpec] = parse_extraction_specs(os.getenv("RIO_EXTRACTION_SPECS_JSON"))  # noqa: E501
+    # Rows fetched per round trip (the default of the SQL Server driver fetches all at once)
+    EXTRACTION_FETCH_SIZE: int = int(os.getenv("RIO_EXTRACTION_FETCH_SIZE", default="10000"))
+    # Maximal number of concurrent connections per table and of all tables read at once
+    EXTRACTION_MAX_CONNECTIONS_PER_TABLE: int = int(os.getenv("RIO_EXTRACTION_MAX_CONNECTIONS_PER_TABLE", default="8"))  # noqa: E501
+    EXTRACTION_MAX_CONNECTIONS: int = int(os.getenv("RIO_EXTRACTION_MAX_CONNECTIONS", default="16"))  # noqa: E501
+
+    # Incremental ingestion: specs of tables, JSON mapping table -> settings ('*' for all
+    #   tables), see IncrementalLoadSpec; tables without a spec are extracted fully
+    INCREMENTAL_SPECS: dict[str, IncrementalLoadSpec] = parse_incremental_specs(os.getenv("RIO_INCREMENTAL_SPECS_JSON"))  # noqa: E501
+    # State (Delta) table with high-watermarks and LSNs of tables, in the HeifER storage
+    #   account; created by a bootstrap job during the deployment of the pipeline
+    STATE_TABLE_CONTAINER: str = os.getenv("RIO_STATE_TABLE_CONTAINER", default="silver")
+    STATE_TABLE_PATH: str = os.getenv("RIO_STATE_TABLE_PATH", default="_heifer/rio/state")
+    STATE_TABLE_BOOTSTRAP: bool = bool(os.getenv("RIO_STATE_TABLE_BOOTSTRAP", default="True") == "True")  # noqa: E501
+    # Notebook (in the workspace) creating the state table
+    STATE_TABLE_BOOTSTRAP_NOTEBOOK_PATH: str = "/Shared/heifer/rio-state-bootstrap"
+
+    @classmethod
+    def state_table_location(cls, storage_account: str) -> str:
+        """Location (ABFSS URL) of the state table in the storage account."""
+        return (
+            f"abfss://{cls.STATE_TABLE_CONTAINER}@{storage_account}.dfs.core.windows.net/"
+            f"{cls.STATE_TABLE_PATH.strip('/')}"
+        )
+
+    @classmethod
+    def incremental_config(cls) -> dict[str, Any]:
+        """Incremental settings published to the Rio job (spark.secret.rio-incremental-specs):
+        the defaults ('*') and the effective settings of each table with a spec.
+        Raises:
+            ValueError: If a spec is invalid (see `IncrementalLoadSpec.published`).
+        """
+        _defaults = IncrementalLoadSpec(mode="FULL").merged(
+            cls.INCREMENTAL_SPECS.get("*", IncrementalLoadSpec())
+        )
+        _published: dict[str, dict[str, Any]] = {}
+        # Defaults already include the '*' spec
+        for _table, _spec in (cls.INCREMENTAL_SPECS | {"*": IncrementalLoadSpec()}).items():
+            try:
+                _published[_table] = _defaults.merged(_spec).published(_table)
+            except ValueError as _error:
+                raise ValueError(f"Invalid incremental spec of table '{_table}': {_error}")
+        _defaults_published = _published.pop("*")
+        # Capture instances are named after tables
+        _defaults_published["captureInstance"] = None
+        return {"defaults": _defaults_published, "tables": _published}
+
+    @classmethod
+    def extraction_config(cls) -> dict[str, Any]:
+        """Extraction settings published to the Rio job (spark.secret.rio-extraction-specs):
+        the overall maximum of connections, the defaults ('*') and the effective settings of
+        each table with a spec.
+        Raises:
+            ValueError: If a spec is invalid (see `JdbcExtractionSpec.published`).
+        """
+        _defaults = JdbcExtractionSpec(
+            fetch_size=cls.EXTRACTION_FETCH_SIZE,
+            max_connections=cls.EXTRACTION_MAX_CONNECTIONS_PER_TABLE,
+        ).merged(cls.EXTRACTION_SPECS.get("*", JdbcExtractionSpec()))
+        _published: dict[str, dict[str, Any]] = {}
+        # Defaults already include the '*' spec
+        for _table, _spec in (cls.EXTRACTION_SPECS | {"*": JdbcExtractionSpec()}).items():
+            try:
+                _published[_table] = _defaults.merged(_spec).published(
+                    cls.EXTRACTION_MAX_CONNECTIONS
+                )
+            except ValueError as _error:
+                raise ValueError(f"Invalid extraction spec of table '{_table}': {_error}")
+        return {
+            "maxConnections": cls.EXTRACTION_MAX_CONNECTIONS,
+            "defaults": _published.pop("*"),
+            "tables": _published,
+        }
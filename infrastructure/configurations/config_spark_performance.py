@@ -0,0 +1,113 @@
+import os
+import dataclasses
+from typing import Any, Optional, Union
+
+
+@dataclasses.dataclass(frozen=True)
+class SparkPerformancePreset:
+    """Typed set of Spark tuning options; unset (None) options keep the Databricks defaults.
+    Note:
+        Photon is not a Spark option, it is chosen by the runtime (see the 'photon' compute
+        profile in ComputeProfilesConfig).
+    """
+    # Adaptive query execution (re-optimisation of plans at runtime)
+    adaptive_query_execution: Optional[bool] = None
+    # Splitting of skewed partitions in sort-merge joins (requires AQE)
+    skew_join: Optional[bool] = None
+    # Number of shuffle partitions, or "auto" (sized by AQE)
+    shuffle_partitions: Optional[Union[int, str]] = None
+    # Target size of shuffle partitions after AQE coalescing (in MB)
+    advisory_partition_size_mb: Optional[int] = None
+    # Delta: bin-packing of written files and compaction of small files after writes
+    delta_optimized_writes: Optional[bool] = None
+    delta_auto_compaction: Optional[bool] = None
+    # Databricks disk cache (local SSD copies of remote Parquet/Delta data)
+    disk_cache: Optional[bool] = None
+    # Delta: change data feed of new tables (required by HeifER's layers)
+    change_data_feed: bool = True
+
+    def __post_init__(self):
+        if self.skew_join and self.adaptive_query_execution is False:
+            raise ValueError("Skew join handling requires adaptive query execution")
+        if self.shuffle_partitions is not None and self.shuffle_partitions != "auto" and (
+                not isinstance(self.shuffle_partitions, int) or self.shuffle_partitions < 1
+        ):
+            raise ValueError(f"Invalid number of shuffle partitions: {self.shuffle_partitions}")
+        if self.advisory_partition_size_mb is not None and self.advisory_partition_size_mb < 1:
+            raise ValueError(
+                f"Invalid advisory partition size: {self.advisory_partition_size_mb} MB"
+            )
+
+    def spark_config(self) -> dict[str, Any]:
+        """Spark configuration entries of the preset (only options that are set)."""
+        _options: dict[str, Any] = {
+            "spark.sql.adaptive.enabled": self.adaptive_query_execution,
+            "spark.sql.adaptive.skewJoin.enabled": self.skew_join,
+            "spark.sql.shuffle.partitions": self.shuffle_partitions,
+            "spark.sql.adaptive.advisoryPartitionSizeInBytes":
+                None if self.advisory_partition_size_mb is None
+                else f"{self.advisory_partition_size_mb}MB",
+            "spark.databricks.delta.optimizeWrite.enabled": self.delta_optimized_writes,
+            "spark.databricks.delta.autoCompact.enabled": self.delta_auto_compaction,
+            "spark.databricks.io.cache.enabled": self.disk_cache,
+            "spark.databricks.delta.properties.defaults.enableChangeDataFeed":
+                self.change_data_feed,
+        }
+        return {_key: _value for _key, _value in _options.items() if _value is not None}
+
+
+class SparkPerformanceConfig:
+    """Named Spark performance presets merged into `spark_config` of job clusters.
+
+    The default preset is used by all linked services. A pipeline can override it either
+    by SPARK_PERFORMANCE_PRESET of its configuration class (which takes precedence) or in
+    its `pipeline.json` ({"heifer": {"sparkPreset": "etl"}}); such a preset has to be listed
+    in EXTRA_PRESETS (linked services are provisioned for it).
+    The preset used by a run is recorded in the Spark configuration (PRESET_SPARK_KEY, see
+    `spark.conf.get`) and in the cluster tags (PRESET_CLUSTER_TAG, e.g. in system tables).
+    """
+    # Definitions of presets
+    PRESETS: dict[str, SparkPerformancePreset] = {
+        # Databricks defaults (the original configuration)
+        "baseline": SparkPerformancePreset(),
+        # General purpose: AQE with skew handling, auto-sized shuffles, compact Delta files
+        "balanced": SparkPerformancePreset(
+            adaptive_query_execution=True, skew_join=True, shuffle_partitions="auto",
+            delta_optimized_writes=True, delta_auto_compaction=True,
+        ),
+        # Large batch transformations (bigger shuffle partitions, many writes)
+        "etl": SparkPerformancePreset(
+            adaptive_query_execution=True, skew_join=True, shuffle_partitions="auto",
+            advisory_partition_size_mb=256, delta_optimized_writes=True,
+            delta_auto_compaction=True, disk_cache=False,
+        ),
+        # Repeated reads of the same data (e.g. dataset provisioning)
+        "read-heavy": SparkPerformancePreset(
+            adaptive_query_execution=True, skew_join=True, disk_cache=True,
+        ),
+    }
+    # Preset used by all job clusters
+    DEFAULT_PRESET: str = os.getenv("HEIFER_SPARK_PERFORMANCE_PRESET", default="baseline")
+    # Presets available for per-pipeline overrides (comma separated, typically empty)
+    EXTRA_PRESETS: list[str] = [_preset for _preset in os.getenv("HEIFER_SPARK_PERFORMANCE_EXTRA_PRESETS_COMMA_SEPARATED", default="").split(",") if _preset]  # noqa: E501
+    # Spark configuration key and cluster tag recording the preset
+    PRESET_SPARK_KEY: str = "spark.heifer.performancePreset"
+    PRESET_CLUSTER_TAG: str = "heifer-performance-preset"
+
+    @classmethod
+    def provisioned_presets(cls) -> list[str]:
+        """Presets having linked services (the default one first)."""
+        return list(dict.fromkeys([cls.DEFAULT_PRESET, *cls.EXTRA_PRESETS]))
+
+    @classmethod
+    def preset_spark_config(cls, preset: str) -> dict[str, Any]:
+        """Spark configuration of the named preset (including the record of its name).
+        Raises:
+            ValueError: If the preset does not exist.
+        """
+        if preset not in cls.PRESETS:
+            raise ValueError(
+                f"Unknown Spark performance preset '{preset}' "
+                f"(available: {', '.join(cls.PRESETS)})"
+            )
+        return cls.PRESETS[preset].spark_config() | {cls.PRESET_SPARK_KEY: preset}
@@ -0,0 +1,23 @@
+import os
+
+
+class StagingLifecycleConfig:
+    """Lifecycle management (TTL) of staging data left behind by the BAK pipelines.
+
+    Zipped and unzipped BAKs (pre-bronze containers of BakUnzipPipelineConfig) and Parquet
+    files (TEMP_ACCOUNT_CONTAINER of BakSerializationDistributionConfig) are moved to the
+    cool tier and deleted after given number of days since their last modification.
+    Note:
+        Storage account has a single lifecycle management policy, so the policy is deployed
+        to the storage account of HeifER only; pre-bronze containers of other storage
+        accounts are left to policies of their owners.
+        Containers of layers (and libraries) of HeifER are never part of the policy.
+    """
+    # If True, lifecycle management policies are deployed for staging containers
+    ENABLED: bool = bool(os.getenv("HEIFER_STAGING_TTL_ENABLED", default="True") == "True")
+    # Staging blobs are deleted this number of days after their last modification
+    DELETE_AFTER_DAYS: int = int(os.getenv("HEIFER_STAGING_TTL_DELETE_AFTER_DAYS", default="14"))  # noqa: E501
+    # Staging blobs are moved to the cool tier after this number of days (0 = never)
+    COOL_AFTER_DAYS: int = int(os.getenv("HEIFER_STAGING_TTL_COOL_AFTER_DAYS", default="3"))
+    # Containers never included in the policy (comma separated)
+    PROTECTED_CONTAINERS: set[str] = {_container for _container in os.getenv("HEIFER_STAGING_TTL_PROTECTED_CONTAINERS_COMMA_SEPARATED", default="").split(",") if _container}  # noqa: E501
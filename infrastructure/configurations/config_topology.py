@@ -0,0 +1,271 @@
+import os
+import re
+import json
+import ipaddress
+import dataclasses
+from typing import Any, Optional
+
+from .config_heifer import HeiferConfig
+
+
+@dataclasses.dataclass(frozen=True)
+class DeploymentUnit:
+    """Complete HeifER (storage, network, workspace, ADF and pipelines) in one region.
+
+    The primary unit (configured by HEIFER_* variables) has no name, so names of its
+    resources do not change; resources of other units are prefixed by the name of the unit.
+    """
+    name: str
+    location: str
+    resource_group: str
+    storage_account_name: str
+    storage_account_layers: frozenset[str]
+    databricks_workspace_name: str
+    databricks_managed_resource_group_name: str
+    databricks_dfs_storage_account_name: str
+    azure_data_factory_name: str
+    databricks_service_principal_for_adf_app_uuid: Optional[str]
+    virtual_network_name: str
+    virtual_network_address_space: str
+    # Mapping subnet ('shared_subnet', 'databricks_host_subnet', ...) -> address space
+    virtual_network_subnets_address_spaces: dict[str, str]
+    # Pipelines (from the pipelines repository) deployed by the unit, all if None
+    pipelines: Optional[frozenset[str]] = None
+
+    @property
+    def is_primary(self) -> bool:
+        return not self.name
+
+    def resource_name(self, name: str) -> str:
+        """Logical (Pulumi) name of a resource of the unit."""
+        return name if self.is_primary else f"{self.name}-{name}"
+
+    def output_name(self, name: str) -> str:
+        """Name of a stack output of the unit."""
+        return name if self.is_primary else f"{self.name}_{name}"
+
+
+def derive_subnets_address_spaces(address_space: str) -> dict[str, str]:
+    """Subnets (shared, Databricks host and container) of the virtual network, each a quarter
+    of its address space (the last quarter stays free).
+    Raises:
+        ValueError: If the address space is smaller than /24 (Databricks needs /26 subnets).
+    """
+    _network = ipaddress.ip_network(address_space)
+    if _network.prefixlen > 24:
+        raise ValueError(f"Address space {address_space} is too small (at least /24)")
+    _quarters = list(_network.subnets(prefixlen_diff=2))
+    return {
+        "shared_subnet": str(_quarters[0]),
+        "databricks_host_subnet": str(_quarters[1]),
+        "databricks_container_subnet": str(_quarters[2]),
+    }
+
+
+def allocate_address_spaces(pool: str, taken: list[str], count: int,
+                            prefix_length: int) -> list[str]:
+    """First `count` blocks of the pool (of the prefix length) not overlapping taken ones.
+    Raises:
+        ValueError: If the pool does not have enough free blocks.
+    """
+    _taken = [ipaddress.ip_network(_address_space) for _address_space in taken]
+    _allocated: list[str] = []
+    for _block in ipaddress.ip_network(pool).subnets(new_prefix=prefix_length):
+        if len(_allocated) == count:
+            break
+        if not any(_block.overlaps(_network) for _network in _taken):
+            _allocated.append(str(_block))
+            _taken.append(_block)
+    if len(_allocated) < count:
+        raise ValueError(f"Address pool {pool} has no {count} free /{prefix_length} blocks")
+    return _allocated
+
+
+class TopologyConfig:
+    """Deployment units (regions) deployed by one program, in parallel.
+
+    The primary unit is configured by HEIFER_* variables. Other units are listed in
+    HEIFER_TOPOLOGY_JSON, e.g.:
+        [{"name": "weu", "location": "westeurope", "pipelines": ["Rio"]},
+         {"name": "neu", "location": "northeurope", "address_space": "10.20.0.0/22"}]
+    Only "name" (up to 8 lowercase alphanumeric chars) and "location" are required. Other
+    keys ("resource_group", "storage_account_name", "storage_account_layers",
+    "databricks_workspace_name", "databricks_managed_resource_group_name",
+    "databricks_dfs_storage_account_name", "azure_data_factory_name",
+    "virtual_network_name", "databricks_service_principal_for_adf_app_uuid",
+    "address_space" and "pipelines") default to values of the primary unit suffixed by the
+    name of the unit; address spaces are allocated from ADDRESS_POOL (not overlapping any
+    other unit) and subnets are derived from them.
+    Note:
+        Staging lifecycle policies (see StagingLifecycleConfig) are deployed by the primary
+        unit only, pipelines generated by HeifER are deployed by every unit.
+    """
+    UNITS_JSON: Optional[str] = os.getenv("HEIFER_TOPOLOGY_JSON") or None
+    # Addresses of virtual networks of units (by default the /16 of the primary network)
+    ADDRESS_POOL: str = os.getenv("HEIFER_TOPOLOGY_ADDRESS_POOL") or f"{os.getenv('HEIFER_VIRTUAL_NETWORK_ADDRESS_SPACE_PREFIX')}.0.0/16"  # noqa: E501
+    # Size of address spaces allocated to units (the same as the primary network)
+    UNIT_ADDRESS_SPACE_PREFIX_LENGTH: int = 22
+    # Keys of units in HEIFER_TOPOLOGY_JSON
+    UNIT_KEYS: tuple[str, ...] = (
+        "name", "location", "resource_group", "storage_account_name", "storage_account_layers",
+        "databricks_workspace_name", "databricks_managed_resource_group_name",
+        "databricks_dfs_storage_account_name", "azure_data_factory_name",
+        "virtual_network_name", "databricks_service_principal_for_adf_app_uuid",
+        "address_space", "pipelines",
+    )
+
+    @staticmethod
+    def primary_unit() -> DeploymentUnit:
+        """Unit configured by HEIFER_* variables (see HeiferConfig)."""
+        return DeploymentUnit(
+            name="",
+            location=HeiferConfig.AZURE_LOCATION,
+            resource_group=HeiferConfig.RESOURCE_GROUP,
+            storage_account_name=HeiferConfig.STORAGE_ACCOUNT_NAME,
+            storage_account_layers=frozenset(HeiferConfig.STORAGE_ACCOUNT_LAYERS),
+            databricks_workspace_name=HeiferConfig.DATABRICKS_WORKSPACE_NAME,
+            databricks_managed_resource_group_name=HeiferConfig.DATABRICKS_MANAGED_RESOURCE_GROUP_NAME,  # noqa: E501
+            databricks_dfs_storage_account_name=HeiferConfig.DATABRICKS_DFS_STORAGE_ACCOUNT_NAME,
+            azure_data_factory_name=HeiferConfig.AZURE_DATA_FACTORY_NAME,
+            databricks_service_principal_for_adf_app_uuid=HeiferConfig.DATABRICKS_SERVICE_PRINCIPAL_FOR_ADF_APP_UUID,  # noqa: E501
+            virtual_network_name=HeiferConfig.VIRTUAL_NETWORK_NAME,
+            virtual_network_address_space=HeiferConfig.VIRTUAL_NETWORK_ADDRESS_SPACE,
+            virtual_network_subnets_address_spaces=HeiferConfig.VIRTUAL_NETWORK_SUBNETS_ADDRESS_SPACES,  # noqa: E501
+        )
+
+    @classmethod
+    def units(cls) -> list[DeploymentUnit]:
+        """All deployment units, the primary one first.
+        Raises:
+            ValueError: If a unit is invalid, or names or address spaces of units collide.
+        """
+        _primary = cls.primary_unit()
+        if not cls.UNITS_JSON:
+            return [_primary]
+        _definitions: list[dict[str, Any]] = json.loads(cls.UNITS_JSON)
+        for _definition in _definitions:
+            cls._check_definition(_definition)
+
+        _address_spaces = iter(allocate_address_spaces(
+            cls.ADDRESS_POOL,
+            [_primary.virtual_network_address_space] + [
+                _definition["address_space"] for _definition in _definitions
+                if "address_space" in _definition
+            ],
+            sum("address_space" not in _definition for _definition in _definitions),
+            cls.UNIT_ADDRESS_SPACE_PREFIX_LENGTH,
+        ))
+        _units: list[DeploymentUnit] = [_primary] + [
+            cls._unit(
+                _definition, _primary, _definition.get("address_space") or next(_address_spaces)
+            )
+            for _definition in _definitions
+        ]
+        cls._check_duplicates(_units)
+        cls._check_overlapping_networks(_units)
+        return _units
+
+    @classmethod
+    def _check_definition(cls, definition: dict[str, Any]) -> None:
+        """Check keys, name, location and layers of a unit in HEIFER_TOPOLOGY_JSON.
+        Raises:
+            ValueError: If the definition is invalid.
+        """
+        if _unknown_keys := set(definition) - set(cls.UNIT_KEYS):
+            raise ValueError(
+                f"Unknown keys of a deployment unit: {', '.join(sorted(_unknown_keys))}"
+            )
+        if not re.fullmatch(r"[a-z][a-z0-9]{0,7}", str(definition.get("name"))):
+            raise ValueError(
+                f"Invalid name of a deployment unit '{definition.get('name')}' "
+                f"(up to 8 lowercase alphanumeric characters)"
+            )
+        if not definition.get("location"):
+            raise ValueError(f"Deployment unit '{definition['name']}' has no location")
+        # The libraries container is created even if it is not a layer (see HeiferStorage)
+        _layers = definition.get("storage_account_layers", [])
+        if not isinstance(_layers, list) or not all(
+                isinstance(_layer, str) and re.fullmatch(r"[a-z0-9](-?[a-z0-9]){2,62}", _layer)
+                for _layer in _layers
+        ):
+            raise ValueError(
+                f"Invalid storage_account_layers of deployment unit '{definition['name']}' "
+                f"(list of container names)"
+            )
+
+    @staticmethod
+    def _unit(definition: dict[str, Any], primary: DeploymentUnit,
+              address_space: str) -> DeploymentUnit:
+        """Unit of a definition in HEIFER_TOPOLOGY_JSON (defaults derived from the primary one).
+        Raises:
+            ValueError: If names of storage accounts of the unit are invalid.
+        """
+        _name = definition["name"]
+        _storage_account_name = definition.get(
+            "storage_account_name", f"{primary.storage_account_name}{_name}"
+        )
+        _dfs_storage_account_name = definition.get(
+            "databricks_dfs_storage_account_name",
+            f"{primary.databricks_dfs_storage_account_name}{_name}"
+        )
+        for _account in (_storage_account_name, _dfs_storage_account_name):
+            if not re.fullmatch(r"[a-z0-9]{3,24}", _account):
+                raise ValueError(
+                    f"Invalid storage account name '{_account}' of deployment unit "
+                    f"'{_name}' (set it explicitly, up to 24 lowercase alphanumeric chars)"
+                )
+        return DeploymentUnit(
+            name=_name,
+            location=definition["location"],
+            resource_group=definition.get(
+                "resource_group", f"{primary.resource_group}-{_name}"
+            ),
+            storage_account_name=_storage_account_name,
+            storage_account_layers=frozenset(
+                definition.get("storage_account_layers", primary.storage_account_layers)
+            ),
+            databricks_workspace_name=definition.get(
+                "databricks_workspace_name", f"{primary.databricks_workspace_name}-{_name}"
+            ),
+            databricks_managed_resource_group_name=definition.get(
+                "databricks_managed_resource_group_name",
+                f"{primary.databricks_managed_resource_group_name}-{_name}"
+            ),
+            databricks_dfs_storage_account_name=_dfs_storage_account_name,
+            azure_data_factory_name=definition.get(
+                "azure_data_factory_name", f"{primary.azure_data_factory_name}-{_name}"
+            ),
+            # Each factory has its own managed identity (set once the factory exists)
+            databricks_service_principal_for_adf_app_uuid=definition.get(
+                "databricks_service_principal_for_adf_app_uuid"
+            ),
+            virtual_network_name=definition.get(
+                "virtual_network_name", f"{primary.virtual_network_name}-{_name}"
+            ),
+            virtual_network_address_space=address_space,
+            virtual_network_subnets_address_spaces=derive_subnets_address_spaces(address_space),
+            pipelines=frozenset(definition["pipelines"]) if "pipelines" in definition else None,
+        )
+
+    @staticmethod
+    def _check_duplicates(units: list[DeploymentUnit]) -> None:
+        """Raises ValueError if units share names (of themselves or of their resources)."""
+        for _attribute in ("name", "resource_group", "storage_account_name",
+                           "databricks_workspace_name", "databricks_dfs_storage_account_name",
+                           "azure_data_factory_name"):
+            _values = [getattr(_unit, _attribute) for _unit in units]
+            if _duplicates := sorted({_value for _value in _values if _values.count(_value) > 1}):
+                raise ValueError(f"Deployment units share {_attribute}: {', '.join(_duplicates)}")
+
+    @staticmethod
+    def _check_overlapping_networks(units: list[DeploymentUnit]) -> None:
+        """Raises ValueError if address spaces of virtual networks of units overlap."""
+        _networks = [ipaddress.ip_network(_unit.virtual_network_address_space) for _unit in units]
+        for _index, _network in enumerate(_networks):
+            for _other_index, _other_network in enumerate(_networks[:_index]):
+                if _network.overlaps(_other_network):
+                    raise ValueError(
+                        f"Address spaces of deployment units "
+                        f"'{units[_other_index].name or 'primary'}' and "
+                        f"'{units[_index].name or 'primary'}' overlap"
+                    )
@@ -1,5 +1,7 @@
 # Databricks cluster needs to have the following IPs whitelisted
-DATABRICKS_UDR_IP_MAP: dict[str, str] = {
+#   Note: only the deployment region (and configured extra regions) is routed, prefixes are
+#   collapsed into the minimal covering set (see utilities.udr_routes).
+DATABRICKS_UDR_IP_MAP: dict[str, list[str]] = {
     "australiacentral": ["20.53.145.128/28"],
     "brazilsouth": ["20.197.222.144/28"],
     "canadacentral": ["52.139.4.160/28"],
@@ -0,0 +1,8 @@
+"""Tests are run from the infrastructure folder (python -m pytest tests)."""
+import os
+import sys
+import pathlib
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+# Configuration is read on import; variables without defaults (if not set by the environment)
+os.environ.setdefault("HEIFER_STORAGE_ACCOUNT_LAYERS_COMMA_SEPARATED", "bronze,silver,gold")
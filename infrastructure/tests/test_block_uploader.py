@@ -0,0 +1,120 @@
+"""Staged upload of artifacts against Azurite (skipped if Azurite is not running).
+
+Start Azurite (e.g. `docker run -p 10000:10000 mcr.microsoft.com/azure-storage/azurite
+azurite-blob --blobHost 0.0.0.0`) or set HEIFER_TEST_AZURITE_CONNECTION_STRING.
+"""
+import os
+import uuid
+import socket
+import hashlib
+import urllib.parse
+
+import pytest
+
+pytest.importorskip("azure.storage.blob")
+
+from utilities.block_uploader import (  # noqa: E402
+    BlockBlobUploader, StagedArtifactUploadProvider, create_container_client
+)
+
+# Well-known development account of Azurite
+AZURITE_CONNECTION_STRING: str = os.getenv(
+    "HEIFER_TEST_AZURITE_CONNECTION_STRING",
+    "DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;"
+    "AccountKey=Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr/"
+    "KBHBeksoGMGw==;BlobEndpoint=http://127.0.0.1:10000/devstoreaccount1;",
+)
+
+
+def _azurite_is_running() -> bool:
+    _endpoint = dict(
+        _item.split("=", 1) for _item in AZURITE_CONNECTION_STRING.split(";") if "=" in _item
+    )["BlobEndpoint"]
+    _url = urllib.parse.urlparse(_endpoint)
+    try:
+        with socket.create_connection((_url.hostname, _url.port or 80), timeout=1.0):
+            return True
+    except OSError:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not _azurite_is_running(), reason="Azurite is not running")
+
+
+@pytest.fixture
+def container_client():
+    _client = create_container_client(
+        "devstoreaccount1", f"libraries-{uuid.uuid4().hex[:12]}", AZURITE_CONNECTION_STRING
+    )
+    _client.create_container()
+    yield _client
+    _client.delete_container()
+
+
+def _artifact(path, content: bytes) -> dict:
+    path.write_bytes(content)
+    return {
+        "local_path": str(path), "sha256": hashlib.sha256(content).hexdigest(),
+        "size": len(content),
+    }
+
+
+def test_upload_in_blocks(container_client, tmp_path):
+    _content = os.urandom(5 * 1024 + 123)
+    _artifacts = {
+        "sha256/a/lib.whl": _artifact(tmp_path / "lib.whl", _content),
+        "sha256/b/__init__.py": _artifact(tmp_path / "__init__.py", b""),
+    }
+    _results = BlockBlobUploader(
+        container_client, block_size=1024, max_concurrency=4
+    ).upload_many(_artifacts)
+
+    assert set(_results) == set(_artifacts)
+    _blob = container_client.get_blob_client("sha256/a/lib.whl")
+    assert _blob.download_blob().readall() == _content
+    assert len(_blob.get_block_list("committed")[0]) == 6
+    assert _blob.get_blob_properties().metadata["sha256"] == _artifacts["sha256/a/lib.whl"]["sha256"]  # noqa: E501
+    assert container_client.get_blob_client("sha256/b/__init__.py").download_blob().readall() == b""  # noqa: E501
+
+
+def test_unchanged_blobs_are_skipped(container_client, tmp_path):
+    _artifacts = {"Rio/main.py": _artifact(tmp_path / "main.py", b"print(1)")}
+    _uploader = BlockBlobUploader(container_client, block_size=4)
+    _uploader.upload_many(_artifacts)
+    _etag = container_client.get_blob_client("Rio/main.py").get_blob_properties().etag
+
+    _uploader.upload_many(_artifacts)
+    assert container_client.get_blob_client("Rio/main.py").get_blob_properties().etag == _etag
+
+    # Changed content (digest) is uploaded again
+    _artifacts = {"Rio/main.py": _artifact(tmp_path / "main.py", b"print(2)")}
+    _uploader.upload_many(_artifacts)
+    _blob = container_client.get_blob_client("Rio/main.py")
+    assert _blob.get_blob_properties().etag != _etag
+    assert _blob.download_blob().readall() == b"print(2)"
+
+
+def test_provider_uploads_on_create_and_change(container_client, tmp_path):
+    _provider = StagedArtifactUploadProvider()
+    _props = {
+        "storage_account_name": "devstoreaccount1",
+        "container_name": container_client.container_name,
+        "artifacts": {"sha256/a/main.py": _artifact(tmp_path / "main.py", b"x = 1")},
+        "connection_string": AZURITE_CONNECTION_STRING,
+        "block_size": 1024, "max_concurrency": 2, "max_retries": 1,
+    }
+    _outs = _provider.create(_props).outs
+    assert set(_outs["uploaded"]) == {"sha256/a/main.py"}
+
+    # Another local path of the same content is not a change
+    _moved = _props | {"artifacts": {
+        "sha256/a/main.py": _props["artifacts"]["sha256/a/main.py"] | {"local_path": "x"}
+    }}
+    assert not _provider.diff("id", _outs, _moved).changes
+
+    _changed = _props | {
+        "artifacts": {"sha256/b/main.py": _artifact(tmp_path / "new.py", b"x = 2")}
+    }
+    assert _provider.diff("id", _outs, _changed).changes
+    _provider.update("id", _outs, _changed)
+    assert container_client.get_blob_client("sha256/b/main.py").download_blob().readall() == b"x = 2"  # noqa: E501
@@ -0,0 +1,69 @@
+"""Changes and targets of the fast deployment of pipelines (units, artifact upload modes)."""
+import dataclasses
+
+from configurations.config_topology import TopologyConfig
+from utilities.pipeline_fast_deploy import DeployedPipelinesManifest, plan_changes, target_urns
+
+_URN_PREFIX: str = "urn:pulumi:dev::heifer::heifer:stages:HeiferPipelines$"
+
+
+def test_artifacts_at_former_paths_are_added_when_their_content_changes():
+    _changes = plan_changes(
+        {"Rio": "h1"},
+        {"sha256/b/main.py": "sha256/b/main.py", "Rio/main.py": "sha256/b/main.py"},
+        {"Rio": "h0"},
+        {"sha256/a/main.py": "sha256/a/main.py", "Rio/main.py": "sha256/a/main.py"},
+    )
+    assert _changes == {
+        "changed": ["Rio"], "added": [], "removed": [],
+        "artifacts_added": ["Rio/main.py", "sha256/b/main.py"],
+        "artifacts_removed": ["sha256/a/main.py"],
+    }
+
+
+def test_blobs_are_targeted_in_the_pulumi_mode():
+    _changes = plan_changes({"Rio": "h"}, {"Rio/main.py": "sha256/a/main.py"}, {}, {})
+    assert target_urns(_changes, "dev", "heifer") == [
+        f"{_URN_PREFIX}azure-native:storage:Blob::Rio/main.py",
+        f"{_URN_PREFIX}azure:datafactory/pipeline:Pipeline::heifer-adf-pipeline-Rio",
+    ]
+
+
+def test_staged_upload_is_targeted_when_artifacts_change():
+    _changes = plan_changes({"Rio": "h"}, {"sha256/a/main.py": "sha256/a/main.py"},
+                            {"Rio": "h"}, {})
+    assert target_urns(_changes, "dev", "heifer", staged=True) == [
+        f"{_URN_PREFIX}pulumi-python:dynamic:Resource::heifer-artifacts-staged-upload",
+    ]
+    _unchanged = plan_changes({"Rio": "h"}, {"sha256/a/main.py": "sha256/a/main.py"},
+                              {"Rio": "h"}, {"sha256/a/main.py": "sha256/a/main.py"})
+    assert target_urns(_unchanged, "dev", "heifer", staged=True) == []
+
+
+def test_resources_of_other_units_are_prefixed():
+    _unit = dataclasses.replace(TopologyConfig.primary_unit(), name="weu")
+    _changes = plan_changes({"Rio": "h"}, {"sha256/a/main.py": "sha256/a/main.py"}, {}, {})
+    assert target_urns(_changes, "dev", "heifer", _unit) == [
+        f"{_URN_PREFIX}azure-native:storage:Blob::weu-sha256/a/main.py",
+        f"{_URN_PREFIX}azure:datafactory/pipeline:Pipeline::weu-heifer-adf-pipeline-Rio",
+    ]
+    assert target_urns(_changes, "dev", "heifer", _unit, staged=True)[0] == (
+        f"{_URN_PREFIX}pulumi-python:dynamic:Resource::weu-heifer-artifacts-staged-upload"
+    )
+
+
+def test_manifest_keeps_units_apart(tmp_path):
+    _manifest = DeployedPipelinesManifest(tmp_path / "manifest.json", "dev")
+    _manifest.save({"": ({"Rio": "h"}, {}), "weu": ({}, {"Rio/main.py": "sha256/a/main.py"})})
+    _manifest = DeployedPipelinesManifest(tmp_path / "manifest.json", "dev")
+    assert _manifest.pipelines("") == {"Rio": "h"}
+    assert _manifest.artifacts("weu") == {"Rio/main.py": "sha256/a/main.py"}
+    assert _manifest.pipelines("neu") == {}
+
+
+def test_manifest_of_the_former_format_is_ignored(tmp_path):
+    (tmp_path / "manifest.json").write_text(
+        '{"dev": {"pipelines": {"Rio": "h"}, "artifacts": ["sha256/a/main.py"]}}'
+    )
+    _manifest = DeployedPipelinesManifest(tmp_path / "manifest.json", "dev")
+    assert _manifest.pipelines("") == {} and _manifest.artifacts("") == {}
@@ -0,0 +1,66 @@
+"""Creation order of pipelines, rewriting of Copy activities and the cache of definitions."""
+import pytest
+
+from utilities.pipeline_loader import (
+    PipelineDefinitionCache, order_by_executed_pipelines, rewrite_copy_activities
+)
+
+
+def _pipeline(name: str, *executed: str) -> dict:
+    return {"name": name, "properties": {"activities": [
+        {"name": f"Execute {_executed}", "type": "ExecutePipeline",
+         "typeProperties": {"pipeline": {"referenceName": _executed, "type": "PipelineReference"}}}
+        for _executed in executed
+    ]}}
+
+
+def test_executed_pipelines_are_ordered_first():
+    _ordered = order_by_executed_pipelines([
+        _pipeline("Other", "RioPipeline"),
+        _pipeline("Standalone"),
+        _pipeline("RioPipeline", "Rio"),
+        _pipeline("Rio"),
+    ])
+    assert [_definition["name"] for _definition in _ordered] == [
+        "Rio", "RioPipeline", "Other", "Standalone"
+    ]
+
+
+def test_pipelines_not_deployed_are_ignored():
+    _ordered = order_by_executed_pipelines([_pipeline("Other", "Missing"), _pipeline("Rio")])
+    assert [_definition["name"] for _definition in _ordered] == ["Other", "Rio"]
+
+
+def test_cycle_is_rejected():
+    with pytest.raises(ValueError, match="executes itself"):
+        order_by_executed_pipelines([_pipeline("A", "B"), _pipeline("B", "A")])
+
+
+def test_block_size_is_set_only_for_blob_store_sinks():
+    _definition = {"name": "Rio", "properties": {"activities": [
+        {"name": "To blob", "type": "Copy", "typeProperties": {"sink": {
+            "type": "ParquetSink", "storeSettings": {"type": "AzureBlobFSWriteSettings"}}}},
+        {"name": "To SQL", "type": "Copy", "typeProperties": {"sink": {"type": "AzureSqlSink"}}},
+    ]}}
+    _rewritten = rewrite_copy_activities(_definition, lambda _name: {
+        "dataIntegrationUnits": 8, "sink.storeSettings.blockSizeInMB": 50
+    })
+    _to_blob, _to_sql = _rewritten["properties"]["activities"]
+    assert _to_blob["typeProperties"]["sink"]["storeSettings"]["blockSizeInMB"] == 50
+    assert _to_sql["typeProperties"] == {
+        "sink": {"type": "AzureSqlSink"}, "dataIntegrationUnits": 8
+    }
+
+
+def test_cache_keeps_only_the_current_entry_of_each_source(tmp_path):
+    (tmp_path / "0123abcd.pickle").write_bytes(b"")
+    _cache = PipelineDefinitionCache(tmp_path)
+    assert not (tmp_path / "0123abcd.pickle").exists()
+    _former_key = _cache.key(b"{}", {}, "Rio/pipeline.json")
+    _other_key = _cache.key(b"{}", {}, "Other/pipeline.json")
+    _cache.put(_former_key, {"name": "Rio"})
+    _cache.put(_other_key, {"name": "Other"})
+    _key = _cache.key(b'{"name": "Rio"}', {}, "Rio/pipeline.json")
+    _cache.put(_key, {"name": "Rio"})
+    assert _cache.get(_former_key) is None
+    assert _cache.get(_key) == {"name": "Rio"} and _cache.get(_other_key) == {"name": "Other"}
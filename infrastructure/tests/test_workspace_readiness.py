@@ -0,0 +1,179 @@
+"""Readiness polling (with an injected clock) and probes against a stand-in HTTP server."""
+import json
+import socket
+import threading
+import http.server
+from types import SimpleNamespace
+
+import pytest
+
+from utilities.workspace_readiness import cached_token, probe_workspace, wait_until_ready
+
+WORKSPACE_ID: str = "/subscriptions/s/resourceGroups/rg/providers/Microsoft.Databricks/workspaces/ws"  # noqa: E501
+
+
+class FakeClock:
+    """Clock advanced only by the injected sleep."""
+    def __init__(self):
+        self.now: float = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_wait_backs_off_exponentially_until_ready():
+    _clock = FakeClock()
+    _answers = iter([False] * 5 + [True])
+    _waited = wait_until_ready(lambda: next(_answers), timeout=1000, initial_delay=5,
+                               max_delay=30, sleep=_clock.sleep, clock=_clock)
+    assert _clock.sleeps == [5, 10, 20, 30, 30]
+    assert _waited == 95
+
+
+def test_wait_returns_immediately_if_ready():
+    _clock = FakeClock()
+    assert wait_until_ready(lambda: True, timeout=10, sleep=_clock.sleep, clock=_clock) == 0
+    assert _clock.sleeps == []
+
+
+def test_wait_times_out_without_oversleeping():
+    _clock = FakeClock()
+    with pytest.raises(TimeoutError):
+        wait_until_ready(lambda: False, timeout=50, initial_delay=20, max_delay=60,
+                         sleep=_clock.sleep, clock=_clock)
+    # The last sleep is cut to the remaining time
+    assert _clock.sleeps == [20, 30]
+    assert _clock.now == 50
+
+
+def test_token_is_requested_again_only_before_expiry():
+    _clock = FakeClock()
+    _requests: list[str] = []
+
+    class _Credential:
+        def get_token(self, scope: str) -> SimpleNamespace:
+            _requests.append(scope)
+            return SimpleNamespace(token=f"t{len(_requests)}", expires_on=_clock.now + 3600)
+
+    _get_token = cached_token(_Credential(), "scope", refresh_margin=300, clock=_clock)
+    assert [_get_token(), _get_token()] == ["t1", "t1"]
+    _clock.sleep(3300)
+    assert _get_token() == "t2"
+    assert _requests == ["scope", "scope"]
+
+
+class StandInServer:
+    """HTTP server answering ARM (workspace state) and Databricks API requests."""
+    def __init__(self, arm_status: int = 200, state: str = "Succeeded", api_status: int = 200):
+        self.arm_status: int = arm_status
+        self.state: str = state
+        self.api_status: int = api_status
+        self.requests: list[tuple[str, str]] = []
+        _server = self
+
+        class _Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                _server.requests.append((self.path, self.headers.get("Authorization", "")))
+                if self.path.startswith(WORKSPACE_ID):
+                    _status = _server.arm_status
+                    _body = json.dumps({"properties": {"provisioningState": _server.state}})
+                else:
+                    _status, _body = _server.api_status, "{}"
+                self.send_response(_status)
+                self.end_headers()
+                self.wfile.write(_body.encode())
+
+            def log_message(self, *_args):
+                pass
+
+        self.httpd = http.server.HTTPServer(("127.0.0.1", 0), _Handler)
+        self.url: str = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(
+            target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        ).start()
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    _servers: list[StandInServer] = []
+
+    def _start(**kwargs) -> StandInServer:
+        _servers.append(StandInServer(**kwargs))
+        return _servers[-1]
+
+    yield _start
+    for _server in _servers:
+        _server.close()
+
+
+def _probe(url: str) -> bool:
+    return probe_workspace(url, WORKSPACE_ID, url, "token")
+
+
+def test_ready_workspace(server):
+    _server = server()
+    assert _probe(_server.url)
+    # The state is read with the token, the API is only checked for reachability
+    assert _server.requests[0][1] == "Bearer token"
+    assert _server.requests[1] == ("/api/2.0/clusters/spark-versions", "")
+
+
+@pytest.mark.parametrize("api_status", [401, 403, 404])
+def test_api_answering_client_errors_is_up(server, api_status):
+    assert _probe(server(api_status=api_status).url)
+
+
+@pytest.mark.parametrize("api_status", [500, 502, 503])
+def test_api_answering_server_errors_is_not_ready(server, api_status):
+    assert not _probe(server(api_status=api_status).url)
+
+
+@pytest.mark.parametrize("arm_status", [404, 429, 500])
+def test_unreadable_state_is_not_ready(server, arm_status):
+    _server = server(arm_status=arm_status)
+    assert not _probe(_server.url)
+    # The API is not probed before the workspace is provisioned
+    assert len(_server.requests) == 1
+
+
+def test_workspace_being_provisioned_is_not_ready(server):
+    assert not _probe(server(state="Updating").url)
+
+
+def test_refused_connection_is_not_ready():
+    with socket.socket() as _socket:
+        _socket.bind(("127.0.0.1", 0))
+        _port = _socket.getsockname()[1]
+    # Nothing listens on the port any more
+    assert not _probe(f"http://127.0.0.1:{_port}")
+
+
+def test_refused_api_connection_is_not_ready(server):
+    _server = server()
+    with socket.socket() as _socket:
+        _socket.bind(("127.0.0.1", 0))
+        _port = _socket.getsockname()[1]
+    assert not probe_workspace(_server.url, WORKSPACE_ID, f"http://127.0.0.1:{_port}", "token")
+
+
+def test_polling_until_the_workspace_is_provisioned(server):
+    _server = server(state="Updating")
+    _clock = FakeClock()
+
+    def _sleep(_seconds: float) -> None:
+        _clock.sleep(_seconds)
+        # Provisioned while waiting for the second probe
+        if len(_clock.sleeps) == 2:
+            _server.state = "Succeeded"
+
+    assert wait_until_ready(lambda: _probe(_server.url), timeout=60, initial_delay=1,
+                            sleep=_sleep, clock=_clock) == 3
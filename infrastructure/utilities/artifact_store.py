@@ -0,0 +1,201 @@
+"""Content-addressed store for pipeline artifacts (the content of `artifacts` folders).
+
+Every distinct file is stored only once in the libraries container, under the path
+`sha256/<DIGEST>/<FILE_NAME>` (file name is preserved as, for example, pip requires valid
+wheel names). Pipelines keep referring to their artifacts by the alias
+`<PIPELINE_FOLDER>/<FILE_NAME>`; these references are rewritten to content addresses.
+"""
+import os
+import re
+import json
+import hashlib
+import pathlib
+from typing import Any
+
+from .pipeline_loader import discover_pipeline_files
+
+# Size of chunks used for hashing of files (avoids loading large WHL/JAR files at once)
+_HASH_CHUNK_SIZE: int = 4 * 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    """Compute SHA-256 digest of the file content.
+    Args:
+        path: Path to the file.
+    Returns:
+        Hexadecimal representation of the digest.
+    """
+    _digest = hashlib.sha256()
+    with open(path, "rb") as _file:
+        while _chunk := _file.read(_HASH_CHUNK_SIZE):
+            _digest.update(_chunk)
+    return _digest.hexdigest()
+
+
+def discover_upload_files_paths(
+        path_to_pipelines: pathlib.Path, upload_folder: pathlib.Path
+) -> list[dict[str, str]]:
+    """List artifacts of all pipelines (files in the upload folder next to `pipeline.json`).
+    Args:
+        path_to_pipelines: Path to the directory with pipeline repositories.
+        upload_folder: Relative path to the folder with artifacts inside each pipeline.
+    Returns:
+        List of artifacts, each with keys `local_path` and `abfss_path` (alias).
+    """
+    _upload_files_paths: list[dict[str, str]] = []
+    for _pipeline_file in discover_pipeline_files(path_to_pipelines):
+        _pipeline = _pipeline_file.parent
+        if not (_pipeline / upload_folder).is_dir():
+            continue
+        for _artifact_file in sorted((_pipeline / upload_folder).iterdir()):
+            if _artifact_file.is_file():
+                _upload_files_paths.append(
+                    {
+                        "local_path": str(_artifact_file),
+                        "abfss_path": str(pathlib.Path(_pipeline.name) / _artifact_file.name),
+                    }
+                )
+    return _upload_files_paths
+
+
+def content_address(sha256: str, file_name: str) -> str:
+    """Path of the artifact inside the libraries container (content address)."""
+    return f"sha256/{sha256}/{file_name}"
+
+
+class ArtifactManifest:
+    """Local manifest (hash, size, mtime) of artifacts.
+
+    Files whose size and modification time match the manifest entry are not re-read,
+    the stored digest is used instead.
+    """
+    def __init__(self, path: pathlib.Path):
+        self.path: pathlib.Path = pathlib.Path(path)
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._changed: bool = False
+        if self.path.is_file():
+            try:
+                self._entries = json.loads(self.path.read_text())
+            except (ValueError, OSError):
+                # Corrupted manifest is just a cache miss
+                self._entries = {}
+
+    def digest(self, local_path: str) -> str:
+        """Returns SHA-256 digest of the file, re-hashing it only if it changed."""
+        _key = str(pathlib.Path(local_path).resolve())
+        _stat = os.stat(_key)
+        _entry = self._entries.get(_key)
+        if (
+                _entry is not None
+                and _entry["size"] == _stat.st_size
+                and _entry["mtime_ns"] == _stat.st_mtime_ns
+        ):
+            return _entry["sha256"]
+        _sha256 = file_sha256(_key)
+        self._entries[_key] = {
+            "sha256": _sha256, "size": _stat.st_size, "mtime_ns": _stat.st_mtime_ns
+        }
+        self._changed = True
+        return _sha256
+
+    def save(self) -> None:
+        """Persist the manifest (only if anything changed)."""
+        if not self._changed:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        _temporary_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        _temporary_path.write_text(json.dumps(self._entries, indent=1, sort_keys=True))
+        os.replace(_temporary_path, self.path)
+        self._changed = False
+
+
+def build_artifact_store(
+        upload_files_paths: list[dict[str, str]], manifest: ArtifactManifest
+) -> tuple[dict[str, dict[str, Any]], dict[str, str]]:
+    """Deduplicate artifacts by their content.
+    Args:
+        upload_files_paths: List of artifacts, each with keys `local_path` and `abfss_path`.
+        manifest: Manifest used for obtaining digests.
+    Returns:
+        Tuple of two mappings:
+         - content address -> {"local_path", "sha256", "size"} (each unique file once),
+         - alias (the original `abfss_path`) -> content address.
+    """
+    _objects: dict[str, dict[str, Any]] = {}
+    _aliases: dict[str, str] = {}
+    for _upload_file_path in upload_files_paths:
+        _sha256 = manifest.digest(_upload_file_path["local_path"])
+        _address = content_address(
+            _sha256, pathlib.PurePath(_upload_file_path["abfss_path"]).name
+        )
+        if _address not in _objects:
+            _objects[_address] = {
+                "local_path": _upload_file_path["local_path"],
+                "sha256": _sha256,
+                "size": os.path.getsize(_upload_file_path["local_path"]),
+            }
+        _aliases[pathlib.PurePath(_upload_file_path["abfss_path"]).as_posix()] = _address
+    return _objects, _aliases
+
+
+def _artifact_reference_pattern(container_name: str, storage_account_name: str) -> re.Pattern:
+    return re.compile(
+        rf"(?P<prefix>{re.escape(container_name)}@{re.escape(storage_account_name)}"
+        rf"\.(?:dfs|blob)\.core\.windows\.net/)(?P<alias>[^\s\"'?#]+)"
+    )
+
+
+def artifact_references(definition: Any, container_name: str,
+                        storage_account_name: str) -> set[str]:
+    """Aliases (or content addresses) of artifacts referenced in the pipeline definition.
+
+    References have the same form as those rewritten by `rewrite_artifact_references`.
+    """
+    if isinstance(definition, str):
+        return {
+            _match.group("alias") for _match in _artifact_reference_pattern(
+                container_name, storage_account_name
+            ).finditer(definition)
+        }
+    if isinstance(definition, dict):
+        definition = list(definition.values())
+    if isinstance(definition, list):
+        return set().union(*(
+            artifact_references(_item, container_name, storage_account_name)
+            for _item in definition
+        ))
+    return set()
+
+
+def rewrite_artifact_references(
+        definition: Any, aliases: dict[str, str], container_name: str, storage_account_name: str
+) -> Any:
+    """Rewrite references to artifacts aliases in the pipeline definition to content addresses.
+
+    Only URIs in the form `abfss://CONTAINER@ACCOUNT.dfs.core.windows.net/ALIAS` (or the
+    `wasbs://` variant with `blob` endpoint) are rewritten; other strings stay untouched.
+    Args:
+        definition: Parsed pipeline definition (or any of its parts).
+        aliases: Mapping alias -> content address (see `build_artifact_store`).
+        container_name: Name of the libraries container.
+        storage_account_name: Name of the storage account with the libraries container.
+    Returns:
+        Rewritten copy of the definition.
+    """
+    if not aliases:
+        return definition
+    _reference_pattern = _artifact_reference_pattern(container_name, storage_account_name)
+
+    def _replace(_match: re.Match) -> str:
+        return _match.group("prefix") + aliases.get(_match.group("alias"), _match.group("alias"))
+
+    def _rewrite(_node: Any) -> Any:
+        if isinstance(_node, str):
+            return _reference_pattern.sub(_replace, _node)
+        if isinstance(_node, dict):
+            return {_key: _rewrite(_value) for _key, _value in _node.items()}
+        if isinstance(_node, list):
+            return [_rewrite(_item) for _item in _node]
+        return _node
+
+    return _rewrite(definition)
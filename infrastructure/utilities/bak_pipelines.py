@@ -0,0 +1,400 @@
+"""Definitions of ADF pipelines for BAK files generated by HeifER (not in pipelines repos).
+
+Definitions have the same form as `pipeline.json` files of pipelines repositories, so they
+are deployed (and fast-deployed) the same way.
+"""
+from typing import Any
+
+# Maximal batch count of the ADF ForEach activity
+MAX_FOREACH_BATCH_COUNT: int = 50
+# Maximal length of names of ADF activities
+MAX_ACTIVITY_NAME_LENGTH: int = 55
+
+
+def wildcard_name_bounds(pattern: str) -> tuple[str, str]:
+    """Prefix and suffix of file names matching the wildcard (with exactly one '*').
+
+    ADF expressions have no pattern matching, names are matched by prefix and suffix.
+    Raises:
+        ValueError: If the pattern does not contain exactly one '*' (or contains '?').
+    """
+    if pattern.count("*") != 1 or "?" in pattern:
+        raise ValueError(f"Wildcard '{pattern}' has to contain exactly one '*' (and no '?')")
+    _prefix, _suffix = pattern.split("*")
+    return _prefix, _suffix
+
+
+def _dataset_reference(name: str, parameters: dict[str, str]) -> dict[str, Any]:
+    return {"referenceName": name, "type": "DatasetReference", "parameters": parameters}
+
+
+def _file_name_filter(listing_activity: str) -> dict[str, Any]:
+    """Type properties of a Filter keeping files of the listing (Get Metadata) whose names
+    start with `fileNamePrefix` and end with `fileNameSuffix` (parameters of the pipeline)."""
+    return {
+        "items": {
+            "value": f"@activity('{listing_activity}').output.childItems",
+            "type": "Expression",
+        },
+        "condition": {
+            "value": "@and(equals(item().type, 'File'), and("
+                     "startswith(item().name, pipeline().parameters.fileNamePrefix), "
+                     "and(endswith(item().name, pipeline().parameters.fileNameSuffix), "
+                     "greaterOrEquals(length(item().name), add("
+                     "length(pipeline().parameters.fileNamePrefix), "
+                     "length(pipeline().parameters.fileNameSuffix))))))",
+            "type": "Expression",
+        },
+    }
+
+
+def multi_archive_unzip_pipeline_definition(
+        name: str, zipped_dataset: str, zipped_folder_dataset: str, unzipped_dataset: str,
+        zipped_container: str, zipped_folder_path: str, file_pattern: str,
+        unzipped_container: str, unzipped_folder_path: str, batch_count: int
+) -> dict[str, Any]:
+    """Pipeline extracting all zipped files in a folder concurrently.
+
+    Files of the folder are listed (Get Metadata), filtered by the wildcard and each one is
+    extracted by its own Copy activity inside a parallel ForEach. Locations and the wildcard
+    are parameters of the pipeline (values given here are their defaults).
+    Args:
+        name: Name of the pipeline.
+        zipped_dataset: Parameterised dataset of a zipped file (ZipDeflate).
+        zipped_folder_dataset: Parameterised dataset of the folder with zipped files.
+        unzipped_dataset: Parameterised dataset of the folder for extracted files.
+        zipped_container: Container with zipped files.
+        zipped_folder_path: Folder with zipped files inside the container.
+        file_pattern: Wildcard of names of zipped files (see `wildcard_name_bounds`).
+        unzipped_container: Container for extracted files.
+        unzipped_folder_path: Folder for extracted files inside the container.
+        batch_count: Number of files extracted concurrently.
+    Raises:
+        ValueError: If the wildcard or the batch count is invalid.
+    """
+    if not 1 <= batch_count <= MAX_FOREACH_BATCH_COUNT:
+        raise ValueError(
+            f"Batch count {batch_count} is outside of the range 1-{MAX_FOREACH_BATCH_COUNT}"
+        )
+    _prefix, _suffix = wildcard_name_bounds(file_pattern)
+    _parameters: dict[str, str] = {
+        "zippedContainer": zipped_container,
+        "zippedFolderPath": zipped_folder_path,
+        "fileNamePrefix": _prefix,
+        "fileNameSuffix": _suffix,
+        "unzippedContainer": unzipped_container,
+        "unzippedFolderPath": unzipped_folder_path,
+    }
+    _zipped_location = {
+        "container": "@pipeline().parameters.zippedContainer",
+        "folderPath": "@pipeline().parameters.zippedFolderPath",
+    }
+    return {
+        "name": name,
+        "properties": {
+            "activities": [
+                {
+                    "name": "ListArchives",
+                    "type": "GetMetadata",
+                    "typeProperties": {
+                        "dataset": _dataset_reference(zipped_folder_dataset, _zipped_location),
+                        "fieldList": ["childItems"],
+                        "storeSettings": {"type": "AzureBlobStorageReadSettings"},
+                    },
+                },
+                {
+                    "name": "FilterArchives",
+                    "type": "Filter",
+                    "dependsOn": [
+                        {"activity": "ListArchives", "dependencyConditions": ["Succeeded"]}
+                    ],
+                    "typeProperties": _file_name_filter("ListArchives"),
+                },
+                {
+                    "name": "UnzipArchives",
+                    "type": "ForEach",
+                    "dependsOn": [
+                        {"activity": "FilterArchives", "dependencyConditions": ["Succeeded"]}
+                    ],
+                    "typeProperties": {
+                        "items": {
+                            "value": "@activity('FilterArchives').output.Value",
+                            "type": "Expression",
+                        },
+                        "isSequential": False,
+                        "batchCount": batch_count,
+                        "activities": [
+                            {
+                                "name": "UnzipArchive",
+                                "type": "Copy",
+                                "inputs": [_dataset_reference(
+                                    zipped_dataset, _zipped_location | {"fileName": "@item().name"}
+                                )],
+                                "outputs": [_dataset_reference(unzipped_dataset, {
+                                    "container": "@pipeline().parameters.unzippedContainer",
+                                    "folderPath": "@pipeline().parameters.unzippedFolderPath",
+                                })],
+                                "typeProperties": {
+                                    "source": {
+                                        "type": "BinarySource",
+                                        "storeSettings": {
+                                            "type": "AzureBlobStorageReadSettings",
+                                            "recursive": False,
+                                        },
+                                        # Files are extracted into the folder named by the archive
+                                        "formatSettings": {
+                                            "type": "BinaryReadSettings",
+                                            "compressionProperties": {
+                                                "type": "ZipDeflateReadSettings",
+                                                "preserveZipFileNameAsFolder": True,
+                                            },
+                                        },
+                                    },
+                                    "sink": {
+                                        "type": "BinarySink",
+                                        "storeSettings": {"type": "AzureBlobStorageWriteSettings"},  # noqa: E501
+                                    },
+                                },
+                            },
+                        ],
+                    },
+                },
+            ],
+            "parameters": {
+                _name: {"type": "string", "defaultValue": _value}
+                for _name, _value in _parameters.items()
+            },
+        },
+    }
+
+
+def stripe_upload_pipeline_definition(
+        name: str, unzipped_dataset: str, restore_dataset: str, unzipped_container: str,
+        unzipped_folder_path: str, file_pattern: str, restore_container: str,
+        restore_folder_path: str, stripe_count: int, batch_count: int
+) -> dict[str, Any]:
+    """Pipeline copying stripes of a backup set (files of one BAK) to the restore location
+    concurrently.
+
+    Extracted files are listed (Get Metadata) and filtered by the wildcard; the run fails if
+    no stripe is found or if their number is not the expected one (when given), otherwise each
+    stripe is copied by its own Copy activity inside a parallel ForEach. Locations, the
+    wildcard and the number of stripes are parameters of the pipeline (values given here are
+    their defaults).
+    Args:
+        name: Name of the pipeline.
+        unzipped_dataset: Parameterised dataset of the folder with extracted files.
+        restore_dataset: Parameterised dataset of the folder read by the restore.
+        unzipped_container: Container with extracted files.
+        unzipped_folder_path: Folder with stripes inside the container.
+        file_pattern: Wildcard of names of stripes (see `wildcard_name_bounds`).
+        restore_container: Container read by the restore.
+        restore_folder_path: Folder for stripes inside the container.
+        stripe_count: Expected number of stripes (0 for any number).
+        batch_count: Number of stripes copied concurrently.
+    Raises:
+        ValueError: If the wildcard or the batch count is invalid.
+    """
+    if not 1 <= batch_count <= MAX_FOREACH_BATCH_COUNT:
+        raise ValueError(
+            f"Batch count {batch_count} is outside of the range 1-{MAX_FOREACH_BATCH_COUNT}"
+        )
+    _prefix, _suffix = wildcard_name_bounds(file_pattern)
+    _parameters: dict[str, str] = {
+        "unzippedContainer": unzipped_container,
+        "unzippedFolderPath": unzipped_folder_path,
+        "fileNamePrefix": _prefix,
+        "fileNameSuffix": _suffix,
+        "restoreContainer": restore_container,
+        "restoreFolderPath": restore_folder_path,
+    }
+    _unzipped_location = {
+        "container": "@pipeline().parameters.unzippedContainer",
+        "folderPath": "@pipeline().parameters.unzippedFolderPath",
+    }
+    return {
+        "name": name,
+        "properties": {
+            "activities": [
+                {
+                    "name": "ListFiles",
+                    "type": "GetMetadata",
+                    "typeProperties": {
+                        "dataset": _dataset_reference(unzipped_dataset, _unzipped_location),
+                        "fieldList": ["childItems"],
+                        "storeSettings": {"type": "AzureBlobStorageReadSettings"},
+                    },
+                },
+                {
+                    "name": "FilterStripes",
+                    "type": "Filter",
+                    "dependsOn": [
+                        {"activity": "ListFiles", "dependencyConditions": ["Succeeded"]}
+                    ],
+                    "typeProperties": _file_name_filter("ListFiles"),
+                },
+                {
+                    # A partial backup set cannot be restored
+                    "name": "CheckStripes",
+                    "type": "IfCondition",
+                    "dependsOn": [
+                        {"activity": "FilterStripes", "dependencyConditions": ["Succeeded"]}
+                    ],
+                    "typeProperties": {
+                        "expression": {
+                            "value": "@or(equals(activity('FilterStripes').output.FilteredItemsCount, 0), "  # noqa: E501
+                                     "and(greater(pipeline().parameters.stripeCount, 0), "
+                                     "not(equals(activity('FilterStripes').output.FilteredItemsCount, "  # noqa: E501
+                                     "pipeline().parameters.stripeCount))))",
+                            "type": "Expression",
+                        },
+                        "ifTrueActivities": [
+                            {
+                                "name": "IncompleteBackupSet",
+                                "type": "Fail",
+                                "typeProperties": {
+                                    "message": {
+                                        "value": "@concat('Found ', string(activity('FilterStripes').output.FilteredItemsCount), "  # noqa: E501
+                                                 "' stripe(s), expected ', "
+                                                 "string(pipeline().parameters.stripeCount))",
+                                        "type": "Expression",
+                                    },
+                                    "errorCode": "400",
+                                },
+                            },
+                        ],
+                    },
+                },
+                {
+                    "name": "UploadStripes",
+                    "type": "ForEach",
+                    "dependsOn": [
+                        {"activity": "CheckStripes", "dependencyConditions": ["Succeeded"]}
+                    ],
+                    "typeProperties": {
+                        "items": {
+                            "value": "@activity('FilterStripes').output.Value",
+                            "type": "Expression",
+                        },
+                        "isSequential": False,
+                        "batchCount": batch_count,
+                        "activities": [
+                            {
+                                "name": "UploadStripe",
+                                "type": "Copy",
+                                "inputs": [
+                                    _dataset_reference(unzipped_dataset, _unzipped_location)
+                                ],
+                                "outputs": [_dataset_reference(restore_dataset, {
+                                    "container": "@pipeline().parameters.restoreContainer",
+                                    "folderPath": "@pipeline().parameters.restoreFolderPath",
+                                })],
+                                "typeProperties": {
+                                    "source": {
+                                        "type": "BinarySource",
+                                        "storeSettings": {
+                                            "type": "AzureBlobStorageReadSettings",
+                                            "recursive": False,
+                                            "wildcardFileName": {
+                                                "value": "@item().name", "type": "Expression",
+                                            },
+                                        },
+                                    },
+                                    "sink": {
+                                        "type": "BinarySink",
+                                        "storeSettings": {"type": "AzureBlobStorageWriteSettings"},  # noqa: E501
+                                    },
+                                },
+                            },
+                        ],
+                    },
+                },
+            ],
+            "parameters": {
+                _name: {"type": "string", "defaultValue": _value}
+                for _name, _value in _parameters.items()
+            } | {"stripeCount": {"type": "int", "defaultValue": stripe_count}},
+        },
+    }
+
+
+def distribution_copy_pipeline_definition(
+        name: str, source_dataset: str, target_datasets: list[str], source_folder_path: str,
+        concurrency: int
+) -> dict[str, Any]:
+    """Pipeline copying (server-side) the source folder to every target.
+
+    Each target has its own Copy activity; at most `concurrency` of them run at once (the
+    i-th copy starts once the copy `concurrency` places before it completes). A failed copy
+    does not stop copies to other targets; ADF derives the result of the run from leaf
+    activities only, so a check succeeding only if every copy succeeded is followed by a Fail
+    activity run if the check is skipped (the run fails if any copy fails).
+    Args:
+        name: Name of the pipeline.
+        source_dataset: Parameterised dataset (folderPath) of the source folder.
+        target_datasets: Datasets of targets.
+        source_folder_path: Default folder path of the source (parameter of the pipeline).
+        concurrency: Maximal number of concurrent copies.
+    Raises:
+        ValueError: If the concurrency is not positive.
+    """
+    if concurrency < 1:
+        raise ValueError(f"Concurrency of copies has to be positive, not {concurrency}")
+    _activities: list[dict[str, Any]] = []
+    for _target_idx, _target_dataset in enumerate(target_datasets):
+        _activities.append({
+            "name": f"Copy{_target_idx:02d}-{_target_dataset}"[:MAX_ACTIVITY_NAME_LENGTH],
+            "type": "Copy",
+            "dependsOn": [] if _target_idx < concurrency else [{
+                "activity": _activities[_target_idx - concurrency]["name"],
+                "dependencyConditions": ["Completed"],
+            }],
+            "inputs": [_dataset_reference(
+                source_dataset, {"folderPath": "@pipeline().parameters.sourceFolderPath"}
+            )],
+            "outputs": [_dataset_reference(_target_dataset, {})],
+            "typeProperties": {
+                "source": {
+                    "type": "BinarySource",
+                    "storeSettings": {
+                        "type": "AzureBlobStorageReadSettings", "recursive": True,
+                    },
+                },
+                "sink": {
+                    "type": "BinarySink",
+                    "storeSettings": {
+                        "type": "AzureBlobStorageWriteSettings",
+                        "copyBehavior": "PreserveHierarchy",
+                    },
+                },
+            },
+        })
+    _activities.append({
+        "name": "AllCopiesSucceeded",
+        "type": "Wait",
+        "dependsOn": [
+            {"activity": _activity["name"], "dependencyConditions": ["Succeeded"]}
+            for _activity in _activities
+        ],
+        "typeProperties": {"waitTimeInSeconds": 1},
+    })
+    _activities.append({
+        "name": "CopiesFailed",
+        "type": "Fail",
+        "dependsOn": [
+            {"activity": "AllCopiesSucceeded", "dependencyConditions": ["Skipped"]}
+        ],
+        "typeProperties": {
+            "message": "Copy of the source folder to some of the targets failed",
+            "errorCode": "HeiferDistributionFailed",
+        },
+    })
+    return {
+        "name": name,
+        "properties": {
+            "activities": _activities,
+            "parameters": {
+                "sourceFolderPath": {"type": "string", "defaultValue": source_folder_path},
+            },
+        },
+    }
@@ -0,0 +1,211 @@
+"""Offline benchmark of the HeifER program evaluation (time, memory, resources, RPC calls).
+
+Each scenario generates a synthetic pipelines repository (with artifact folders of given
+size), sets synthetic HEIFER_* configuration and evaluates the program under Pulumi mocks
+(see `utilities.offline_program`) in a fresh interpreter. Wall time, peak RSS, the number
+of resources and the number of RPC calls are recorded. No Azure credentials are needed.
+
+Usage (from the infrastructure folder):
+    python -m utilities.benchmark [--scenarios NAME ...] [--repeat N] [--json REPORT.json]
+                                  [--baseline BASELINE.json] [--save-baseline BASELINE.json]
+                                  [--tolerance 0.3]
+The command fails (exit code 1) if any scenario regresses past the baseline.
+"""
+import os
+import sys
+import json
+import argparse
+import pathlib
+import tempfile
+import subprocess
+from typing import Any
+
+from configurations.databricks_udr_ip_map import DATABRICKS_UDR_IP_MAP
+
+# Scenarios: name -> parameters of the synthetic environment
+SCENARIOS: dict[str, dict[str, int]] = {
+    "pipelines-10": {"pipelines": 10, "artifacts": 3, "artifact_kb": 1024},
+    "pipelines-100": {"pipelines": 100, "artifacts": 3, "artifact_kb": 256},
+    "pipelines-1000": {"pipelines": 1000, "artifacts": 2, "artifact_kb": 16},
+    "layers-50": {"pipelines": 10, "layers": 50},
+    "udr-all-regions": {"pipelines": 10, "udr_regions": len(DATABRICKS_UDR_IP_MAP)},
+}
+# Metrics that must not grow at all (compared exactly with the baseline)
+EXACT_METRICS: tuple[str, ...] = ("resources", "rpc_calls")
+# Metrics compared with a tolerance (ratio)
+TOLERANT_METRICS: tuple[str, ...] = ("wall_seconds", "peak_rss_mb")
+
+# Script evaluating the program (run in a fresh interpreter)
+_EVALUATE_PROGRAM_SCRIPT: str = """
+import json, time, resource
+_start = time.perf_counter()
+from utilities.offline_program import run_program_offline
+_monitor = run_program_offline()
+print(json.dumps({
+    "wall_seconds": time.perf_counter() - _start,
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "resources": len(_monitor.registrations),
+    "rpc_calls": sum(_monitor.rpc_calls.values()),
+}))
+"""
+
+
+def generate_pipelines_repository(path: pathlib.Path, pipelines: int, artifacts: int = 2,
+                                  artifact_kb: int = 64, activities: int = 5) -> None:
+    """Generate synthetic pipelines repository (PATH/<REPOSITORY>/pipelines/<PIPELINE>).
+
+    Every pipeline has its `pipeline.json` with Databricks activities referring to its
+    artifacts; one artifact (a shared wheel) has the same content in all pipelines.
+    """
+    _shared_wheel: bytes = b"\0" * (artifact_kb * 1024)
+    for _pipeline_idx in range(pipelines):
+        _pipeline_name = f"SyntheticPipeline{_pipeline_idx:04d}"
+        _pipeline = path / "synthetic-repository" / "pipelines" / _pipeline_name
+        (_pipeline / "artifacts").mkdir(parents=True, exist_ok=True)
+        _artifact_names = ["shared-0.1-py3-none-any.whl"] + [
+            f"job_{_artifact_idx}.py" for _artifact_idx in range(1, artifacts)
+        ]
+        (_pipeline / "artifacts" / _artifact_names[0]).write_bytes(_shared_wheel)
+        for _artifact_name in _artifact_names[1:]:
+            (_pipeline / "artifacts" / _artifact_name).write_bytes(
+                f"# {_pipeline_name}\n".encode() * (artifact_kb * 1024 // 32 or 1)
+            )
+        _location = f"abfss://__CONTAINER_NAME__@__STORAGE_ACCOUNT_NAME__.dfs.core.windows.net/" \
+                    f"{_pipeline_name}"
+        _definition = {
+            "name": _pipeline_name,
+            "properties": {
+                "activities": [
+                    {
+                        "name": f"Activity{_activity_idx}",
+                        "type": "DatabricksSparkPython",
+                        "dependsOn": [] if not _activity_idx else [
+                            {"activity": f"Activity{_activity_idx - 1}",
+                             "dependencyConditions": ["Succeeded"]}
+                        ],
+                        "linkedServiceName": {"referenceName": "HeiferAdfToCluster",
+                                              "type": "LinkedServiceReference"},
+                        "typeProperties": {
+                            "pythonFile": f"{_location}/{_artifact_names[-1]}",
+                            "libraries": [{"whl": f"{_location}/{_artifact_names[0]}"}],
+                            "parameters": ["@pipeline().parameters.run_date"],
+                        },
+                    }
+                    for _activity_idx in range(activities)
+                ],
+                "parameters": {"run_date": {"type": "string", "defaultValue": "2024-01-01"}},
+            },
+        }
+        (_pipeline / "pipeline.json").write_text(json.dumps(_definition, indent=2))
+
+
+def scenario_environment(parameters: dict[str, int], path: pathlib.Path) -> dict[str, str]:
+    """Synthetic HEIFER_* configuration of the scenario."""
+    _layers = ["bronze", "silver", "gold", "libraries"] + [
+        f"layer{_layer_idx}" for _layer_idx in range(max(parameters.get("layers", 4) - 4, 0))
+    ]
+    _udr_regions = [
+        _region for _region in DATABRICKS_UDR_IP_MAP if _region != "uksouth"
+    ][:max(parameters.get("udr_regions", 1) - 1, 0)]
+    return {
+        "HEIFER_AZURE_LOCATION": "uksouth",
+        "HEIFER_RESOURCE_GROUP": "rg-heifer-benchmark",
+        "HEIFER_STORAGE_ACCOUNT_NAME": "heiferbenchmark",
+        "HEIFER_STORAGE_ACCOUNT_LAYERS_COMMA_SEPARATED": ",".join(_layers),
+        "HEIFER_DATABRICKS_WORKSPACE_NAME": "dbw-heifer-benchmark",
+        "HEIFER_DATABRICKS_MANAGED_RESOURCE_GROUP_NAME": "rg-heifer-benchmark-managed",
+        "HEIFER_DATABRICKS_SECRET_SCOPE_NAME": "heifer-benchmark",
+        "HEIFER_DATABRICKS_DFS_STORAGE_ACCOUNT_NAME": "heiferbenchmarkdfs",
+        "HEIFER_DATABRICKS_ACCOUNT_ID": "00000000-0000-0000-0000-000000000000",
+        "HEIFER_DATABRICKS_SERVICE_PRINCIPAL_FOR_ADF_APP_UUID":
+            "00000000-0000-0000-0000-000000000000",
+        "HEIFER_AZURE_DATA_FACTORY_NAME": "adf-heifer-benchmark",
+        "HEIFER_VIRTUAL_NETWORK_NAME": "vnet-heifer-benchmark",
+        "HEIFER_VIRTUAL_NETWORK_ADDRESS_SPACE_PREFIX": "10.10",
+        "HEIFER_UDR_EXTRA_REGIONS_COMMA_SEPARATED": ",".join(_udr_regions),
+        "HEIFER_UPLOAD_LIBRARIES": "True",
+        "HEIFER_PATH_TO_PIPELINES": str(path / "pipelines"),
+        # Caches start cold in each scenario
+        "HEIFER_ARTIFACT_MANIFEST_PATH": str(path / "cache" / "artifact-manifest.json"),
+        "HEIFER_PIPELINE_CACHE_PATH": str(path / "cache" / "pipeline-cache"),
+    }
+
+
+def run_scenario(parameters: dict[str, int], repeat: int = 1) -> dict[str, float]:
+    """Run the scenario (best of `repeat` runs)."""
+    _results: list[dict[str, float]] = []
+    with tempfile.TemporaryDirectory(prefix="heifer-benchmark-") as _directory:
+        _path = pathlib.Path(_directory)
+        generate_pipelines_repository(
+            _path / "pipelines", parameters["pipelines"], parameters.get("artifacts", 2),
+            parameters.get("artifact_kb", 64),
+        )
+        _environment = {
+            _name: _value for _name, _value in os.environ.items()
+            if not _name.startswith(("HEIFER_", "DEPLOY_", "ARM_", "AZURE_"))
+        } | scenario_environment(parameters, _path)
+        for _ in range(repeat):
+            _completed = subprocess.run(
+                [sys.executable, "-c", _EVALUATE_PROGRAM_SCRIPT], capture_output=True,
+                text=True, check=True, env=_environment,
+                cwd=pathlib.Path(__file__).resolve().parent.parent,
+            )
+            _results.append(json.loads(_completed.stdout.strip().splitlines()[-1]))
+    return min(_results, key=lambda _result: _result["wall_seconds"])
+
+
+def find_regressions(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]],
+                     tolerance: float) -> list[str]:
+    """List metrics of scenarios that regressed past the baseline."""
+    _regressions: list[str] = []
+    for _scenario, _result in results.items():
+        if (_baseline_result := baseline.get(_scenario)) is None:
+            continue
+        for _metric in EXACT_METRICS:
+            if _result[_metric] > _baseline_result[_metric]:
+                _regressions.append(f"{_scenario}: {_metric} {_result[_metric]} > "
+                                    f"baseline {_baseline_result[_metric]}")
+        for _metric in TOLERANT_METRICS:
+            if _result[_metric] > _baseline_result[_metric] * (1 + tolerance):
+                _regressions.append(f"{_scenario}: {_metric} {_result[_metric]:.2f} > "
+                                    f"baseline {_baseline_result[_metric]:.2f} (+{tolerance:.0%})")
+    return _regressions
+
+
+def format_results(results: dict[str, dict[str, float]]) -> str:
+    _lines = [f"{'Scenario':<20}{'wall [s]':>10}{'RSS [MB]':>10}{'resources':>11}{'RPCs':>8}"]
+    for _scenario, _result in results.items():
+        _lines.append(
+            f"{_scenario:<20}{_result['wall_seconds']:>10.2f}{_result['peak_rss_mb']:>10.1f}"
+            f"{_result['resources']:>11}{_result['rpc_calls']:>8}"
+        )
+    return "\n".join(_lines)
+
+
+if __name__ == "__main__":
+    _parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    _parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS),
+                         default=list(SCENARIOS))
+    _parser.add_argument("--repeat", type=int, default=1, help="Runs per scenario (best is kept)")
+    _parser.add_argument("--json", type=pathlib.Path, help="Where to store the JSON results")
+    _parser.add_argument("--baseline", type=pathlib.Path, help="Baseline to compare with")
+    _parser.add_argument("--save-baseline", type=pathlib.Path,
+                         help="Store results as the new baseline")
+    _parser.add_argument("--tolerance", type=float, default=0.3,
+                         help="Allowed relative growth of wall time and memory")
+    _arguments = _parser.parse_args()
+
+    _results: dict[str, Any] = {
+        _scenario: run_scenario(SCENARIOS[_scenario], _arguments.repeat)
+        for _scenario in _arguments.scenarios
+    }
+    print(format_results(_results))
+    for _path in (_arguments.json, _arguments.save_baseline):
+        if _path:
+            _path.write_text(json.dumps(_results, indent=2))
+    if _arguments.baseline:
+        if _regressions := find_regressions(
+                _results, json.loads(_arguments.baseline.read_text()), _arguments.tolerance
+        ):
+            print("\nRegressions:\n  " + "\n  ".join(_regressions))
+            sys.exit(1)
@@ -0,0 +1,250 @@
+"""Parallel, chunked upload of pipeline artifacts as block blobs.
+
+Large artifacts (WHL/JAR files) are split into blocks that are staged concurrently by
+a bounded pool of workers (shared by all files); each block is retried individually and
+the block list is committed at once (atomically) only after all blocks are staged.
+
+During the deployment, the upload is the `StagedArtifactUpload` resource (other resources,
+like ADF pipelines, can depend on it). It can also be run before `pulumi up` as a standalone
+stage:
+    python -m utilities.block_uploader
+For local testing against Azurite, set `HEIFER_ARTIFACT_STORAGE_CONNECTION_STRING`
+to the Azurite connection string (tests in `tests/test_block_uploader.py` use it as well).
+"""
+import time
+import uuid
+import base64
+import concurrent.futures
+from typing import Any, Optional
+
+import pulumi
+import pulumi.dynamic
+from azure.core.exceptions import AzureError, ResourceNotFoundError
+from azure.storage.blob import BlobBlock, ContainerClient, ContentSettings
+
+
+def create_container_client(
+        storage_account_name: str, container_name: str, connection_string: Optional[str] = None
+) -> ContainerClient:
+    """Create client for the container with artifacts.
+    Args:
+        storage_account_name: Name of the Storage Account.
+        container_name: Name of the container (typically 'libraries').
+        connection_string: If set, used instead of Azure AD credentials (e.g. for Azurite).
+    Returns:
+        Client for the container.
+    """
+    if connection_string:
+        return ContainerClient.from_connection_string(connection_string, container_name)
+    # Imported here as it is required only for the access to a real Azure
+    from azure.identity import DefaultAzureCredential
+    return ContainerClient(
+        account_url=f"https://{storage_account_name}.blob.core.windows.net",
+        container_name=container_name,
+        credential=DefaultAzureCredential(),
+    )
+
+
+class BlockBlobUploader:
+    """Uploads files as block blobs using concurrently staged blocks.
+    Args:
+        container_client: Client for the target container.
+        block_size: Size of one block in bytes.
+        max_concurrency: Maximal number of concurrently staged blocks (size of worker pool).
+        max_retries: Maximal number of retries of a single block (or commit).
+        retry_backoff: Initial delay (in seconds) between retries, doubled on each attempt.
+    """
+    def __init__(self, container_client: ContainerClient, block_size: int = 8 * 1024 * 1024,
+                 max_concurrency: int = 8, max_retries: int = 5, retry_backoff: float = 1.0):
+        if block_size <= 0 or max_concurrency <= 0 or max_retries < 0:
+            raise ValueError("Block size and concurrency must be positive, retries non-negative")
+        self.container_client: ContainerClient = container_client
+        self.block_size: int = block_size
+        self.max_concurrency: int = max_concurrency
+        self.max_retries: int = max_retries
+        self.retry_backoff: float = retry_backoff
+
+    def _with_retries(self, operation, *args, **kwargs) -> Any:
+        """Run operation, retry it with exponential backoff on Azure errors."""
+        _delay = self.retry_backoff
+        for _attempt in range(self.max_retries + 1):
+            try:
+                return operation(*args, **kwargs)
+            except AzureError:
+                if _attempt == self.max_retries:
+                    raise
+                time.sleep(_delay)
+                _delay *= 2
+
+    def _is_uploaded(self, blob_name: str, sha256: str) -> bool:
+        """Check whether the blob already exists with the same content (digest)."""
+        try:
+            _properties = self.container_client.get_blob_client(blob_name).get_blob_properties()
+        except ResourceNotFoundError:
+            return False
+        return (_properties.metadata or {}).get("sha256") == sha256
+
+    def _stage_block(self, blob_name: str, local_path: str, offset: int, length: int,
+                     block_id: str) -> None:
+        """Read and stage a single block (retried independently of other blocks)."""
+        with open(local_path, "rb") as _file:
+            _file.seek(offset)
+            _data = _file.read(length)
+        self._with_retries(
+            self.container_client.get_blob_client(blob_name).stage_block,
+            block_id=block_id, data=_data, length=len(_data),
+        )
+
+    def upload_many(self, artifacts: dict[str, dict[str, Any]]) -> dict[str, dict[str, str]]:
+        """Upload artifacts; blocks of all files share one bounded pool of workers.
+        Args:
+            artifacts: Mapping blob name -> {"local_path", "sha256", "size"}
+                (as returned by `build_artifact_store`).
+        Returns:
+            Mapping blob name -> {"url", "sha256"} of all (uploaded or skipped) artifacts.
+        """
+        _results: dict[str, dict[str, str]] = {}
+        _pending_blocks: dict[str, list[concurrent.futures.Future]] = {}
+        _block_lists: dict[str, list[BlobBlock]] = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_concurrency) as _pool:
+            for _blob_name, _artifact in artifacts.items():
+                _results[_blob_name] = {
+                    "url": self.container_client.get_blob_client(_blob_name).url,
+                    "sha256": _artifact["sha256"],
+                }
+                if self._is_uploaded(_blob_name, _artifact["sha256"]):
+                    continue
+                # Block IDs must be unique within the blob and of the same length
+                _upload_id = uuid.uuid4().hex
+                _block_lists[_blob_name] = []
+                _pending_blocks[_blob_name] = []
+                # Empty file leads to an empty block list (valid empty blob)
+                for _offset in range(0, _artifact["size"], self.block_size):
+                    _block_id = base64.b64encode(
+                        f"{_upload_id}-{_offset // self.block_size:08d}".encode()
+                    ).decode()
+                    _block_lists[_blob_name].append(BlobBlock(block_id=_block_id))
+                    _pending_blocks[_blob_name].append(_pool.submit(
+                        self._stage_block, _blob_name, _artifact["local_path"], _offset,
+                        self.block_size, _block_id,
+                    ))
+            for _blob_name, _futures in _pending_blocks.items():
+                for _future in _futures:
+                    _future.result()
+                # Commit of the block list makes the whole blob visible at once
+                self._with_retries(
+                    self.container_client.get_blob_client(_blob_name).commit_block_list,
+                    _block_lists[_blob_name],
+                    metadata={"sha256": artifacts[_blob_name]["sha256"]},
+                    content_settings=ContentSettings(content_type="application/octet-stream"),
+                )
+        return _results
+
+
+class StagedArtifactUploadProvider(pulumi.dynamic.ResourceProvider):
+    """Dynamic provider uploading artifacts (see `BlockBlobUploader`) when they change."""
+    def _upload(self, props: dict[str, Any]) -> dict[str, Any]:
+        _uploader = BlockBlobUploader(
+            create_container_client(
+                props["storage_account_name"], props["container_name"],
+                props["connection_string"],
+            ),
+            block_size=int(props["block_size"]),
+            max_concurrency=int(props["max_concurrency"]),
+            max_retries=int(props["max_retries"]),
+        )
+        return props | {"uploaded": _uploader.upload_many(props["artifacts"])}
+
+    def create(self, props: dict[str, Any]) -> pulumi.dynamic.CreateResult:
+        return pulumi.dynamic.CreateResult(
+            id_=f"{props['storage_account_name']}/{props['container_name']}",
+            outs=self._upload(props),
+        )
+
+    def diff(self, _id: str, olds: dict[str, Any],
+             news: dict[str, Any]) -> pulumi.dynamic.DiffResult:
+        # Artifacts are uploaded again only if their content (or the target) changed; local
+        #   paths differ between machines
+        def _digests(_props: dict[str, Any]) -> dict[str, str]:
+            return {
+                _blob_name: _artifact["sha256"]
+                for _blob_name, _artifact in (_props.get("artifacts") or {}).items()
+            }
+        _changed = _digests(olds) != _digests(news) or any(
+            olds.get(_key) != news.get(_key) for _key in ("storage_account_name", "container_name")
+        )
+        return pulumi.dynamic.DiffResult(changes=_changed, replaces=[])
+
+    def update(self, _id: str, _olds: dict[str, Any],
+               news: dict[str, Any]) -> pulumi.dynamic.UpdateResult:
+        return pulumi.dynamic.UpdateResult(outs=self._upload(news))
+
+
+class StagedArtifactUpload(pulumi.dynamic.Resource):
+    """Resource uploading artifacts as concurrently staged blocks during the deployment.
+
+    Blobs are not Pulumi resources: they are left in place when the resource is deleted and
+    unchanged blobs (by their digest) are skipped.
+    Args:
+        resource_name: Name of the resource.
+        storage_account_name: Name of the Storage Account.
+        container_name: Name of the container (typically 'libraries').
+        artifacts: Mapping blob name -> {"local_path", "sha256", "size"}.
+        connection_string: If set, used instead of Azure AD credentials (e.g. for Azurite).
+        block_size: Size of one block in bytes.
+        max_concurrency: Maximal number of concurrently staged blocks.
+        max_retries: Maximal number of retries of a single block (or commit).
+        opts: Options of the resource.
+    """
+    uploaded: pulumi.Output[dict[str, dict[str, str]]]
+
+    def __init__(self, resource_name: str, storage_account_name: pulumi.Input[str],
+                 container_name: pulumi.Input[str], artifacts: dict[str, dict[str, Any]],
+                 connection_string: Optional[str] = None, block_size: int = 8 * 1024 * 1024,
+                 max_concurrency: int = 8, max_retries: int = 5,
+                 opts: Optional[pulumi.ResourceOptions] = None):
+        super().__init__(
+            StagedArtifactUploadProvider(),
+            resource_name,
+            {
+                "storage_account_name": storage_account_name,
+                "container_name": container_name,
+                "artifacts": artifacts,
+                "connection_string": pulumi.Output.secret(connection_string)
+                if connection_string else None,
+                "block_size": block_size,
+                "max_concurrency": max_concurrency,
+                "max_retries": max_retries,
+                "uploaded": None,
+            },
+            opts,
+        )
+
+
+if __name__ == "__main__":
+    # Run from the infrastructure folder (python -m utilities.block_uploader)
+    from configurations.config_heifer import HeiferConfig
+    from utilities.artifact_store import (
+        ArtifactManifest, build_artifact_store, discover_upload_files_paths
+    )
+
+    _manifest = ArtifactManifest(HeiferConfig.ARTIFACT_MANIFEST_PATH)
+    _objects, _ = build_artifact_store(
+        discover_upload_files_paths(
+            HeiferConfig.PATH_TO_PIPELINES, HeiferConfig.PATH_TO_PIPELINES_UPLOAD_FOLDER
+        ),
+        _manifest,
+    )
+    _manifest.save()
+    _uploader = BlockBlobUploader(
+        create_container_client(
+            HeiferConfig.STORAGE_ACCOUNT_NAME,
+            HeiferConfig.LIBRARIES_CONTAINER,
+            HeiferConfig.ARTIFACT_STORAGE_CONNECTION_STRING,
+        ),
+        block_size=HeiferConfig.ARTIFACT_UPLOAD_BLOCK_SIZE_MB * 1024 * 1024,
+        max_concurrency=HeiferConfig.ARTIFACT_UPLOAD_MAX_CONCURRENCY,
+        max_retries=HeiferConfig.ARTIFACT_UPLOAD_MAX_RETRIES,
+    )
+    for _blob_name, _result in _uploader.upload_many(_objects).items():
+        print(f"{_result['sha256']}  {_result['url']}")
@@ -0,0 +1,77 @@
+"""Report of effective performance settings of Copy activities of deployed pipelines.
+
+Pipelines are loaded exactly as they are deployed (see `load_deployable_pipeline_definitions`)
+with the copy performance settings of the configuration applied; settings that are not set
+(ADF decides, i.e. 'Auto') are reported as '-'. Settings configured for activities that do
+not exist are reported as well (likely typos), and so are block sizes of Copy activities
+whose sink does not write to a blob store (they are not set).
+
+Usage (from the infrastructure folder, with the usual HEIFER_* environment variables):
+    python -m utilities.copy_performance_report [--json REPORT.json]
+"""
+import json
+import argparse
+import pathlib
+from typing import Any
+
+from components.pipeline_definitions import (
+    build_pipelines_artifact_store, load_deployable_pipeline_definitions,
+    pipeline_copy_performance
+)
+from configurations.config_copy_performance import CopyPerformance
+from utilities.pipeline_loader import (
+    copy_activities_settings, iterate_activities, supports_block_size
+)
+
+
+def copy_performance_report() -> dict[str, Any]:
+    """Effective settings (mapping pipeline -> activity -> settings) and unmatched settings
+    (mapping pipeline -> activities configured but missing in the pipeline, or activities
+    with a block size their sink does not support)."""
+    _, _artifact_aliases = build_pipelines_artifact_store()
+    _report: dict[str, Any] = {"pipelines": {}, "unmatched": {}}
+    for _definition in load_deployable_pipeline_definitions(_artifact_aliases):
+        _settings = copy_activities_settings(_definition)
+        if _settings:
+            _report["pipelines"][_definition['name']] = _settings
+        _configured = pipeline_copy_performance(_definition['name'])
+        _unmatched = sorted(_configured.keys() - _settings.keys() - {"*"}) + [
+            f"{_activity['name']} (blockSizeInMB, sink is not a blob store)"
+            for _activity in iterate_activities(_definition['properties']['activities'])
+            if _activity.get("type") == "Copy" and not supports_block_size(_activity)
+            and _configured.get("*", CopyPerformance()).merged(
+                _configured.get(_activity['name'], CopyPerformance())
+            ).block_size_mb is not None
+        ]
+        if _unmatched:
+            _report["unmatched"][_definition['name']] = _unmatched
+    return _report
+
+
+def format_report(report: dict[str, Any]) -> str:
+    _columns = {
+        "dataIntegrationUnits": "DIU", "parallelCopies": "parallel",
+        "enableStaging": "staging", "blockSizeInMB": "block MB",
+    }
+    _lines = [f"{'Pipeline / activity':<56}" + "".join(f"{_label:>10}" for _label in _columns.values())]  # noqa: E501
+    for _pipeline, _activities in report["pipelines"].items():
+        _lines.append(_pipeline)
+        for _activity, _settings in _activities.items():
+            _lines.append(f"  {_activity:<54}" + "".join(
+                f"{'-' if _settings[_key] is None else str(_settings[_key]):>10}"
+                for _key in _columns
+            ))
+    for _pipeline, _activities in report["unmatched"].items():
+        _lines.append(f"Unmatched settings of {_pipeline}: {', '.join(_activities)}")
+    return "\n".join(_lines)
+
+
+if __name__ == "__main__":
+    _parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    _parser.add_argument("--json", type=pathlib.Path, help="Where to store the JSON report")
+    _arguments = _parser.parse_args()
+
+    _report = copy_performance_report()
+    if _arguments.json:
+        _arguments.json.write_text(json.dumps(_report, indent=2))
+    print(format_report(_report))
@@ -0,0 +1,255 @@
+"""Static analysis of the resource dependency graph (DAG) of the HeifER program.
+
+The program is evaluated offline (under Pulumi mocks, see `utilities.offline_program`),
+the DAG with both explicit (`depends_on`) and implicit (via Outputs) edges is captured and,
+given per-resource-type duration estimates, the tool reports:
+ - the critical path (the lower bound of the deployment wall-clock time),
+ - the maximal parallelism achievable by the engine (with unlimited `--parallel`),
+ - redundant explicit edges (already implied by other edges),
+ - explicit edges that lengthen the critical path (and by how much).
+
+Usage (from the infrastructure folder, with the usual HEIFER_* environment variables):
+    python -m utilities.dependency_graph [--durations DURATIONS.json] [--json REPORT.json]
+where DURATIONS.json maps resource types to estimated durations (in seconds).
+"""
+import json
+import argparse
+import pathlib
+from typing import Any, Optional
+
+# Estimated durations (in seconds) of creation of resources, by resource type
+DEFAULT_DURATION_ESTIMATES: dict[str, float] = {
+    "azure-native:resources:ResourceGroup": 5,
+    "azure-native:storage:StorageAccount": 30,
+    "azure-native:storage:BlobContainer": 3,
+    "azure-native:storage:Blob": 5,
+    "azure-native:network:NetworkSecurityGroup": 10,
+    "azure-native:network:RouteTable": 10,
+    "azure-native:network:Route": 10,
+    "azure-native:network:VirtualNetwork": 10,
+    "azure-native:network:Subnet": 10,
+    "azure-native:network:PrivateEndpoint": 90,
+    "azure-native:databricks:Workspace": 600,
+    "azure-native:authorization:RoleAssignment": 15,
+    "pulumi-python:dynamic:Resource": 60,
+    "azure:datafactory/factory:Factory": 30,
+    "azure:datafactory/integrationRuntimeRule:IntegrationRuntimeRule": 60,
+    "azure:datafactory/linkedServiceAzureDatabricks:LinkedServiceAzureDatabricks": 30,
+    "azure:datafactory/pipeline:Pipeline": 5,
+    "databricks:index/servicePrincipal:ServicePrincipal": 10,
+    "databricks:index/secretScope:SecretScope": 5,
+}
+# Estimate used for types not listed above
+DEFAULT_DURATION: float = 5.0
+
+
+class DependencyGraph:
+    """Resource DAG; edges lead from a dependency to the dependent resource.
+    Args:
+        nodes: Mapping URN -> estimated duration (in seconds).
+        explicit: Mapping URN -> URNs listed in its `depends_on`.
+        implicit: Mapping URN -> URNs it depends on via Outputs (properties).
+    """
+    def __init__(self, nodes: dict[str, float], explicit: dict[str, set[str]],
+                 implicit: dict[str, set[str]]):
+        self.nodes: dict[str, float] = nodes
+        self.explicit: dict[str, set[str]] = {
+            _urn: explicit.get(_urn, set()) & nodes.keys() for _urn in nodes
+        }
+        self.implicit: dict[str, set[str]] = {
+            _urn: implicit.get(_urn, set()) & nodes.keys() for _urn in nodes
+        }
+
+    @classmethod
+    def from_monitor(cls, monitor, durations: Optional[dict[str, float]] = None
+                     ) -> "DependencyGraph":
+        """Build the graph from the monitor of the offline program evaluation."""
+        _durations = DEFAULT_DURATION_ESTIMATES | (durations or {})
+        _nodes, _explicit, _implicit = {}, {}, {}
+        for _registration in monitor.registrations:
+            _urn = _registration["urn"]
+            _nodes[_urn] = float(_durations.get(_registration["type"], DEFAULT_DURATION))
+            _explicit[_urn] = monitor.explicit_for(_registration)
+            _implicit[_urn] = _registration["implicit"]
+        return cls(_nodes, _explicit, _implicit)
+
+    def dependencies(self, urn: str, without: Optional[tuple[str, str]] = None) -> set[str]:
+        """All direct dependencies of the resource (optionally without one explicit edge)."""
+        _dependencies = self.explicit[urn] | self.implicit[urn]
+        if without is not None and without[1] == urn and without[0] not in self.implicit[urn]:
+            _dependencies = _dependencies - {without[0]}
+        return _dependencies
+
+    def topological_order(self) -> list[str]:
+        _order: list[str] = []
+        _state: dict[str, int] = {}  # 1: visiting, 2: done
+        for _root in self.nodes:
+            _stack: list[tuple[str, bool]] = [(_root, False)]
+            while _stack:
+                _urn, _expanded = _stack.pop()
+                if _expanded:
+                    _state[_urn] = 2
+                    _order.append(_urn)
+                    continue
+                if _state.get(_urn):
+                    continue
+                _state[_urn] = 1
+                _stack.append((_urn, True))
+                for _dependency in self.dependencies(_urn):
+                    if _state.get(_dependency) == 1:
+                        raise ValueError(f"Cycle in the dependency graph at {_dependency}")
+                    if not _state.get(_dependency):
+                        _stack.append((_dependency, False))
+        return _order
+
+    def schedule(self, without: Optional[tuple[str, str]] = None
+                 ) -> tuple[dict[str, float], dict[str, Optional[str]]]:
+        """Earliest finish time of each resource (unlimited parallelism).
+        Returns:
+            Mapping URN -> finish time, mapping URN -> dependency determining its start.
+        """
+        _finish: dict[str, float] = {}
+        _predecessor: dict[str, Optional[str]] = {}
+        for _urn in self.topological_order():
+            _dependencies = self.dependencies(_urn, without)
+            _predecessor[_urn] = max(_dependencies, key=_finish.get, default=None)
+            _start = _finish[_predecessor[_urn]] if _predecessor[_urn] else 0.0
+            _finish[_urn] = _start + self.nodes[_urn]
+        return _finish, _predecessor
+
+    def critical_path(self) -> tuple[float, list[str]]:
+        """Length (in seconds) and resources of the longest (critical) path."""
+        _finish, _predecessor = self.schedule()
+        if not _finish:
+            return 0.0, []
+        _urn: Optional[str] = max(_finish, key=_finish.get)
+        _length = _finish[_urn]
+        _path: list[str] = []
+        while _urn is not None:
+            _path.append(_urn)
+            _urn = _predecessor[_urn]
+        return _length, list(reversed(_path))
+
+    def max_parallelism(self) -> int:
+        """Maximal number of concurrently running operations in the earliest schedule."""
+        _finish, _ = self.schedule()
+        _events: list[tuple[float, int]] = []
+        for _urn, _end in _finish.items():
+            _events.append((_end - self.nodes[_urn], 1))
+            _events.append((_end, -1))
+        _running, _maximum = 0, 0
+        # Ends are processed before starts at the same time
+        for _, _change in sorted(_events):
+            _running += _change
+            _maximum = max(_maximum, _running)
+        return _maximum
+
+    def _reachable(self, source: str, target: str, without: tuple[str, str]) -> bool:
+        """Whether target (dependent) transitively depends on source, ignoring one edge."""
+        _visited: set[str] = set()
+        _stack: list[str] = [target]
+        while _stack:
+            _urn = _stack.pop()
+            for _dependency in self.dependencies(_urn):
+                if (_dependency, _urn) == without or _dependency in _visited:
+                    continue
+                if _dependency == source:
+                    return True
+                _visited.add(_dependency)
+                _stack.append(_dependency)
+        return False
+
+    def redundant_explicit_edges(self) -> list[dict[str, str]]:
+        """Explicit edges that are implied by implicit edges or by other paths."""
+        _redundant: list[dict[str, str]] = []
+        for _urn, _explicit in self.explicit.items():
+            for _dependency in sorted(_explicit):
+                if _dependency in self.implicit[_urn]:
+                    _reason = "duplicates an implicit (Output) dependency"
+                elif self._reachable(_dependency, _urn, without=(_dependency, _urn)):
+                    _reason = "implied transitively by other dependencies"
+                else:
+                    continue
+                _redundant.append({"from": _dependency, "to": _urn, "reason": _reason})
+        return _redundant
+
+    def constraining_explicit_edges(self) -> list[dict[str, Any]]:
+        """Explicit-only edges whose removal would shorten the critical path."""
+        _length, _ = self.critical_path()
+        _constraining: list[dict[str, Any]] = []
+        for _urn, _explicit in self.explicit.items():
+            for _dependency in sorted(_explicit - self.implicit[_urn]):
+                _finish, _ = self.schedule(without=(_dependency, _urn))
+                _saving = _length - max(_finish.values())
+                if _saving > 0:
+                    _constraining.append(
+                        {"from": _dependency, "to": _urn, "saving_seconds": _saving}
+                    )
+        return sorted(_constraining, key=lambda _edge: -_edge["saving_seconds"])
+
+    def report(self) -> dict[str, Any]:
+        _length, _path = self.critical_path()
+        _total = sum(self.nodes.values())
+        return {
+            "resources": len(self.nodes),
+            "explicit_edges": sum(len(_deps) for _deps in self.explicit.values()),
+            "implicit_edges": sum(len(_deps) for _deps in self.implicit.values()),
+            "total_work_seconds": _total,
+            "critical_path_seconds": _length,
+            "critical_path": _path,
+            "average_parallelism": _total / _length if _length else 0.0,
+            "max_parallelism": self.max_parallelism(),
+            "redundant_explicit_edges": self.redundant_explicit_edges(),
+            "constraining_explicit_edges": self.constraining_explicit_edges(),
+        }
+
+
+def _short(urn: str) -> str:
+    """Readable form of URN: name (type)."""
+    _, _, _type, _name = urn.rsplit("::", 3)
+    return f"{_name} ({_type.rsplit('$', 1)[-1]})"
+
+
+def format_report(report: dict[str, Any]) -> str:
+    """Human-readable form of the report."""
+    _lines = [
+        f"Resources: {report['resources']} (explicit edges: {report['explicit_edges']}, "
+        f"implicit edges: {report['implicit_edges']})",
+        f"Total work: {report['total_work_seconds']:.0f} s; "
+        f"critical path: {report['critical_path_seconds']:.0f} s",
+        f"Average parallelism: {report['average_parallelism']:.2f}; "
+        f"maximal parallelism: {report['max_parallelism']}",
+        "",
+        "Critical path:",
+        *[f"  {_short(_urn)}" for _urn in report["critical_path"]],
+        "",
+        f"Redundant explicit edges ({len(report['redundant_explicit_edges'])}):",
+        *[f"  {_short(_edge['to'])} -> {_short(_edge['from'])}: {_edge['reason']}"
+          for _edge in report["redundant_explicit_edges"]],
+        "",
+        f"Explicit edges lengthening the critical path "
+        f"({len(report['constraining_explicit_edges'])}):",
+        *[f"  {_short(_edge['to'])} -> {_short(_edge['from'])}: "
+          f"-{_edge['saving_seconds']:.0f} s if removed"
+          for _edge in report["constraining_explicit_edges"]],
+    ]
+    return "\n".join(_lines)
+
+
+if __name__ == "__main__":
+    from utilities.offline_program import run_program_offline
+
+    _parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    _parser.add_argument("--durations", type=pathlib.Path,
+                         help="JSON file mapping resource types to durations in seconds")
+    _parser.add_argument("--json", type=pathlib.Path, help="Where to store the JSON report")
+    _arguments = _parser.parse_args()
+
+    _graph = DependencyGraph.from_monitor(
+        run_program_offline(),
+        json.loads(_arguments.durations.read_text()) if _arguments.durations else None,
+    )
+    _report = _graph.report()
+    if _arguments.json:
+        _arguments.json.write_text(json.dumps(_report, indent=2))
+    print(format_report(_report))
@@ -0,0 +1,173 @@
+"""Whole-program fingerprint short-circuiting deployments without changes.
+
+The fingerprint combines the deployment configuration (values of HEIFER_* and pipelines'
+environment variables), the program source (including configuration classes) and the
+content of the pipelines tree. It is stored (per stack) after each successful deployment
+made by this tool; when the current fingerprint matches the stored one, nothing is
+deployed, without importing providers or contacting Azure.
+
+Usage (from the infrastructure folder, with the usual HEIFER_* environment variables):
+    python -m utilities.deployment_fingerprint [--stack STACK] [--check] [--force]
+                                               [-- PULUMI_UP_ARGUMENTS ...]
+With `--check`, changes are only reported (exit code 1 if there are any).
+Note:
+    Changes made outside of the program (in Azure, or in the upstream stack of the
+    pipelines stage) are not part of the fingerprint; use `--force` to reconcile them.
+"""
+import os
+import sys
+import json
+import hashlib
+import pathlib
+import argparse
+import subprocess
+from typing import Optional
+
+from configurations.config_heifer import HeiferConfig
+from utilities.artifact_store import ArtifactManifest
+
+# Environment variables of the deployment (values are hashed, never stored)
+FINGERPRINT_ENV_PREFIXES: tuple[str, ...] = (
+    "HEIFER_", "DEPLOY_", "RIO_", "BAK_", "DATASET_", "SERIALIZATION_"
+)
+FINGERPRINT_ENV_VARIABLES: tuple[str, ...] = ("ARM_SUBSCRIPTION_ID", "ARM_TENANT_ID")
+# Source of the program (relative to the infrastructure folder)
+FINGERPRINT_SOURCE_PATTERNS: tuple[str, ...] = (
+    "__main__.py", "Pulumi*.yaml", "requirements.txt",
+    "components/*.py", "configurations/*.py", "utilities/*.py",
+)
+_PROGRAM_FOLDER: pathlib.Path = pathlib.Path(__file__).resolve().parent.parent
+
+
+def _hash_entries(entries: dict[str, str]) -> str:
+    return hashlib.sha256(
+        json.dumps(entries, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+def environment_digest() -> str:
+    """Digest of the values of environment variables configuring the deployment."""
+    return _hash_entries({
+        _name: _value for _name, _value in os.environ.items()
+        if _name.startswith(FINGERPRINT_ENV_PREFIXES) or _name in FINGERPRINT_ENV_VARIABLES
+    })
+
+
+def files_digest(paths: list[pathlib.Path], root: pathlib.Path,
+                 manifest: ArtifactManifest) -> str:
+    """Digest of the files (relative paths and content), see `ArtifactManifest.digest`."""
+    return _hash_entries({
+        _path.relative_to(root).as_posix(): manifest.digest(str(_path)) for _path in paths
+    })
+
+
+def source_files() -> list[pathlib.Path]:
+    """Files of the program source."""
+    return sorted({
+        _path for _pattern in FINGERPRINT_SOURCE_PATTERNS
+        for _path in _PROGRAM_FOLDER.glob(_pattern) if _path.is_file()
+    })
+
+
+def pipelines_files(path_to_pipelines: pathlib.Path) -> list[pathlib.Path]:
+    """Files of the pipelines tree (hidden folders, like .git, are left out)."""
+    _files: list[pathlib.Path] = []
+    for _root, _folders, _file_names in os.walk(path_to_pipelines):
+        _folders[:] = sorted(_folder for _folder in _folders if not _folder.startswith("."))
+        _files += [pathlib.Path(_root) / _file_name for _file_name in sorted(_file_names)]
+    return _files
+
+
+def program_fingerprint() -> dict[str, str]:
+    """Digests of parts of the program (mapping part -> digest), including 'total'."""
+    _manifest = ArtifactManifest(HeiferConfig.ARTIFACT_MANIFEST_PATH)
+    _path_to_pipelines = pathlib.Path(HeiferConfig.PATH_TO_PIPELINES)
+    _fingerprint = {
+        "environment": environment_digest(),
+        "source": files_digest(source_files(), _PROGRAM_FOLDER, _manifest),
+        "pipelines": files_digest(
+            pipelines_files(_path_to_pipelines), _path_to_pipelines, _manifest
+        ),
+    }
+    _manifest.save()
+    return _fingerprint | {"total": _hash_entries(_fingerprint)}
+
+
+class DeploymentFingerprints:
+    """Fingerprints of the last successful deployments, per stack."""
+    def __init__(self, path: pathlib.Path):
+        self.path: pathlib.Path = pathlib.Path(path)
+        self._stacks: dict[str, dict[str, str]] = {}
+        if self.path.is_file():
+            try:
+                self._stacks = json.loads(self.path.read_text())
+            except (ValueError, OSError):
+                # Corrupted file means that the program is deployed again
+                self._stacks = {}
+
+    def get(self, stack: str) -> dict[str, str]:
+        return self._stacks.get(stack, {})
+
+    def save(self, stack: str, fingerprint: dict[str, str]) -> None:
+        """Persist the fingerprint after a successful deployment."""
+        self._stacks[stack] = fingerprint
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        _temporary_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        _temporary_path.write_text(json.dumps(self._stacks, indent=1, sort_keys=True))
+        os.replace(_temporary_path, self.path)
+
+
+def changed_parts(fingerprint: dict[str, str], deployed: dict[str, str]) -> list[str]:
+    """Parts of the program whose digests differ from the deployed ones."""
+    return [
+        _part for _part, _digest in fingerprint.items()
+        if _part != "total" and deployed.get(_part) != _digest
+    ]
+
+
+def _current_stack() -> str:
+    return subprocess.run(
+        ["pulumi", "stack", "--show-name"], capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+
+def preflight_deploy(stack: Optional[str] = None, check: bool = False, force: bool = False,
+                     pulumi_arguments: Optional[list[str]] = None) -> int:
+    """Deploy the program only if its fingerprint changed.
+    Args:
+        stack: Name of the stack (the selected stack by default, which is slower to find).
+        check: Only report changes (exit code 1 if there are any).
+        force: Deploy regardless of the stored fingerprint.
+        pulumi_arguments: Extra arguments of `pulumi up`.
+    Returns:
+        Exit code (of Pulumi if deployed, 0 if there are no changes).
+    """
+    _stack = stack or _current_stack()
+    _fingerprints = DeploymentFingerprints(HeiferConfig.DEPLOYMENT_FINGERPRINT_PATH)
+    _fingerprint = program_fingerprint()
+    _changes = changed_parts(_fingerprint, _fingerprints.get(_stack))
+    if not _changes and not force:
+        print("No changes")
+        return 0
+    print(f"Changed: {', '.join(_changes) or '-'}" + (" (forced)" if force else ""))
+    if check:
+        return 1
+
+    _return_code = subprocess.run(
+        ["pulumi", "up", "--stack", _stack, "--yes"] + (pulumi_arguments or [])
+    ).returncode
+    if _return_code == 0:
+        _fingerprints.save(_stack, _fingerprint)
+    return _return_code
+
+
+if __name__ == "__main__":
+    _parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    _parser.add_argument("--stack", help="Name of the stack (the selected one by default)")
+    _parser.add_argument("--check", action="store_true", help="Only report changes")
+    _parser.add_argument("--force", action="store_true",
+                         help="Deploy regardless of the stored fingerprint")
+    _parser.add_argument("pulumi_arguments", nargs="*", help="Extra arguments of `pulumi up`")
+    _arguments = _parser.parse_args()
+    sys.exit(preflight_deploy(_arguments.stack, _arguments.check, _arguments.force,
+                              _arguments.pulumi_arguments))
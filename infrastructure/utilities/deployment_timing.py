@@ -0,0 +1,278 @@
+"""Deployment driven by the Pulumi Automation API with per-resource timing reports.
+
+The stack is deployed (`up`, or `preview` only) with the engine event stream consumed: the
+start (`resourcePreEvent`) and the end (`resOutputsEvent`, or `resOpFailedEvent`) of each
+resource operation is recorded. The timing report (JSON) and a text Gantt chart are written
+and a summary of the run is appended to the history of runs, so slower resources (compared
+with the median of previous runs of the stack) are reported as regressions. Per-type
+durations of the history can be exported for `utilities.dependency_graph --durations`.
+
+Usage (from the infrastructure folder, with the usual HEIFER_* environment variables):
+    python -m utilities.deployment_timing [--stack STACK] [--parallel N] [--preview]
+                                          [--refresh] [--json REPORT.json]
+                                          [--gantt REPORT.txt] [--durations DURATIONS.json]
+Note:
+    Times are taken when events are received (the engine stamps them with whole seconds);
+    unchanged resources ('same' operations) are left out.
+"""
+import os
+import sys
+import time
+import json
+import argparse
+import datetime
+import pathlib
+import statistics
+import subprocess
+from typing import Any, Callable, Optional
+
+from pulumi import automation
+
+from configurations.config_heifer import HeiferConfig
+
+# Number of runs kept in the history (per stack)
+HISTORY_LIMIT: int = 50
+# A resource operation regresses if it is slower than the median of previous runs by both
+REGRESSION_TOLERANCE: float = 0.3
+REGRESSION_MIN_SECONDS: float = 30.0
+_PROGRAM_FOLDER: pathlib.Path = pathlib.Path(__file__).resolve().parent.parent
+
+
+class ResourceTimings:
+    """Operations of resources (start, end, status) collected from engine events.
+    Args:
+        clock: Source of the current time (in seconds).
+    """
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock: Callable[[], float] = clock
+        self.started_at: float = clock()
+        self.finished_at: Optional[float] = None
+        # Mapping URN -> operation (type, op, start, end, status); times since the start
+        self.operations: dict[str, dict[str, Any]] = {}
+
+    def on_event(self, event: automation.EngineEvent) -> None:
+        """Callback of the engine event stream (`on_event` of the Automation API)."""
+        _now = self._clock() - self.started_at
+        if event.resource_pre_event is not None:
+            _metadata = event.resource_pre_event.metadata
+            if _metadata.op == automation.OpType.SAME:
+                return
+            self.operations[_metadata.urn] = {
+                "type": _metadata.type, "op": _metadata.op.value,
+                "start": _now, "end": None, "status": "running",
+            }
+        elif event.res_outputs_event is not None:
+            self._finish(event.res_outputs_event.metadata.urn, _now, "succeeded")
+        elif event.res_op_failed_event is not None:
+            self._finish(event.res_op_failed_event.metadata.urn, _now, "failed")
+
+    def _finish(self, urn: str, end: float, status: str) -> None:
+        if urn in self.operations:
+            self.operations[urn] |= {"end": end, "status": status}
+
+    def finish(self) -> None:
+        """Mark the end of the run (operations without an end stay 'unfinished')."""
+        self.finished_at = self._clock()
+        for _operation in self.operations.values():
+            if _operation["end"] is None:
+                _operation |= {
+                    "end": self.finished_at - self.started_at, "status": "unfinished"
+                }
+
+    def report(self, stack: str, parallel: Optional[int], result: str) -> dict[str, Any]:
+        """Timing report of the run (operations sorted by their start)."""
+        _by_type: dict[str, float] = {}
+        _operations: list[dict[str, Any]] = []
+        for _urn, _operation in sorted(
+                self.operations.items(), key=lambda _item: _item[1]["start"]
+        ):
+            _duration = round(_operation["end"] - _operation["start"], 3)
+            _operations.append({"urn": _urn, "name": _urn.rsplit("::", 1)[-1]} | _operation | {
+                "start": round(_operation["start"], 3), "end": round(_operation["end"], 3),
+                "duration": _duration,
+            })
+            _by_type[_operation["type"]] = _by_type.get(_operation["type"], 0.0) + _duration
+        return {
+            "stack": stack,
+            "parallel": parallel,
+            "started_at": datetime.datetime.fromtimestamp(
+                self.started_at, datetime.timezone.utc
+            ).isoformat(timespec="seconds"),
+            "wall_seconds": round((self.finished_at or self._clock()) - self.started_at, 3),
+            "result": result,
+            "operations": _operations,
+            "seconds_by_type": dict(sorted(_by_type.items(), key=lambda _item: -_item[1])),
+        }
+
+
+def format_gantt(report: dict[str, Any], width: int = 60) -> str:
+    """Text Gantt chart of operations of the report (one line per resource operation)."""
+    _scale = width / max(report["wall_seconds"], 1e-9)
+    _total = f"{report['wall_seconds']:.0f}s"
+    _axis = f"0s{_total:>{width - 2}}"
+    _lines = [
+        f"{report['stack']} ({report['result']}, parallel {report['parallel'] or 'default'}):"
+        f" {report['wall_seconds']:.1f}s",
+        f"{'Resource (operation)':<56}{'Duration':>10}   {_axis}",
+    ]
+    for _operation in report["operations"]:
+        _start = min(int(_operation["start"] * _scale), width - 1)
+        _length = max(int(_operation["end"] * _scale) - _start, 1)
+        # Failed and unfinished operations are marked differently
+        _bar = " " * _start + ("#" if _operation["status"] == "succeeded" else "!") * _length
+        _label = f"{_operation['name']} ({_operation['op']})"[:55]
+        _lines.append(f"{_label:<56}{_operation['duration']:>9.1f}s  |{_bar:<{width}}|")
+    return "\n".join(_lines)
+
+
+class TimingHistory:
+    """Summaries (wall time, durations of operations) of previous runs, per stack."""
+    def __init__(self, path: pathlib.Path, limit: int = HISTORY_LIMIT):
+        self.path: pathlib.Path = pathlib.Path(path)
+        self.limit: int = limit
+        self._stacks: dict[str, list[dict[str, Any]]] = {}
+        if self.path.is_file():
+            try:
+                self._stacks = json.loads(self.path.read_text())
+            except (ValueError, OSError):
+                # Corrupted history is started over
+                self._stacks = {}
+
+    def runs(self, stack: Optional[str] = None) -> list[dict[str, Any]]:
+        """Runs of the stack (of all stacks if not given), the oldest first."""
+        if stack is not None:
+            return self._stacks.get(stack, [])
+        return [_run for _runs in self._stacks.values() for _run in _runs]
+
+    def append(self, report: dict[str, Any]) -> None:
+        """Persist the summary of the run (only the last `limit` runs are kept)."""
+        self._stacks[report["stack"]] = (self.runs(report["stack"]) + [{
+            "started_at": report["started_at"],
+            "parallel": report["parallel"],
+            "wall_seconds": report["wall_seconds"],
+            "result": report["result"],
+            # Mapping URN -> [type, operation, duration]
+            "operations": {
+                _operation["urn"]: [
+                    _operation["type"], _operation["op"], _operation["duration"]
+                ]
+                for _operation in report["operations"] if _operation["status"] == "succeeded"
+            },
+        }])[-self.limit:]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        _temporary_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        _temporary_path.write_text(json.dumps(self._stacks, indent=1, sort_keys=True))
+        os.replace(_temporary_path, self.path)
+
+    def regressions(self, report: dict[str, Any], tolerance: float = REGRESSION_TOLERANCE,
+                    min_seconds: float = REGRESSION_MIN_SECONDS) -> list[dict[str, Any]]:
+        """Operations of the report slower than the median of the same operations in
+        previous (successful) runs of the stack, by both the tolerance and `min_seconds`."""
+        _previous: dict[tuple[str, str], list[float]] = {}
+        for _run in self.runs(report["stack"]):
+            if _run["result"] != "succeeded":
+                continue
+            for _urn, (_, _op, _duration) in _run["operations"].items():
+                _previous.setdefault((_urn, _op), []).append(_duration)
+        _regressions: list[dict[str, Any]] = []
+        for _operation in report["operations"]:
+            if not (_durations := _previous.get((_operation["urn"], _operation["op"]))):
+                continue
+            _median = statistics.median(_durations)
+            if (
+                    _operation["duration"] > _median * (1 + tolerance)
+                    and _operation["duration"] - _median >= min_seconds
+            ):
+                _regressions.append({
+                    "name": _operation["name"], "op": _operation["op"],
+                    "duration": _operation["duration"], "median": _median,
+                })
+        return _regressions
+
+    def type_durations(self) -> dict[str, float]:
+        """Median durations of creation of resources by type (estimates of the DAG analysis)."""
+        _durations: dict[str, list[float]] = {}
+        for _run in self.runs():
+            for _type, _op, _duration in _run["operations"].values():
+                if _op == automation.OpType.CREATE.value:
+                    _durations.setdefault(_type, []).append(_duration)
+        return {
+            _type: round(statistics.median(_values), 1)
+            for _type, _values in sorted(_durations.items())
+        }
+
+
+def _current_stack() -> str:
+    return subprocess.run(
+        ["pulumi", "stack", "--show-name"], capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+
+def timed_deploy(stack: Optional[str] = None,
+                 parallel: Optional[int] = HeiferConfig.DEPLOY_PARALLEL,
+                 preview: bool = False, refresh: bool = False) -> dict[str, Any]:
+    """Deploy (or preview) the stack and record timings of resource operations.
+
+    The report of a deployment (not of a preview) is appended to the history.
+    Args:
+        stack: Name of the stack (the selected stack by default).
+        parallel: Maximal number of concurrent operations of the engine (default of the
+            engine if not set).
+        preview: Only preview the changes.
+        refresh: Refresh the state before the update.
+    Returns:
+        Timing report (see `ResourceTimings.report`), with regressions.
+    """
+    _stack_name = stack or _current_stack()
+    _stack = automation.select_stack(stack_name=_stack_name, work_dir=str(_PROGRAM_FOLDER))
+    _timings = ResourceTimings()
+    try:
+        if preview:
+            _stack.preview(parallel=parallel, refresh=refresh, on_output=print,
+                           on_event=_timings.on_event)
+        else:
+            _stack.up(parallel=parallel, refresh=refresh, on_output=print,
+                      on_event=_timings.on_event)
+        _result = "succeeded"
+    except automation.CommandError as _error:
+        print(_error, file=sys.stderr)
+        _result = "failed"
+    _timings.finish()
+
+    _report = _timings.report(_stack_name, parallel, _result)
+    if not preview:
+        _history = TimingHistory(HeiferConfig.DEPLOYMENT_TIMING_HISTORY_PATH)
+        _report["regressions"] = _history.regressions(_report)
+        _history.append(_report)
+    return _report
+
+
+if __name__ == "__main__":
+    _parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    _parser.add_argument("--stack", help="Name of the stack (the selected one by default)")
+    _parser.add_argument("--parallel", type=int, default=HeiferConfig.DEPLOY_PARALLEL,
+                         help="Maximal number of concurrent operations of the engine")
+    _parser.add_argument("--preview", action="store_true", help="Only preview the changes")
+    _parser.add_argument("--refresh", action="store_true", help="Refresh the state first")
+    _parser.add_argument("--json", type=pathlib.Path, help="Where to store the JSON report")
+    _parser.add_argument("--gantt", type=pathlib.Path, help="Where to store the Gantt chart")
+    _parser.add_argument("--durations", type=pathlib.Path,
+                         help="Where to store median durations by resource type (history)")
+    _arguments = _parser.parse_args()
+
+    _report = timed_deploy(_arguments.stack, _arguments.parallel, _arguments.preview,
+                           _arguments.refresh)
+    _gantt = format_gantt(_report)
+    print(_gantt)
+    for _regression in _report.get("regressions", []):
+        print(f"Regression: {_regression['name']} ({_regression['op']}) took "
+              f"{_regression['duration']:.1f}s, median {_regression['median']:.1f}s")
+    if _arguments.json:
+        _arguments.json.write_text(json.dumps(_report, indent=2))
+    if _arguments.gantt:
+        _arguments.gantt.write_text(_gantt + "\n")
+    if _arguments.durations:
+        _arguments.durations.write_text(json.dumps(
+            TimingHistory(HeiferConfig.DEPLOYMENT_TIMING_HISTORY_PATH).type_durations(), indent=2
+        ))
+    sys.exit(0 if _report["result"] == "succeeded" else 1)
@@ -0,0 +1,135 @@
+"""Import-time report of providers and other heavy modules used by HeifER.
+
+Each module is imported in a fresh interpreter, its (cold) import time in ms and the growth
+of the peak resident memory in MB are reported. With `--program`, the program is also
+evaluated offline (see `utilities.offline_program`) to report which of the modules it
+actually loads. Results can be compared with a stored baseline to catch regressions.
+
+Usage (from the infrastructure folder):
+    python -m utilities.import_report [--program] [--json REPORT.json]
+                                      [--baseline BASELINE.json] [--tolerance 0.25]
+"""
+import sys
+import json
+import argparse
+import pathlib
+import subprocess
+from typing import Any
+
+# Modules reported by default (providers first)
+DEFAULT_MODULES: list[str] = [
+    "pulumi",
+    "pulumi_azure_native",
+    "pulumi_azure",
+    "pulumi_databricks",
+    "pulumi_azuread",
+    "azure.storage.blob",
+    "azure.identity",
+]
+
+# Script measuring the import of a single module (run in a fresh interpreter)
+_MEASURE_IMPORT_SCRIPT: str = """
+import sys, json, time, resource, importlib
+_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+_start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+print(json.dumps({
+    "ms": (time.perf_counter() - _start) * 1000,
+    "mb": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - _rss) / 1024,
+}))
+"""
+
+# Script evaluating the program offline and listing loaded modules
+_MEASURE_PROGRAM_SCRIPT: str = """
+import sys, json, time, resource
+_start = time.perf_counter()
+from utilities.offline_program import run_program_offline
+run_program_offline()
+print(json.dumps({
+    "ms": (time.perf_counter() - _start) * 1000,
+    "mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": [_module for _module in json.loads(sys.argv[1]) if _module in sys.modules],
+}))
+"""
+
+
+def _run_measurement(arguments: list[str]) -> dict[str, Any]:
+    _result = subprocess.run(
+        [sys.executable, "-c", *arguments], capture_output=True, text=True, check=True,
+        cwd=pathlib.Path(__file__).resolve().parent.parent,
+    )
+    return json.loads(_result.stdout.strip().splitlines()[-1])
+
+
+def measure_imports(modules: list[str]) -> dict[str, dict[str, float]]:
+    """Measure cold import of each module (mapping module -> {"ms", "mb"})."""
+    return {_module: _run_measurement([_MEASURE_IMPORT_SCRIPT, _module]) for _module in modules}
+
+
+def measure_program(modules: list[str]) -> dict[str, Any]:
+    """Evaluate the program offline; returns time, peak memory and loaded modules."""
+    return _run_measurement([_MEASURE_PROGRAM_SCRIPT, json.dumps(modules)])
+
+
+def find_regressions(report: dict[str, Any], baseline: dict[str, Any],
+                     tolerance: float) -> list[str]:
+    """List measurements exceeding the baseline by more than the tolerance (ratio)."""
+    _regressions: list[str] = []
+    _pairs = [
+        (f"import {_module}", _values, baseline.get("imports", {}).get(_module))
+        for _module, _values in report["imports"].items()
+    ]
+    if "program" in report and "program" in baseline:
+        _pairs.append(("program", report["program"], baseline["program"]))
+    for _label, _values, _baseline_values in _pairs:
+        if not _baseline_values:
+            continue
+        for _metric in ("ms", "mb"):
+            if _values[_metric] > _baseline_values[_metric] * (1 + tolerance):
+                _regressions.append(
+                    f"{_label}: {_metric} {_values[_metric]:.1f} > "
+                    f"baseline {_baseline_values[_metric]:.1f}"
+                )
+    if "program" in report and "program" in baseline:
+        if _newly_loaded := set(report["program"]["loaded"]) - set(baseline["program"]["loaded"]):
+            _regressions.append(f"program newly loads: {', '.join(sorted(_newly_loaded))}")
+    return _regressions
+
+
+def format_report(report: dict[str, Any]) -> str:
+    _lines = [f"{'Module':<24}{'ms':>10}{'MB':>10}"]
+    for _module, _values in report["imports"].items():
+        _lines.append(f"{_module:<24}{_values['ms']:>10.0f}{_values['mb']:>10.1f}")
+    if "program" in report:
+        _lines += [
+            "",
+            f"Program evaluation: {report['program']['ms']:.0f} ms, "
+            f"peak {report['program']['mb']:.1f} MB",
+            f"Loaded: {', '.join(report['program']['loaded']) or '-'}",
+        ]
+    return "\n".join(_lines)
+
+
+if __name__ == "__main__":
+    _parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    _parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    _parser.add_argument("--program", action="store_true",
+                         help="Evaluate the program offline and list loaded modules")
+    _parser.add_argument("--json", type=pathlib.Path, help="Where to store the JSON report")
+    _parser.add_argument("--baseline", type=pathlib.Path, help="JSON report to compare with")
+    _parser.add_argument("--tolerance", type=float, default=0.25,
+                         help="Allowed relative growth over the baseline")
+    _arguments = _parser.parse_args()
+
+    _report: dict[str, Any] = {"imports": measure_imports(_arguments.modules)}
+    if _arguments.program:
+        _report["program"] = measure_program(_arguments.modules)
+    if _arguments.json:
+        _arguments.json.write_text(json.dumps(_report, indent=2))
+    print(format_report(_report))
+    if _arguments.baseline:
+        if _regressions := find_regressions(
+                _report, json.loads(_arguments.baseline.read_text()), _arguments.tolerance
+        ):
+            print("\nRegressions:\n  " + "\n  ".join(_regressions))
+            sys.exit(1)
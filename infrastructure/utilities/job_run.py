@@ -0,0 +1,154 @@
+"""Run of a Databricks job as a part of the deployment (e.g. bootstrap of state tables).
+
+The job is started (`run-now`) once the resource is created, and again whenever its revision
+changes (e.g. a hash of the code it runs); the deployment waits for the run to finish (with
+exponential backoff, see `wait_until_ready`) and fails if the run does not succeed.
+
+Endpoints are parameters, so the polling logic can be tested against a local stand-in
+HTTP server (see `run_job`).
+"""
+import json
+import urllib.error
+import urllib.request
+from typing import Any, Callable, Optional
+
+import pulumi
+import pulumi.dynamic
+
+from utilities.workspace_readiness import cached_token, wait_until_ready
+
+# Application ID of Azure Databricks (scope of Azure AD tokens for workspaces)
+_DATABRICKS_SCOPE: str = "2ff814a6-3304-4ab8-85cb-cd0e6f879c1d/.default"
+# Final life cycle states of a run (see the Jobs API)
+_FINAL_STATES: tuple[str, ...] = ("TERMINATED", "SKIPPED", "INTERNAL_ERROR")
+
+
+def _api_request(url: str, access_token: str, workspace_id: Optional[str] = None,
+                 payload: Optional[dict[str, Any]] = None,
+                 request_timeout: float = 30.0) -> dict[str, Any]:
+    """Perform GET (POST with the payload) request to the Databricks API and return its answer.
+    Raises:
+        RuntimeError: If the API answers with an error.
+    """
+    _request = urllib.request.Request(
+        url, data=json.dumps(payload).encode() if payload is not None else None,
+        method="POST" if payload is not None else "GET",
+    )
+    _request.add_header("Authorization", f"Bearer {access_token}")
+    _request.add_header("Content-Type", "application/json")
+    if workspace_id:
+        # Lets principals not yet added to the workspace (but contributors of it) in
+        _request.add_header("X-Databricks-Azure-Workspace-Resource-Id", workspace_id)
+    try:
+        with urllib.request.urlopen(_request, timeout=request_timeout) as _response:
+            return json.loads(_response.read() or b"{}")
+    except urllib.error.HTTPError as _error:
+        raise RuntimeError(f"Databricks API error {_error.code}: {_error.read()[:500]!r}")
+
+
+def run_job(workspace_url: str, job_id: int, access_token: Callable[[], str],
+            workspace_id: Optional[str] = None, timeout: float = 1800.0,
+            initial_delay: float = 15.0, max_delay: float = 60.0) -> dict[str, Any]:
+    """Start the job and wait for its run to finish.
+    Args:
+        workspace_url: URL (or host name) of the workspace.
+        job_id: ID of the job.
+        access_token: Function returning a token for the workspace (called for each request).
+        workspace_id: ARM resource ID of the workspace (optional).
+        timeout: Ceiling (in seconds) for the whole run.
+        initial_delay: First delay between polls (doubled after each poll).
+        max_delay: Maximal delay between two polls.
+    Returns:
+        ID of the run and its duration (in seconds).
+    Raises:
+        RuntimeError: If the run does not succeed.
+        TimeoutError: If the run does not finish within the timeout.
+    """
+    if "://" not in workspace_url:
+        workspace_url = f"https://{workspace_url}"
+    _api = f"{workspace_url.rstrip('/')}/api/2.1/jobs"
+    _run_id = _api_request(
+        f"{_api}/run-now", access_token(), workspace_id, {"job_id": int(job_id)}
+    )["run_id"]
+    _state: dict[str, Any] = {}
+
+    def _finished() -> bool:
+        _state.update(_api_request(
+            f"{_api}/runs/get?run_id={_run_id}", access_token(), workspace_id
+        ).get("state", {}))
+        return _state.get("life_cycle_state") in _FINAL_STATES
+
+    _duration = wait_until_ready(_finished, timeout, initial_delay, max_delay)
+    if _state.get("result_state") != "SUCCESS":
+        raise RuntimeError(
+            f"Run {_run_id} of job {job_id} did not succeed: {_state.get('result_state')} "
+            f"({_state.get('state_message', '')})"
+        )
+    return {"run_id": _run_id, "run_seconds": round(_duration, 1)}
+
+
+class DatabricksJobRunProvider(pulumi.dynamic.ResourceProvider):
+    """Dynamic provider that runs the job when created (or when its revision changes)."""
+    def _run(self, props: dict[str, Any]) -> dict[str, Any]:
+        # Imported here as the token is needed only during the actual deployment
+        from azure.identity import DefaultAzureCredential
+        return props | run_job(
+            props["workspace_url"], props["job_id"],
+            cached_token(DefaultAzureCredential(), _DATABRICKS_SCOPE),
+            workspace_id=props["workspace_id"],
+            timeout=float(props["timeout"]),
+        )
+
+    def create(self, props: dict[str, Any]) -> pulumi.dynamic.CreateResult:
+        _outs = self._run(props)
+        return pulumi.dynamic.CreateResult(id_=str(_outs["run_id"]), outs=_outs)
+
+    def diff(self, _id: str, olds: dict[str, Any],
+             news: dict[str, Any]) -> pulumi.dynamic.DiffResult:
+        # The job is run again only if it (or what it runs) changed
+        _changes = [
+            _key for _key in ("workspace_url", "job_id", "revision")
+            if str(olds.get(_key)) != str(news.get(_key))
+        ]
+        return pulumi.dynamic.DiffResult(changes=bool(_changes), replaces=[])
+
+    def update(self, _id: str, _olds: dict[str, Any],
+               news: dict[str, Any]) -> pulumi.dynamic.UpdateResult:
+        return pulumi.dynamic.UpdateResult(outs=self._run(news))
+
+
+class DatabricksJobRun(pulumi.dynamic.Resource):
+    """Resource that is created (updated) once a run of the Databricks job succeeds.
+    Args:
+        resource_name: Name of the resource.
+        workspace_id: ARM resource ID of the workspace.
+        workspace_url: URL (host name) of the workspace.
+        job_id: ID of the job.
+        revision: Value whose change makes the job run again (e.g. hash of its code).
+        timeout: Ceiling (in seconds) for the run.
+        opts: Options of the resource.
+    Note:
+        The deployer (DefaultAzureCredential) needs to be allowed to run the job, e.g. as a
+        contributor of the workspace (see the workspace stage).
+    """
+    run_id: pulumi.Output[int]
+    run_seconds: pulumi.Output[float]
+
+    def __init__(self, resource_name: str, workspace_id: pulumi.Input[str],
+                 workspace_url: pulumi.Input[str], job_id: pulumi.Input[str],
+                 revision: pulumi.Input[str], timeout: float = 1800.0,
+                 opts: Optional[pulumi.ResourceOptions] = None):
+        super().__init__(
+            DatabricksJobRunProvider(),
+            resource_name,
+            {
+                "workspace_id": workspace_id,
+                "workspace_url": workspace_url,
+                "job_id": job_id,
+                "revision": revision,
+                "timeout": timeout,
+                "run_id": None,
+                "run_seconds": None,
+            },
+            opts,
+        )
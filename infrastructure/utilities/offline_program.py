@@ -0,0 +1,167 @@
+"""Offline evaluation of the HeifER Pulumi program (no Azure credentials, no engine).
+
+The program (`__main__.py`) is run under Pulumi mocks; resources just echo their inputs
+(plus fake values of outputs computed by Azure, like workspace URL). The monitor records
+every registered resource with its explicit (`depends_on`) and implicit (via Outputs)
+dependencies and counts RPC calls, so the program can be analysed and benchmarked.
+The program is evaluated as a preview (dry run), so no side effects (like the staged
+upload of artifacts) are triggered.
+
+Note:
+    Pulumi runtime settings are global, so run only one program per process.
+"""
+import os
+import sys
+import runpy
+import pathlib
+import collections
+from typing import Any, Optional
+
+import pulumi
+import pulumi.runtime
+import pulumi.runtime.resource
+from pulumi.runtime.mocks import MockMonitor
+from pulumi.runtime.stack import wait_for_rpcs
+from pulumi.runtime.sync_await import _sync_await
+
+# Path to the HeifER program
+PROGRAM_PATH: pathlib.Path = pathlib.Path(__file__).resolve().parent.parent / "__main__.py"
+
+
+class HeiferMocks(pulumi.runtime.Mocks):
+    """Mocks of providers used by HeifER; resources echo their inputs."""
+    # Fake values of outputs that are computed by Azure (mapping: type -> outputs)
+    COMPUTED_OUTPUTS: dict[str, dict[str, Any]] = {
+        "azure-native:databricks:Workspace": {
+            "workspaceUrl": "adb-0000000000000000.0.azuredatabricks.net",
+            "workspaceId": "0000000000000000",
+        },
+        "azuread:index/applicationRegistration:ApplicationRegistration": {
+            "clientId": "00000000-0000-0000-0000-000000000000",
+        },
+        "azuread:index/applicationPassword:ApplicationPassword": {"value": "offline-secret"},
+        "azure:datafactory/factory:Factory": {
+            "identity": {"type": "SystemAssigned",
+                         "principalId": "00000000-0000-0000-0000-000000000000"},
+        },
+        # Outputs of the upstream stack (when only the pipelines stage is deployed)
+        "pulumi:pulumi:StackReference": {
+            "outputs": {
+                "resource_group_name": "rg-heifer-offline",
+                "storage_account_name": "heiferoffline",
+                "libraries_container_name": "libraries",
+                "data_factory_id": "/subscriptions/00000000-0000-0000-0000-000000000000/"
+                                   "resourceGroups/rg-heifer-offline/providers/"
+                                   "Microsoft.DataFactory/factories/adf-heifer-offline",
+            },
+        },
+    }
+    # Fake results of invokes (mapping: token -> result)
+    INVOKE_RESULTS: dict[str, dict[str, Any]] = {
+        "azure-native:authorization:getClientConfig": {
+            "clientId": "00000000-0000-0000-0000-000000000000",
+            "objectId": "00000000-0000-0000-0000-000000000000",
+            "subscriptionId": "00000000-0000-0000-0000-000000000000",
+            "tenantId": "00000000-0000-0000-0000-000000000000",
+        },
+    }
+
+    def new_resource(self, args: pulumi.runtime.MockResourceArgs) -> tuple[str, dict]:
+        _outputs = dict(args.inputs)
+        _outputs.setdefault("name", args.name)
+        _outputs.update(self.COMPUTED_OUTPUTS.get(args.typ, {}))
+        return f"{args.name}-id", _outputs
+
+    def call(self, args: pulumi.runtime.MockCallArgs) -> dict:
+        return self.INVOKE_RESULTS.get(args.token, {})
+
+
+class RecordingMonitor(MockMonitor):
+    """Mock monitor recording registered resources, their dependencies and RPC calls."""
+    def __init__(self, mocks: pulumi.runtime.Mocks):
+        super().__init__(mocks)
+        # Registered resources (in order of registration)
+        self.registrations: list[dict[str, Any]] = []
+        # Mapping (type, name) -> URNs listed in `depends_on`
+        self.explicit_dependencies: dict[tuple[str, str], set[str]] = {}
+        # Number of calls per RPC method
+        self.rpc_calls: collections.Counter = collections.Counter()
+
+    def RegisterResource(self, request):  # noqa: N802
+        self.rpc_calls["RegisterResource"] += 1
+        _response = super().RegisterResource(request)
+        _implicit: set[str] = set()
+        for _property_dependencies in request.propertyDependencies.values():
+            _implicit |= set(_property_dependencies.urns)
+        self.registrations.append({
+            "urn": _response.urn,
+            "type": request.type,
+            "name": request.name,
+            "parent": request.parent,
+            "dependencies": set(request.dependencies),
+            "implicit": _implicit,
+        })
+        return _response
+
+    def Invoke(self, request):  # noqa: N802
+        self.rpc_calls["Invoke"] += 1
+        return super().Invoke(request)
+
+    def ReadResource(self, request):  # noqa: N802
+        self.rpc_calls["ReadResource"] += 1
+        return super().ReadResource(request)
+
+    def RegisterResourceOutputs(self, request):  # noqa: N802
+        self.rpc_calls["RegisterResourceOutputs"] += 1
+        return super().RegisterResourceOutputs(request)
+
+    def explicit_for(self, registration: dict[str, Any]) -> set[str]:
+        """URNs the resource explicitly depends on (listed in `depends_on`)."""
+        return self.explicit_dependencies.get(
+            (registration["type"], registration["name"]),
+            # Fallback: dependencies that are not implied by any property
+            registration["dependencies"] - registration["implicit"],
+        )
+
+
+def run_program_offline(program_path: pathlib.Path = PROGRAM_PATH,
+                        mocks: Optional[pulumi.runtime.Mocks] = None,
+                        stack: str = "offline") -> RecordingMonitor:
+    """Evaluate the Pulumi program under mocks and wait for all registrations.
+    Args:
+        program_path: Path to the program (`__main__.py`).
+        mocks: Mocks to use (HeiferMocks by default).
+        stack: Name of the stack.
+    Returns:
+        Monitor with recorded resources and RPC calls.
+    """
+    _monitor = RecordingMonitor(mocks or HeiferMocks())
+    pulumi.runtime.set_mocks(
+        _monitor.mocks, project="heifer", stack=stack, preview=True, monitor=_monitor
+    )
+
+    # Record resources listed in `depends_on` (these are merged with implicit dependencies
+    #   in the registration request, so they cannot be told apart there)
+    _resolve_depends_on_urns = pulumi.runtime.resource._resolve_depends_on_urns
+
+    async def _recording_resolve_depends_on_urns(depends_on, from_resource=None):
+        _urns = await _resolve_depends_on_urns(depends_on, from_resource=from_resource)
+        if from_resource is not None:
+            _monitor.explicit_dependencies[
+                (from_resource.pulumi_resource_type, from_resource.pulumi_resource_name)
+            ] = set(_urns)
+        return _urns
+
+    pulumi.runtime.resource._resolve_depends_on_urns = _recording_resolve_depends_on_urns
+    _working_directory = os.getcwd()
+    try:
+        # Program expects to be run from its directory (relative paths, local packages)
+        os.chdir(program_path.parent)
+        if str(program_path.parent) not in sys.path:
+            sys.path.insert(0, str(program_path.parent))
+        runpy.run_path(str(program_path), run_name="__main__")
+        _sync_await(wait_for_rpcs())
+    finally:
+        os.chdir(_working_directory)
+        pulumi.runtime.resource._resolve_depends_on_urns = _resolve_depends_on_urns
+    return _monitor
@@ -0,0 +1,228 @@
+"""Fast deployment of changed ADF pipelines only (targeted `pulumi up`).
+
+Each pipeline is canonicalised (inputs of its resource, with activities and keys sorted)
+and hashed; hashes are compared with a local manifest of the hashes deployed last time (per
+stack and deployment unit). Only resources of changed, new and removed pipelines (and of
+new, changed or unused artifacts; the staged upload in the STAGED mode) are targeted, so
+Pulumi plans and updates just them, with limited concurrency.
+
+Usage (from the infrastructure folder, with the usual HEIFER_* environment variables):
+    python -m utilities.pipeline_fast_deploy [--stack STACK] [--parallel N] [--preview]
+                                             [--force]
+Note:
+    The manifest reflects only deployments made by this tool; after a deployment from
+    elsewhere (or a full `pulumi up` with changed pipelines), use `--force` once. Manifests
+    written before deployment units were supported are ignored (everything is deployed).
+"""
+import os
+import sys
+import json
+import hashlib
+import pathlib
+import argparse
+import subprocess
+from typing import Any, Optional
+
+from components.pipeline_definitions import (
+    PIPELINE_RESOURCE_PREFIX, artifact_blobs, build_pipelines_artifact_store,
+    load_deployable_pipeline_definitions, pipeline_resource_inputs
+)
+from configurations.config_heifer import HeiferConfig
+from configurations.config_topology import DeploymentUnit, TopologyConfig
+
+# Type tokens of the (parented) resources of the pipelines stage
+_PIPELINE_TYPE: str = "heifer:stages:HeiferPipelines$azure:datafactory/pipeline:Pipeline"
+_BLOB_TYPE: str = "heifer:stages:HeiferPipelines$azure-native:storage:Blob"
+_STAGED_UPLOAD_TYPE: str = "heifer:stages:HeiferPipelines$pulumi-python:dynamic:Resource"
+# Name of the staged upload resource (see HeiferPipelines)
+_STAGED_UPLOAD_NAME: str = "heifer-artifacts-staged-upload"
+
+
+def canonical_pipeline_hash(definition: dict) -> str:
+    """SHA-256 of the canonical form of inputs of the pipeline resource."""
+    _inputs = pipeline_resource_inputs(definition)
+    _inputs["activities_json"] = json.loads(_inputs["activities_json"])
+    return hashlib.sha256(
+        json.dumps(_inputs, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+class DeployedPipelinesManifest:
+    """Hashes of deployed pipelines and deployed artifacts, per stack and deployment unit."""
+    def __init__(self, path: pathlib.Path, stack: str):
+        self.path: pathlib.Path = pathlib.Path(path)
+        self.stack: str = stack
+        self._stacks: dict[str, dict[str, Any]] = {}
+        if self.path.is_file():
+            try:
+                self._stacks = json.loads(self.path.read_text())
+            except (ValueError, OSError):
+                # Corrupted manifest means that everything is deployed again
+                self._stacks = {}
+
+    def _unit(self, unit_name: str) -> dict[str, Any]:
+        return self._stacks.get(self.stack, {}).get("units", {}).get(unit_name, {})
+
+    def pipelines(self, unit_name: str) -> dict[str, str]:
+        """Mapping pipeline name -> hash (as deployed) of the unit."""
+        return self._unit(unit_name).get("pipelines", {})
+
+    def artifacts(self, unit_name: str) -> dict[str, str]:
+        """Mapping blob name -> content address of deployed artifacts of the unit."""
+        return self._unit(unit_name).get("artifacts", {})
+
+    def save(self, units: dict[str, tuple[dict[str, str], dict[str, str]]]) -> None:
+        """Persist the state after a successful deployment.
+        Args:
+            units: Mapping unit name -> (pipelines, artifacts), see `pipelines` and
+                `artifacts`.
+        """
+        self._stacks[self.stack] = {"units": {
+            _unit_name: {"pipelines": _pipelines, "artifacts": _artifacts}
+            for _unit_name, (_pipelines, _artifacts) in units.items()
+        }}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        _temporary_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        _temporary_path.write_text(json.dumps(self._stacks, indent=1, sort_keys=True))
+        os.replace(_temporary_path, self.path)
+
+
+def plan_changes(pipelines: dict[str, str], artifacts: dict[str, str],
+                 deployed_pipelines: dict[str, str], deployed_artifacts: dict[str, str]
+                 ) -> dict[str, list[str]]:
+    """Compare current hashes (and artifacts) with the deployed ones.
+    Args:
+        pipelines: Mapping pipeline name -> hash.
+        artifacts: Mapping blob name -> content address of uploaded artifacts.
+        deployed_pipelines: Pipelines as deployed (see `pipelines`).
+        deployed_artifacts: Artifacts as deployed (see `artifacts`).
+    Returns:
+        Mapping change ('changed', 'added', 'removed', 'artifacts_added',
+        'artifacts_removed') -> sorted names (blob names for artifacts; blobs at former
+        paths with a different content are added again).
+    """
+    return {
+        "changed": sorted(
+            _name for _name, _hash in pipelines.items()
+            if _name in deployed_pipelines and deployed_pipelines[_name] != _hash
+        ),
+        "added": sorted(pipelines.keys() - deployed_pipelines.keys()),
+        "removed": sorted(deployed_pipelines.keys() - pipelines.keys()),
+        "artifacts_added": sorted(
+            _name for _name, _content_address in artifacts.items()
+            if deployed_artifacts.get(_name) != _content_address
+        ),
+        "artifacts_removed": sorted(deployed_artifacts.keys() - artifacts.keys()),
+    }
+
+
+def target_urns(changes: dict[str, list[str]], stack: str, project: str,
+                unit: Optional[DeploymentUnit] = None, staged: bool = False) -> list[str]:
+    """URNs of resources affected by the changes (targets of `pulumi up`).
+    Args:
+        changes: Changes of the unit (see `plan_changes`).
+        stack: Name of the stack (without organization and project).
+        project: Name of the project.
+        unit: Deployment unit (the primary one by default), its resources are prefixed.
+        staged: Whether artifacts are uploaded by the staged upload (STAGED mode).
+    """
+    _unit = unit or TopologyConfig.primary_unit()
+    _prefix = f"urn:pulumi:{stack}::{project}::"
+    _artifacts = changes["artifacts_added"] + changes["artifacts_removed"]
+    if staged:
+        # All artifacts are uploaded (again) by the single resource
+        _artifact_urns = [
+            f"{_prefix}{_STAGED_UPLOAD_TYPE}::{_unit.resource_name(_STAGED_UPLOAD_NAME)}"
+        ] if _artifacts else []
+    else:
+        _artifact_urns = [
+            f"{_prefix}{_BLOB_TYPE}::{_unit.resource_name(_blob_name)}"
+            for _blob_name in _artifacts
+        ]
+    return _artifact_urns + [
+        f"{_prefix}{_PIPELINE_TYPE}::{_unit.resource_name(PIPELINE_RESOURCE_PREFIX + _name)}"
+        for _name in changes["changed"] + changes["added"] + changes["removed"]
+    ]
+
+
+def _current_stack() -> str:
+    return subprocess.run(
+        ["pulumi", "stack", "--show-name"], capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+
+def _project_name() -> str:
+    for _line in pathlib.Path("Pulumi.yaml").read_text().splitlines():
+        if _line.startswith("name:"):
+            return _line.split(":", 1)[1].strip()
+    raise ValueError("Project name not found in Pulumi.yaml")
+
+
+def fast_deploy(stack: Optional[str] = None, parallel: int = HeiferConfig.PIPELINE_DEPLOY_PARALLEL,
+                preview: bool = False, force: bool = False) -> int:
+    """Deploy changed pipelines only.
+    Args:
+        stack: Name of the stack (the selected stack by default).
+        parallel: Maximal number of concurrent operations.
+        preview: Only preview the targeted changes (manifest is not updated).
+        force: Target all pipelines (and artifacts) regardless of the manifest.
+    Returns:
+        Exit code of Pulumi (0 if there is nothing to deploy).
+    """
+    _stack = stack or _current_stack()
+    # Stack in URNs is without organization and project
+    _manifest = DeployedPipelinesManifest(
+        HeiferConfig.PIPELINE_DEPLOY_MANIFEST_PATH, _stack.rsplit("/", 1)[-1]
+    )
+
+    _artifact_objects, _artifact_aliases = build_pipelines_artifact_store()
+    # Artifacts are uploaded only if UPLOAD_LIBRARIES (the store is empty otherwise)
+    _artifacts: dict[str, str] = {
+        _blob_name: _artifact_object['sha256'] for _blob_name, _artifact_object in
+        artifact_blobs(_artifact_objects, _artifact_aliases).items()
+    }
+    _staged = HeiferConfig.ARTIFACT_UPLOAD_MODE == "STAGED"
+    _units: dict[str, tuple[dict[str, str], dict[str, str]]] = {}
+    _targets: list[str] = []
+    for _unit in TopologyConfig.units():
+        _pipelines: dict[str, str] = {
+            _definition['name']: canonical_pipeline_hash(_definition)
+            for _definition in load_deployable_pipeline_definitions(_artifact_aliases, _unit)
+        }
+        _changes = plan_changes(
+            _pipelines, _artifacts,
+            {} if force else _manifest.pipelines(_unit.name),
+            {} if force else _manifest.artifacts(_unit.name),
+        )
+        for _change, _names in _changes.items():
+            for _name in _names:
+                print(f"{_unit.name or 'primary'}: {_change:>18}: {_name}")
+        _units[_unit.name] = (_pipelines, _artifacts)
+        _targets += target_urns(_changes, _manifest.stack, _project_name(), _unit, _staged)
+    if not _targets:
+        print("No pipeline changes")
+        return 0
+
+    _command = [
+        "pulumi", "preview" if preview else "up", "--stack", _stack,
+        "--parallel", str(parallel),
+    ] + ([] if preview else ["--yes", "--skip-preview"])
+    for _target in _targets:
+        _command += ["--target", _target]
+    _return_code = subprocess.run(_command).returncode
+    if _return_code == 0 and not preview:
+        _manifest.save(_units)
+    return _return_code
+
+
+if __name__ == "__main__":
+    _parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    _parser.add_argument("--stack", help="Name of the stack (the selected one by default)")
+    _parser.add_argument("--parallel", type=int, default=HeiferConfig.PIPELINE_DEPLOY_PARALLEL,
+                         help="Maximal number of concurrent operations")
+    _parser.add_argument("--preview", action="store_true", help="Only preview the changes")
+    _parser.add_argument("--force", action="store_true",
+                         help="Deploy all pipelines regardless of the manifest")
+    _arguments = _parser.parse_args()
+    sys.exit(fast_deploy(_arguments.stack, _arguments.parallel, _arguments.preview,
+                         _arguments.force))
@@ -0,0 +1,319 @@
+"""Loader of pipeline definitions (`pipeline.json` files) from the pipelines repository.
+
+All placeholders (keys of the variable registry, like `__CONTAINER_NAME__`) are substituted
+in a single pass, files are read and parsed by a pool of workers and definitions are yielded
+lazily (in a stable order). Parsed definitions are cached on disk, keyed by the hash of the
+file content and the values of variables; only the current entry of each file (and values of
+variables) is kept.
+"""
+import re
+import copy
+import json
+import pickle
+import hashlib
+import pathlib
+import collections
+import concurrent.futures
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+# Change whenever the format of cached definitions changes
+_CACHE_FORMAT_VERSION: str = "2"
+
+
+def discover_pipeline_files(path_to_pipelines: pathlib.Path) -> list[pathlib.Path]:
+    """List all pipeline definition files, following the structure:
+        PATH_TO_PIPELINES/<REPOSITORY>/pipelines/<PIPELINE>/pipeline.json
+    Args:
+        path_to_pipelines: Path to the directory with pipeline repositories.
+    Returns:
+        Sorted list of paths to `pipeline.json` files.
+    """
+    return sorted(
+        _pipeline_file
+        for _pipeline_file in path_to_pipelines.glob("*/pipelines/*/pipeline.json")
+        if _pipeline_file.is_file()
+    )
+
+
+def render_template(text: str, variables: dict[str, str]) -> str:
+    """Substitute all variables (placeholders) in the text in a single pass.
+    Args:
+        text: Template (content of the pipeline definition).
+        variables: Mapping placeholder -> value.
+    Returns:
+        Text with substituted placeholders.
+    """
+    if not variables:
+        return text
+    # Longer placeholders first, so none of them can shadow another one
+    _pattern = re.compile(
+        "|".join(re.escape(_name) for _name in sorted(variables, key=len, reverse=True))
+    )
+    return _pattern.sub(lambda _match: str(variables[_match.group(0)]), text)
+
+
+class PipelineDefinitionCache:
+    """On-disk cache of parsed definitions, keyed by content hash and variable values.
+
+    Keys are prefixed by the hash of the source (path of the file and values of variables), so
+    once the content of the file changes, its former entry is removed. Entries written by older
+    versions (without the prefix) are removed when the cache is opened.
+    """
+    def __init__(self, path: pathlib.Path):
+        self.path: pathlib.Path = pathlib.Path(path)
+        # Entries without a source (written by older versions) are never current
+        for _legacy_path in self.path.glob("*.pickle"):
+            if "-" not in _legacy_path.name:
+                _legacy_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def key(content: bytes, variables: dict[str, str], source: str = "") -> str:
+        """Cache key of the (not yet rendered) file content with given variables."""
+        _variables = json.dumps(variables, sort_keys=True, default=str)
+        _source_digest = hashlib.sha256(f"{source}\n{_variables}".encode()).hexdigest()[:16]
+        _digest = hashlib.sha256(_CACHE_FORMAT_VERSION.encode())
+        _digest.update(_variables.encode())
+        _digest.update(content)
+        return f"{_source_digest}-{_digest.hexdigest()}"
+
+    def get(self, key: str) -> Optional[dict]:
+        try:
+            with open(self.path / f"{key}.pickle", "rb") as _file:
+                return pickle.load(_file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def put(self, key: str, definition: dict) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        _temporary_path = self.path / f"{key}.pickle.tmp"
+        with open(_temporary_path, "wb") as _file:
+            pickle.dump(definition, _file, protocol=pickle.HIGHEST_PROTOCOL)
+        _temporary_path.replace(self.path / f"{key}.pickle")
+        # Former entries of the same source are no longer current
+        _source_digest = key.split("-", 1)[0]
+        for _stale_path in self.path.glob(f"{_source_digest}-*.pickle"):
+            if _stale_path.name != f"{key}.pickle":
+                _stale_path.unlink(missing_ok=True)
+
+
+def load_pipeline_definition(
+        pipeline_file: pathlib.Path, variables: dict[str, str],
+        cache: Optional[PipelineDefinitionCache] = None
+) -> dict:
+    """Read, render and parse a single pipeline definition (using cache if provided)."""
+    _content: bytes = pipeline_file.read_bytes()
+    _key: Optional[str] = None
+    if cache is not None:
+        _key = cache.key(_content, variables, str(pipeline_file.resolve()))
+        if (_definition := cache.get(_key)) is not None:
+            return _definition
+    _definition = json.loads(render_template(_content.decode("utf-8"), variables))
+    if cache is not None:
+        cache.put(_key, _definition)
+    return _definition
+
+
+def load_pipeline_definitions(
+        pipeline_files: Iterable[pathlib.Path], variables: dict[str, str],
+        cache: Optional[PipelineDefinitionCache] = None, max_workers: int = 8
+) -> Iterator[dict]:
+    """Lazily yield parsed pipeline definitions (in order of files), loaded in parallel.
+
+    At most `2 * max_workers` definitions are loaded in advance, so the whole set of
+    definitions does not need to be kept in memory.
+    Args:
+        pipeline_files: Paths to `pipeline.json` files.
+        variables: Mapping placeholder -> value (the variable registry).
+        cache: Optional cache of parsed definitions.
+        max_workers: Number of workers reading and parsing files.
+    Yields:
+        Parsed pipeline definitions.
+    """
+    _pipeline_files = iter(pipeline_files)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as _pool:
+        _pending: collections.deque = collections.deque()
+        for _pipeline_file in _pipeline_files:
+            _pending.append(
+                _pool.submit(load_pipeline_definition, _pipeline_file, variables, cache)
+            )
+            if len(_pending) >= 2 * max_workers:
+                yield _pending.popleft().result()
+        while _pending:
+            yield _pending.popleft().result()
+
+
+def rewrite_linked_service(definition: Any, source: str, target: str) -> Any:
+    """Point activities using the `source` linked service to the `target` one.
+
+    Nested activities (e.g. in ForEach or IfCondition) are rewritten as well.
+    Args:
+        definition: Parsed pipeline definition (or any of its parts).
+        source: Name of the linked service to be replaced.
+        target: Name of the linked service to be used instead.
+    Returns:
+        Rewritten copy of the definition (the original one is not modified).
+    """
+    if isinstance(definition, list):
+        return [rewrite_linked_service(_item, source, target) for _item in definition]
+    if not isinstance(definition, dict):
+        return definition
+    _rewritten = {
+        _key: rewrite_linked_service(_value, source, target)
+        for _key, _value in definition.items()
+    }
+    _reference = _rewritten.get("linkedServiceName")
+    if isinstance(_reference, dict) and _reference.get("referenceName") == source:
+        _rewritten["linkedServiceName"] = _reference | {"referenceName": target}
+    return _rewritten
+
+
+def executed_pipelines(definition: Any) -> set[str]:
+    """Names of pipelines executed by the pipeline (Execute Pipeline activities, nested too)."""
+    if isinstance(definition, list):
+        return set().union(*(executed_pipelines(_item) for _item in definition))
+    if not isinstance(definition, dict):
+        return set()
+    _executed = set().union(*(executed_pipelines(_value) for _value in definition.values()))
+    if definition.get("type") == "ExecutePipeline":
+        _executed.add(definition["typeProperties"]["pipeline"]["referenceName"])
+    return _executed
+
+
+def order_by_executed_pipelines(definitions: Iterable[dict]) -> list[dict]:
+    """Order definitions so that executed pipelines precede pipelines executing them.
+
+    The original order is kept otherwise; pipelines not among the definitions are ignored.
+    Raises:
+        ValueError: If pipelines execute each other (in a cycle).
+    """
+    _definitions = {_definition["name"]: _definition for _definition in definitions}
+    _ordered: dict[str, dict] = {}
+    _visiting: set[str] = set()
+
+    def _visit(name: str) -> None:
+        if name in _ordered:
+            return
+        if name in _visiting:
+            raise ValueError(f"Pipeline '{name}' executes itself (through Execute Pipeline)")
+        _visiting.add(name)
+        for _executed in sorted(executed_pipelines(_definitions[name]) & set(_definitions)):
+            _visit(_executed)
+        _visiting.discard(name)
+        _ordered[name] = _definitions[name]
+
+    for _name in _definitions:
+        _visit(_name)
+    return list(_ordered.values())
+
+
+def append_execute_pipeline(definition: dict, activity_name: str, pipeline_name: str,
+                            parameters: Optional[dict[str, Any]] = None) -> dict:
+    """Execute the pipeline once all (top-level) activities of the definition succeed.
+    Args:
+        definition: Parsed pipeline definition.
+        activity_name: Name of the new Execute Pipeline activity.
+        pipeline_name: Name of the pipeline to be executed (and waited for).
+        parameters: Parameters of the executed pipeline (its defaults if not given).
+    Returns:
+        Extended copy of the definition (the original one is not modified).
+    """
+    _activities: list[dict] = definition['properties']['activities']
+    _predecessors = {
+        _dependency["activity"] for _activity in _activities
+        for _dependency in _activity.get("dependsOn", [])
+    }
+    return definition | {"properties": definition['properties'] | {"activities": _activities + [{
+        "name": activity_name,
+        "type": "ExecutePipeline",
+        # Only the last activities (no other activity depends on them)
+        "dependsOn": [
+            {"activity": _activity["name"], "dependencyConditions": ["Succeeded"]}
+            for _activity in _activities if _activity["name"] not in _predecessors
+        ],
+        "typeProperties": {
+            "pipeline": {"referenceName": pipeline_name, "type": "PipelineReference"},
+            "waitOnCompletion": True,
+            "parameters": parameters or {},
+        },
+    }]}}
+
+
+# Keys of nested activities of control activities (ForEach, Until, IfCondition, Switch)
+NESTED_ACTIVITIES_KEYS: tuple[str, ...] = (
+    "activities", "ifTrueActivities", "ifFalseActivities", "defaultActivities"
+)
+# Block size of Copy activities (property of the sink store settings, see CopyPerformance)
+BLOCK_SIZE_PROPERTY: str = "sink.storeSettings.blockSizeInMB"
+# Types of sink store settings with a block size (blob stores)
+BLOCK_SIZE_STORE_SETTINGS_TYPES: frozenset[str] = frozenset({
+    "AzureBlobStorageWriteSettings", "AzureBlobFSWriteSettings",
+})
+
+
+def iterate_activities(activities: list[dict]) -> Iterator[dict]:
+    """All activities including nested ones (depth-first)."""
+    for _activity in activities:
+        yield _activity
+        _type_properties = _activity.get("typeProperties", {})
+        for _key in NESTED_ACTIVITIES_KEYS:
+            yield from iterate_activities(_type_properties.get(_key, []))
+        for _case in _type_properties.get("cases", []):
+            yield from iterate_activities(_case.get("activities", []))
+
+
+def supports_block_size(activity: dict) -> bool:
+    """Whether the sink of the Copy activity writes to a blob store (has a block size)."""
+    _sink = activity.get("typeProperties", {}).get("sink") or {}
+    return (_sink.get("storeSettings") or {}).get("type") in BLOCK_SIZE_STORE_SETTINGS_TYPES
+
+
+def rewrite_copy_activities(definition: dict,
+                            properties: Callable[[str], dict[str, Any]]) -> dict:
+    """Set properties of Copy activities (including nested ones).
+    Args:
+        definition: Parsed pipeline definition.
+        properties: Mapping name of the activity -> properties of its `typeProperties`
+            to be set (dotted keys, like 'sink.storeSettings.blockSizeInMB', set nested ones;
+            the block size is set only for sinks writing to blob stores).
+    Returns:
+        Rewritten copy of the definition (the original one is not modified).
+    """
+    _definition = copy.deepcopy(definition)
+    for _activity in iterate_activities(_definition['properties']['activities']):
+        if _activity.get("type") != "Copy":
+            continue
+        for _key, _value in properties(_activity["name"]).items():
+            if _key == BLOCK_SIZE_PROPERTY and not supports_block_size(_activity):
+                # Store settings of other sinks have no block size (nor would have a type)
+                continue
+            _node = _activity.setdefault("typeProperties", {})
+            *_parents, _leaf = _key.split(".")
+            for _parent in _parents:
+                _node = _node.setdefault(_parent, {})
+            _node[_leaf] = _value
+    return _definition
+
+
+def copy_activities_settings(definition: dict) -> dict[str, dict[str, Any]]:
+    """Performance settings of Copy activities (None where ADF decides, i.e. 'Auto').
+    Returns:
+        Mapping name of the activity -> settings (data integration units, parallel copies,
+        staging and block size).
+    """
+    _settings: dict[str, dict[str, Any]] = {}
+    for _activity in iterate_activities(definition['properties']['activities']):
+        if _activity.get("type") != "Copy":
+            continue
+        _type_properties = _activity.get("typeProperties", {})
+        _staging = _type_properties.get("stagingSettings") or {}
+        _settings[_activity["name"]] = {
+            "dataIntegrationUnits": _type_properties.get("dataIntegrationUnits"),
+            "parallelCopies": _type_properties.get("parallelCopies"),
+            "enableStaging": _type_properties.get("enableStaging", False),
+            "stagingLinkedService": _staging.get("linkedServiceName", {}).get("referenceName"),
+            "stagingPath": _staging.get("path"),
+            "blockSizeInMB": (
+                _type_properties.get("sink", {}).get("storeSettings", {}).get("blockSizeInMB")
+            ),
+        }
+    return _settings
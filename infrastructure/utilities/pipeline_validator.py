@@ -0,0 +1,292 @@
+"""Validation of pipeline definitions before any provider is contacted.
+
+All deployable pipelines (generated by HeifER and from the pipelines repository) are parsed
+and an index of their references (linked services, datasets, executed pipelines, parameters
+and artifacts) is built. References are checked against what HeifER provisions with the
+current configuration (and HEIFER_PIPELINE_EXTERNAL_REFERENCES_COMMA_SEPARATED), so a broken
+`pipeline.json` fails the deployment before any resource is updated. Only the configuration
+and the pipelines tree are read (artifacts are not hashed). Pipelines selected by deployment
+units (see TopologyConfig) have to be deployable as well.
+
+Usage (from the infrastructure folder, with the usual HEIFER_* environment variables):
+    python -m utilities.pipeline_validator [--json INDEX.json]
+The exit code is 1 if there are any errors.
+"""
+import re
+import sys
+import json
+import argparse
+import pathlib
+from typing import Any, Iterator
+
+from components.pipeline_definitions import (
+    deployable_pipeline_definition, generated_pipeline_definitions,
+    provisioned_datasets, provisioned_linked_services
+)
+from configurations.config_heifer import HeiferConfig
+from configurations.config_topology import TopologyConfig
+from utilities.artifact_store import artifact_references, discover_upload_files_paths
+from utilities.pipeline_loader import (
+    NESTED_ACTIVITIES_KEYS, PipelineDefinitionCache, discover_pipeline_files,
+    iterate_activities, load_pipeline_definition
+)
+
+# Kinds of references in the index (references of the same type, like 'DatasetReference')
+_REFERENCE_TYPES: dict[str, str] = {
+    "LinkedServiceReference": "linked_services",
+    "DatasetReference": "datasets",
+    "PipelineReference": "pipelines",
+}
+# Parameters in expressions, either `pipeline().parameters.NAME` or `...parameters['NAME']`
+_PARAMETER_PATTERN: re.Pattern = re.compile(
+    r"pipeline\(\)\s*\.\s*parameters\s*(?:\.\s*(\w+)|\[\s*'([^']+)'\s*\])"
+)
+
+
+def definition_errors(definition: Any) -> list[str]:
+    """Errors in the structure of the parsed definition that prevent indexing its activities."""
+    if not isinstance(definition, dict) or not isinstance(definition.get("name"), str):
+        return ["missing 'name' of the pipeline"]
+    _properties = definition.get("properties")
+    if not isinstance(_properties, dict):
+        return ["missing 'properties'"]
+    _activities = _properties.get("activities")
+    if not isinstance(_activities, list) or not all(
+            isinstance(_activity, dict) for _activity in _activities
+    ):
+        return ["missing 'properties.activities' (list of activities)"]
+    if _invalid_activities := [
+        str(_activity.get("name", "?")) for _activity in iterate_activities(_activities)
+        if not (_activity.get("name") and _activity.get("type"))
+    ]:
+        return [f"activities without 'name' or 'type': {', '.join(_invalid_activities)}"]
+    _names = [_activity["name"] for _activity in iterate_activities(_activities)]
+    if _duplicates := sorted({_name for _name in _names if _names.count(_name) > 1}):
+        return [f"duplicate names of activities: {', '.join(_duplicates)}"]
+    return []
+
+
+def parameters_errors(definition: dict) -> list[str]:
+    """Errors in parameters of the definition (each needs a default value when deployed)."""
+    _parameters = definition['properties'].get("parameters")
+    if not isinstance(_parameters, dict):
+        return ["missing 'properties.parameters' (use {} for no parameters)"]
+    if _without_default := sorted(
+            _name for _name, _parameter in _parameters.items()
+            if not isinstance(_parameter, dict) or "defaultValue" not in _parameter
+    ):
+        return [f"parameters without 'defaultValue': {', '.join(_without_default)}"]
+    return []
+
+
+def _references(node: Any) -> Iterator[tuple[str, str]]:
+    """References (kind, name) in the node; nested activities are left out."""
+    if isinstance(node, str):
+        for _match in _PARAMETER_PATTERN.finditer(node):
+            yield "parameters", _match.group(1) or _match.group(2)
+        for _alias in artifact_references(
+                node, HeiferConfig.LIBRARIES_CONTAINER, HeiferConfig.STORAGE_ACCOUNT_NAME
+        ):
+            yield "artifacts", _alias
+    elif isinstance(node, list):
+        for _item in node:
+            yield from _references(_item)
+    elif isinstance(node, dict):
+        _reference_name = node.get("referenceName")
+        # Names given by expressions are resolved by ADF at run time
+        if (
+                node.get("type") in _REFERENCE_TYPES and isinstance(_reference_name, str)
+                and not _reference_name.startswith("@")
+        ):
+            yield _REFERENCE_TYPES[node["type"]], _reference_name
+        for _key, _value in node.items():
+            if _key not in NESTED_ACTIVITIES_KEYS and _key != "cases":
+                yield from _references(_value)
+
+
+def build_reference_index(definitions: list[dict]) -> dict[str, dict[str, list[str]]]:
+    """Index of references of the pipelines.
+    Args:
+        definitions: Parsed (structurally valid) pipeline definitions.
+    Returns:
+        Mapping kind ('linked_services', 'datasets', 'pipelines', 'artifacts',
+        'parameters') -> name -> referencing activities ('<PIPELINE>/<ACTIVITY>');
+        parameters are named '<PIPELINE>.<PARAMETER>'.
+    """
+    _index: dict[str, dict[str, list[str]]] = {
+        _kind: {} for _kind in [*_REFERENCE_TYPES.values(), "artifacts", "parameters"]
+    }
+    for _definition in definitions:
+        for _activity in iterate_activities(_definition['properties']['activities']):
+            _location = f"{_definition['name']}/{_activity['name']}"
+            for _kind, _name in _references(_activity):
+                if _kind == "parameters":
+                    _name = f"{_definition['name']}.{_name}"
+                if _location not in (_locations := _index[_kind].setdefault(_name, [])):
+                    _locations.append(_location)
+    return _index
+
+
+def _unresolved_references(references_by_name: dict[str, list[str]], available: set[str],
+                           description: str) -> list[str]:
+    """Errors of references (name -> referencing activities) to names not available."""
+    return [
+        f"{description}: '{_name}' (referenced by {', '.join(_locations)})"
+        for _name, _locations in references_by_name.items() if _name not in available
+    ]
+
+
+def linked_service_errors(index: dict[str, dict[str, list[str]]],
+                          linked_services: set[str]) -> list[str]:
+    """Errors of references to linked services neither provisioned nor external."""
+    return _unresolved_references(
+        index["linked_services"], linked_services | HeiferConfig.PIPELINE_EXTERNAL_REFERENCES,
+        "Linked service not provisioned by HeifER"
+    )
+
+
+def dataset_errors(index: dict[str, dict[str, list[str]]], datasets: set[str]) -> list[str]:
+    """Errors of references to datasets neither provisioned nor external."""
+    return _unresolved_references(
+        index["datasets"], datasets | HeiferConfig.PIPELINE_EXTERNAL_REFERENCES,
+        "Dataset not provisioned by HeifER"
+    )
+
+
+def pipeline_errors(index: dict[str, dict[str, list[str]]], pipeline_names: set[str]) -> list[str]:
+    """Errors of executed pipelines neither deployed nor external."""
+    return _unresolved_references(
+        index["pipelines"], pipeline_names | HeiferConfig.PIPELINE_EXTERNAL_REFERENCES,
+        "Pipeline not deployed by HeifER"
+    )
+
+
+def artifact_errors(index: dict[str, dict[str, list[str]]]) -> list[str]:
+    """Errors of artifacts missing in the pipelines repository (content addresses refer to
+    already deduplicated artifacts, so they are not checked)."""
+    _available = {
+        pathlib.PurePath(_upload_file_path["abfss_path"]).as_posix()
+        for _upload_file_path in discover_upload_files_paths(
+            HeiferConfig.PATH_TO_PIPELINES, HeiferConfig.PATH_TO_PIPELINES_UPLOAD_FOLDER
+        )
+    }
+    return _unresolved_references(
+        {
+            _name: _locations for _name, _locations in index["artifacts"].items()
+            if not _name.startswith("sha256/")
+        },
+        _available, "Artifact not found in the pipelines repository"
+    )
+
+
+def parameter_errors(index: dict[str, dict[str, list[str]]], definitions: list[dict]) -> list[str]:
+    """Errors of parameters not declared by the pipeline using them."""
+    _declared = {
+        f"{_definition['name']}.{_parameter}" for _definition in definitions
+        if isinstance(_definition['properties'].get("parameters"), dict)
+        for _parameter in _definition['properties']['parameters']
+    }
+    return _unresolved_references(
+        index["parameters"], _declared, "Parameter not declared by the pipeline"
+    )
+
+
+def _load_definitions() -> tuple[list[dict], list[str]]:
+    """Deployable definitions (generated and from the pipelines repository) and errors."""
+    _errors: list[str] = []
+    _definitions: list[dict] = []
+    try:
+        _definitions += generated_pipeline_definitions()
+    except ValueError as _error:
+        _errors.append(f"Pipelines generated by HeifER: {_error}")
+
+    _cache = PipelineDefinitionCache(HeiferConfig.PIPELINE_CACHE_PATH)
+    for _pipeline_file in discover_pipeline_files(HeiferConfig.PATH_TO_PIPELINES):
+        try:
+            _definition = load_pipeline_definition(
+                _pipeline_file, HeiferConfig.PIPELINE_TEMPLATE_VARIABLES, _cache
+            )
+        except (OSError, ValueError) as _error:
+            _errors.append(f"{_pipeline_file}: cannot be parsed ({_error})")
+            continue
+        if _structure_errors := definition_errors(_definition):
+            _errors += [f"{_pipeline_file}: {_error}" for _error in _structure_errors]
+            continue
+        # References of the pipeline are checked even if its parameters are invalid
+        _errors += [f"{_pipeline_file}: {_error}" for _error in parameters_errors(_definition)]
+        try:
+            # Artifact references are kept as they are (aliases are checked later)
+            _deployable_definition = deployable_pipeline_definition(_definition, {})
+        except ValueError as _error:
+            _errors.append(f"{_pipeline_file}: {_error}")
+            continue
+        if _deployable_definition is not None:
+            _definitions.append(_deployable_definition)
+    return _definitions, _errors
+
+
+def _pipeline_names_errors(pipeline_names: list[str]) -> list[str]:
+    """Errors of duplicate pipelines and of pipelines selected by units but not deployable."""
+    _errors: list[str] = []
+    if _duplicates := sorted({
+        _name for _name in pipeline_names if pipeline_names.count(_name) > 1
+    }):
+        _errors.append(f"Duplicate names of pipelines: {', '.join(_duplicates)}")
+    try:
+        for _unit in TopologyConfig.units():
+            if _unknown_pipelines := sorted((_unit.pipelines or set()) - set(pipeline_names)):
+                _errors.append(
+                    f"Deployment unit '{_unit.name}' deploys pipelines that are not "
+                    f"deployable: {', '.join(_unknown_pipelines)}"
+                )
+    except ValueError as _error:
+        _errors.append(f"Topology of deployment units: {_error}")
+    return _errors
+
+
+def validate_pipelines() -> tuple[dict[str, dict[str, list[str]]], list[str]]:
+    """Validate all deployable pipelines against what HeifER provisions.
+    Returns:
+        Index of references (see `build_reference_index`) and errors (empty if valid).
+    """
+    _definitions, _errors = _load_definitions()
+    _pipeline_names = [_definition['name'] for _definition in _definitions]
+    _errors += _pipeline_names_errors(_pipeline_names)
+
+    _index = build_reference_index(_definitions)
+    try:
+        _linked_services, _datasets = provisioned_linked_services(), provisioned_datasets()
+    except ValueError as _error:
+        return _index, _errors + [f"Configuration of the ADF stage: {_error}"]
+    return _index, (
+        _errors
+        + linked_service_errors(_index, set(_linked_services))
+        + dataset_errors(_index, set(_datasets))
+        + pipeline_errors(_index, set(_pipeline_names))
+        + artifact_errors(_index)
+        + parameter_errors(_index, _definitions)
+    )
+
+
+def check_pipelines() -> None:
+    """Validate all deployable pipelines (the first step of the program).
+    Raises:
+        ValueError: With all errors found (see `validate_pipelines`).
+    """
+    _, _errors = validate_pipelines()
+    if _errors:
+        raise ValueError("Invalid pipelines:\n  " + "\n  ".join(_errors))
+
+
+if __name__ == "__main__":
+    _parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    _parser.add_argument("--json", type=pathlib.Path, help="Where to store the reference index")
+    _arguments = _parser.parse_args()
+
+    _index, _errors = validate_pipelines()
+    if _arguments.json:
+        _arguments.json.write_text(json.dumps(_index, indent=2))
+    for _error in _errors:
+        print(_error)
+    print(f"{len(_errors)} error(s) found" if _errors else "All pipelines are valid")
+    sys.exit(1 if _errors else 0)
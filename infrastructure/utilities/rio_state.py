@@ -0,0 +1,46 @@
+"""State table of incremental ingestion of the Rio pipeline (see RioPipelineConfig).
+
+The state (Delta) table keeps a row per source table: its mode, the high-watermark (mode
+WATERMARK) or the last processed LSN (mode CDC) and statistics of the last run. The Rio job
+reads the state before extracting a table and updates it (in the same transaction as the
+MERGE of changed rows, or right after it), so a failed run is repeated from the last state.
+"""
+import hashlib
+
+# Columns of the state table (name, Spark SQL type, comment)
+STATE_TABLE_COLUMNS: list[tuple[str, str, str]] = [
+    ("table_name", "STRING NOT NULL", "Source table (<SCHEMA>.<TABLE>)"),
+    ("mode", "STRING NOT NULL", "FULL, WATERMARK or CDC"),
+    ("watermark_column", "STRING", "Column of the high-watermark (mode WATERMARK)"),
+    ("watermark_value", "STRING", "High-watermark of the last run (rowversion as hex)"),
+    ("cdc_lsn", "STRING", "Last processed LSN (mode CDC, hex)"),
+    ("rows_merged", "BIGINT", "Rows extracted by the last run"),
+    ("last_run_id", "STRING", "ADF run ID of the last run"),
+    ("updated_at", "TIMESTAMP", "End of the last run"),
+]
+
+
+def state_table_ddl(location: str) -> str:
+    """Statement creating the state table at the location (if it does not exist yet)."""
+    _columns = ",\n    ".join(
+        f"{_name} {_type} COMMENT '{_comment}'" for _name, _type, _comment in STATE_TABLE_COLUMNS
+    )
+    return (
+        f"CREATE TABLE IF NOT EXISTS delta.`{location}` (\n    {_columns}\n)\n"
+        f"USING DELTA\n"
+        f"TBLPROPERTIES ('delta.enableChangeDataFeed' = 'true')"
+    )
+
+
+def bootstrap_notebook_source(location: str) -> str:
+    """Source of the (Python) notebook creating the state table."""
+    return (
+        "# Databricks notebook source\n"
+        "# Creates the state table of incremental ingestion of the Rio pipeline (HeifER)\n"
+        f"spark.sql({state_table_ddl(location)!r})\n"
+    )
+
+
+def bootstrap_revision(location: str) -> str:
+    """Revision of the bootstrap (the job runs again once the state table definition changes)."""
+    return hashlib.sha256(bootstrap_notebook_source(location).encode()).hexdigest()[:16]
@@ -0,0 +1,64 @@
+"""Generation of user-defined routes (UDR) for the Databricks route table.
+
+Only control-plane ranges of the deployment region (and configured extra regions) are
+routed, and adjacent or overlapping prefixes are collapsed into the minimal covering set.
+"""
+import re
+import ipaddress
+from typing import Optional
+
+# Maximal number of routes in a single Azure route table
+MAX_ROUTES_PER_TABLE: int = 400
+
+
+def regions_ip_prefixes(ip_map: dict[str, list[str]], regions: list[str]) -> dict[str, list[str]]:
+    """Select IP prefixes of given regions.
+
+    Keys with a numeric suffix (like 'eastasia0') are treated as additional ranges of the region
+    without the suffix, if such region exists in the map.
+    Args:
+        ip_map: Mapping region -> list of IP prefixes (see DATABRICKS_UDR_IP_MAP).
+        regions: Regions to be included.
+    Returns:
+        Mapping region -> list of IP prefixes (only for the selected regions).
+    """
+    _selected: dict[str, list[str]] = {}
+    for _key, _prefixes in ip_map.items():
+        _region = re.sub(r"\d+$", "", _key)
+        if _region not in ip_map:
+            _region = _key
+        if _region in regions:
+            _selected.setdefault(_region, []).extend(_prefixes)
+    return _selected
+
+
+def collapse_prefixes(prefixes: list[str]) -> list[str]:
+    """Collapse adjacent or overlapping prefixes into the minimal covering set."""
+    return [
+        str(_network) for _network in ipaddress.collapse_addresses(
+            ipaddress.ip_network(_prefix, strict=False) for _prefix in prefixes
+        )
+    ]
+
+
+def generate_udr_routes(ip_map: dict[str, list[str]], regions: list[str],
+                        base_routes: Optional[dict[str, str]] = None) -> dict[str, str]:
+    """Generate routes (name -> address prefix) for given regions.
+    Args:
+        ip_map: Mapping region -> list of IP prefixes (see DATABRICKS_UDR_IP_MAP).
+        regions: Regions to be included (typically the deployment region).
+        base_routes: Other routes of the table (e.g. service tags), included in the result.
+    Returns:
+        Mapping route name -> address prefix.
+    Raises:
+        ValueError: If there are too many routes for one route table.
+    """
+    _routes: dict[str, str] = dict(base_routes or {})
+    for _region, _prefixes in regions_ip_prefixes(ip_map, regions).items():
+        for _ip_idx, _prefix in enumerate(collapse_prefixes(_prefixes)):
+            _routes[f"heifer-location-{_region}-{_ip_idx}"] = _prefix
+    if len(_routes) > MAX_ROUTES_PER_TABLE:
+        raise ValueError(
+            f"{len(_routes)} routes exceed the limit of {MAX_ROUTES_PER_TABLE} per route table"
+        )
+    return _routes
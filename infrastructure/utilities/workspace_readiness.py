@@ -0,0 +1,185 @@
+"""Active readiness probe of the Databricks workspace (replaces a fixed-duration sleep).
+
+The workspace is considered ready once its ARM provisioning state is `Succeeded` and its
+API (control plane) answers HTTP requests. The state is polled with exponential backoff
+and the wait fails once the configurable ceiling is exceeded.
+
+Endpoints are parameters, so the polling logic can be tested against a local stand-in
+HTTP server (see `probe_workspace` and `wait_until_ready`, tested by
+`tests/test_workspace_readiness.py`).
+"""
+import json
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Callable, Optional
+
+import pulumi
+import pulumi.dynamic
+
+# Version of ARM API used for reading the workspace state
+_WORKSPACE_API_VERSION: str = "2024-05-01"
+# Endpoint of the Databricks API used for checking reachability (any non-5xx answer counts)
+_WORKSPACE_API_PATH: str = "/api/2.0/clusters/spark-versions"
+
+
+def wait_until_ready(probe: Callable[[], bool], timeout: float, initial_delay: float = 5.0,
+                     max_delay: float = 60.0, sleep: Callable[[float], None] = time.sleep,
+                     clock: Callable[[], float] = time.monotonic) -> float:
+    """Poll the probe with exponential backoff until it returns True.
+    Args:
+        probe: Function returning True once the resource is ready.
+        timeout: Ceiling (in seconds) for the whole wait.
+        initial_delay: First delay between probes (doubled after each probe).
+        max_delay: Maximal delay between two probes.
+        sleep: Sleep function (injectable for testing).
+        clock: Monotonic clock (injectable for testing).
+    Returns:
+        Number of seconds it took for the resource to become ready.
+    Raises:
+        TimeoutError: If the resource is not ready within the timeout.
+    """
+    _start = clock()
+    _delay = initial_delay
+    while True:
+        if probe():
+            return clock() - _start
+        _remaining = timeout - (clock() - _start)
+        if _remaining <= 0:
+            raise TimeoutError(f"Resource is not ready after {timeout} seconds")
+        sleep(min(_delay, max_delay, _remaining))
+        _delay = min(_delay * 2, max_delay)
+
+
+def cached_token(credential: Any, scope: str, refresh_margin: float = 300.0,
+                 clock: Callable[[], float] = time.time) -> Callable[[], str]:
+    """Function returning a token of the credential for the scope, requested again only once
+    the previous one is about to expire.
+    Args:
+        credential: Azure credential (e.g. DefaultAzureCredential), created once per wait.
+        scope: Scope of the token.
+        refresh_margin: Seconds before the expiry when a new token is requested.
+        clock: Clock in seconds since the epoch (injectable for testing).
+    """
+    _token: list = []
+
+    def _get_token() -> str:
+        if not _token or _token[0].expires_on - refresh_margin <= clock():
+            _token[:] = [credential.get_token(scope)]
+        return _token[0].token
+
+    return _get_token
+
+
+def _http_status(url: str, access_token: Optional[str] = None,
+                 request_timeout: float = 10.0) -> tuple[int, bytes]:
+    """Perform GET request and return status code and body (network errors -> status 0)."""
+    _request = urllib.request.Request(url)
+    if access_token:
+        _request.add_header("Authorization", f"Bearer {access_token}")
+    try:
+        with urllib.request.urlopen(_request, timeout=request_timeout) as _response:
+            return _response.status, _response.read()
+    except urllib.error.HTTPError as _error:
+        return _error.code, b""
+    except (urllib.error.URLError, OSError):
+        return 0, b""
+
+
+def probe_workspace(management_endpoint: str, workspace_id: str, workspace_url: str,
+                    access_token: Optional[str]) -> bool:
+    """Check whether the workspace is provisioned and its API is reachable.
+    Args:
+        management_endpoint: ARM endpoint (typically https://management.azure.com).
+        workspace_id: ARM resource ID of the workspace.
+        workspace_url: URL (or host name) of the workspace.
+        access_token: Token for the ARM endpoint.
+    Returns:
+        True if the workspace is ready.
+    """
+    _status, _body = _http_status(
+        f"{management_endpoint.rstrip('/')}{workspace_id}?api-version={_WORKSPACE_API_VERSION}",
+        access_token,
+    )
+    if _status != 200:
+        return False
+    try:
+        _state = json.loads(_body).get("properties", {}).get("provisioningState")
+    except ValueError:
+        return False
+    if _state != "Succeeded":
+        return False
+    if "://" not in workspace_url:
+        workspace_url = f"https://{workspace_url}"
+    # Authentication errors (401/403) still prove that the API is up
+    _status, _ = _http_status(f"{workspace_url.rstrip('/')}{_WORKSPACE_API_PATH}")
+    return 0 < _status < 500
+
+
+class WorkspaceReadinessProvider(pulumi.dynamic.ResourceProvider):
+    """Dynamic provider that finishes creation once the workspace is usable."""
+    def _wait(self, props: dict[str, Any]) -> dict[str, Any]:
+        # Imported here as the token is needed only during the actual deployment
+        from azure.identity import DefaultAzureCredential
+        # One credential (and token, until it expires) for all probes of the wait
+        _access_token = cached_token(
+            DefaultAzureCredential(), f"{props['management_endpoint'].rstrip('/')}/.default"
+        )
+        _ready_after = wait_until_ready(
+            lambda: probe_workspace(
+                props["management_endpoint"], props["workspace_id"], props["workspace_url"],
+                _access_token(),
+            ),
+            timeout=float(props["timeout"]),
+            initial_delay=float(props["initial_delay"]),
+            max_delay=float(props["max_delay"]),
+        )
+        return props | {"ready_after_seconds": round(_ready_after, 1)}
+
+    def create(self, props: dict[str, Any]) -> pulumi.dynamic.CreateResult:
+        return pulumi.dynamic.CreateResult(id_=props["workspace_id"], outs=self._wait(props))
+
+    def diff(self, _id: str, olds: dict[str, Any],
+             news: dict[str, Any]) -> pulumi.dynamic.DiffResult:
+        # New workspace needs to be probed again; polling parameters do not matter afterwards
+        _replaces = [
+            _key for _key in ("workspace_id", "workspace_url") if olds.get(_key) != news.get(_key)
+        ]
+        return pulumi.dynamic.DiffResult(
+            changes=bool(_replaces), replaces=_replaces, delete_before_replace=False
+        )
+
+
+class WorkspaceReadiness(pulumi.dynamic.Resource):
+    """Resource that is created once the Databricks workspace is ready.
+    Args:
+        resource_name: Name of the resource.
+        workspace_id: ARM resource ID of the workspace.
+        workspace_url: URL (host name) of the workspace.
+        timeout: Ceiling (in seconds) for the wait.
+        initial_delay: First delay between probes (doubled after each probe).
+        max_delay: Maximal delay between two probes.
+        management_endpoint: ARM endpoint.
+        opts: Options of the resource.
+    """
+    ready_after_seconds: pulumi.Output[float]
+
+    def __init__(self, resource_name: str, workspace_id: pulumi.Input[str],
+                 workspace_url: pulumi.Input[str], timeout: float = 900.0,
+                 initial_delay: float = 5.0, max_delay: float = 60.0,
+                 management_endpoint: str = "https://management.azure.com",
+                 opts: Optional[pulumi.ResourceOptions] = None):
+        super().__init__(
+            WorkspaceReadinessProvider(),
+            resource_name,
+            {
+                "workspace_id": workspace_id,
+                "workspace_url": workspace_url,
+                "timeout": timeout,
+                "initial_delay": initial_delay,
+                "max_delay": max_delay,
+                "management_endpoint": management_endpoint,
+                "ready_after_seconds": None,
+            },
+            opts,
+        )